@@ -2,8 +2,8 @@
 Batch module for DynamicAI
 """
 
-from .scanner import BatchScanner, DocumentPair
+from .scanner import BatchScanner, DocumentPair, ScanDiff
 from .batch_database import BatchDatabase
 from .batch_exporter import BatchExporter
 
-__all__ = ['BatchScanner', 'DocumentPair', 'BatchDatabase', 'BatchExporter']
\ No newline at end of file
+__all__ = ['BatchScanner', 'DocumentPair', 'ScanDiff', 'BatchDatabase', 'BatchExporter']
\ No newline at end of file
@@ -4,13 +4,45 @@ Batch Database - Gestione persistenza stato batch per recovery da crash
 
 import sqlite3
 import os
-from typing import List, Optional, Dict
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, Dict
 from datetime import datetime
 import json
 
 
+# Colonne della tabella documenti nel Batch Manager (senza json_data/exported_files)
+DOCUMENT_ROW_COLUMNS = ('id', 'doc_path', 'json_path', 'relative_path', 'workflow_type', 'status')
+
+# Indici secondari batch_documents (ricreati dopo gli inserimenti massivi, vedi add_documents)
+DOCUMENT_INDEXES = {
+    'idx_session_status': '''
+        CREATE INDEX IF NOT EXISTS idx_session_status 
+        ON batch_documents(session_id, status)
+    ''',
+    'idx_session_workflow': '''
+        CREATE INDEX IF NOT EXISTS idx_session_workflow
+        ON batch_documents(session_id, workflow_type)
+    ''',
+    # Paginazione per id dentro la sessione (keyset, senza ordinamento)
+    'idx_session_id': '''
+        CREATE INDEX IF NOT EXISTS idx_session_id
+        ON batch_documents(session_id, id)
+    ''',
+}
+
+# Documenti per executemany/transazione in add_documents
+INGEST_CHUNK_SIZE = 10000
+
+
 class BatchDatabase:
-    """Gestisce persistenza stato batch in SQLite"""
+    """
+    Gestisce persistenza stato batch in SQLite.
+    Una sola connessione (WAL, synchronous=NORMAL) condivisa da scansione, export e UI,
+    con accesso serializzato da un lock.
+    """
     
     def __init__(self, db_path: str = "data/batch_state.db"):
         """
@@ -31,12 +63,53 @@ class BatchDatabase:
         if db_dir and not os.path.exists(db_dir):
             os.makedirs(db_dir)
         
+        self._lock = threading.RLock()
+        # Aggiornamenti di stato in attesa (batched_updates): (status, error, exported, doc_id)
+        self._pending_updates = []
+        self._batch_depth = 0
+        self._batch_max_pending = 0
+        self._batch_max_delay = 0.0
+        self._last_flush = time.monotonic()
+        self.commits = 0
+        
+        # Connessione condivisa tra thread (autocommit, transazioni esplicite)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        
         self._init_database()
     
+    @contextmanager
+    def _transaction(self):
+        """Transazione di scrittura sulla connessione condivisa (lock tenuto per tutta la durata)"""
+        with self._lock:
+            if self.conn.in_transaction:
+                # Già dentro una transazione (es. flush annidato): nessun BEGIN/COMMIT
+                yield self.conn.cursor()
+                return
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self.conn.cursor()
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+            self.commits += 1
+    
+    @contextmanager
+    def _read(self):
+        """Cursore per letture: scrive prima gli aggiornamenti in attesa (letture sempre aggiornate)"""
+        with self._lock:
+            self._flush_locked()
+            yield self.conn.cursor()
+    
     def _init_database(self):
         """Crea tabelle se non esistono"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._transaction() as cursor:
+            self._create_tables(cursor)
+    
+    def _create_tables(self, cursor):
+        """Schema tabelle e indici"""
         
         # Tabella sessioni batch
         cursor.execute('''
@@ -71,18 +144,135 @@ class BatchDatabase:
         ''')
         
         # Indici per performance
+        for index_sql in DOCUMENT_INDEXES.values():
+            cursor.execute(index_sql)
+        
+        self._create_counters(cursor)
+        self._create_file_index(cursor)
+    
+    def _create_counters(self, cursor):
+        """
+        Contatori documenti per (sessione, stato, workflow) mantenuti da trigger,
+        insieme a batch_sessions.processed_documents: statistiche senza scansioni.
+        Stato/workflow NULL salvati come '' (chiave primaria senza NULL).
+        """
+        exists = cursor.execute('''
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'batch_session_counts'
+        ''').fetchone()
+        
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_session_status 
-            ON batch_documents(session_id, status)
+            CREATE TABLE IF NOT EXISTS batch_session_counts (
+                session_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                workflow_type TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (session_id, status, workflow_type)
+            ) WITHOUT ROWID
+        ''')
+        
+        if not exists:
+            # Database esistente: contatori calcolati una volta dai documenti
+            cursor.execute('''
+                INSERT INTO batch_session_counts (session_id, status, workflow_type, count)
+                SELECT session_id, IFNULL(status, ''), IFNULL(workflow_type, ''), COUNT(*)
+                FROM batch_documents
+                GROUP BY session_id, IFNULL(status, ''), IFNULL(workflow_type, '')
+            ''')
+            cursor.execute('''
+                UPDATE batch_sessions
+                SET processed_documents = (
+                    SELECT COUNT(*) FROM batch_documents
+                    WHERE batch_documents.session_id = batch_sessions.session_id
+                    AND status = 'completed'
+                )
+            ''')
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_batch_documents_insert
+            AFTER INSERT ON batch_documents
+            BEGIN
+                INSERT INTO batch_session_counts (session_id, status, workflow_type, count)
+                VALUES (NEW.session_id, IFNULL(NEW.status, ''), IFNULL(NEW.workflow_type, ''), 1)
+                ON CONFLICT (session_id, status, workflow_type) DO UPDATE SET count = count + 1;
+                UPDATE batch_sessions SET processed_documents = processed_documents + 1
+                WHERE NEW.status = 'completed' AND session_id = NEW.session_id;
+            END
         ''')
         
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_session_workflow
-            ON batch_documents(session_id, workflow_type)
+            CREATE TRIGGER IF NOT EXISTS trg_batch_documents_delete
+            AFTER DELETE ON batch_documents
+            BEGIN
+                UPDATE batch_session_counts SET count = count - 1
+                WHERE session_id = OLD.session_id AND status = IFNULL(OLD.status, '')
+                AND workflow_type = IFNULL(OLD.workflow_type, '');
+                UPDATE batch_sessions SET processed_documents = processed_documents - 1
+                WHERE OLD.status = 'completed' AND session_id = OLD.session_id;
+            END
         ''')
         
-        conn.commit()
-        conn.close()
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS trg_batch_documents_update
+            AFTER UPDATE OF session_id, status, workflow_type ON batch_documents
+            WHEN OLD.session_id IS NOT NEW.session_id OR OLD.status IS NOT NEW.status
+                OR OLD.workflow_type IS NOT NEW.workflow_type
+            BEGIN
+                UPDATE batch_session_counts SET count = count - 1
+                WHERE session_id = OLD.session_id AND status = IFNULL(OLD.status, '')
+                AND workflow_type = IFNULL(OLD.workflow_type, '');
+                INSERT INTO batch_session_counts (session_id, status, workflow_type, count)
+                VALUES (NEW.session_id, IFNULL(NEW.status, ''), IFNULL(NEW.workflow_type, ''), 1)
+                ON CONFLICT (session_id, status, workflow_type) DO UPDATE SET count = count + 1;
+                UPDATE batch_sessions SET processed_documents = processed_documents - 1
+                WHERE OLD.status = 'completed' AND session_id = OLD.session_id;
+                UPDATE batch_sessions SET processed_documents = processed_documents + 1
+                WHERE NEW.status = 'completed' AND session_id = NEW.session_id;
+            END
+        ''')
+    
+    def _create_file_index(self, cursor):
+        """
+        Indice persistente dei file scansionati per sessione (rescan incrementali):
+        dimensione/mtime (ns) di documento e JSON, workflow, pagine; per le directory
+        mtime e sottocartelle
+        """
+        cursor.execute("PRAGMA table_info(batch_file_index)")
+        columns = {row[1] for row in cursor.fetchall()}
+        if columns and 'session_id' not in columns:
+            # Indice per cartella root (versione precedente): è solo una cache, ricostruita alla prossima scansione
+            cursor.execute('DROP TABLE batch_file_index')
+            cursor.execute('DROP TABLE IF EXISTS batch_dir_index')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS batch_file_index (
+                session_id TEXT NOT NULL,
+                doc_path TEXT NOT NULL,
+                dir_path TEXT NOT NULL,
+                json_path TEXT NOT NULL,
+                doc_size INTEGER,
+                doc_mtime INTEGER,
+                json_size INTEGER,
+                json_mtime INTEGER,
+                workflow_type TEXT,
+                page_count INTEGER,
+                PRIMARY KEY (session_id, doc_path)
+            ) WITHOUT ROWID
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_file_index_dir
+            ON batch_file_index(session_id, dir_path)
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS batch_dir_index (
+                session_id TEXT NOT NULL,
+                dir_path TEXT NOT NULL,
+                mtime INTEGER,
+                subdirs TEXT,
+                PRIMARY KEY (session_id, dir_path)
+            ) WITHOUT ROWID
+        ''')
     
     def create_session(self, root_path: str, output_path: str = None) -> str:
         """
@@ -98,56 +288,111 @@ class BatchDatabase:
         import uuid
         session_id = str(uuid.uuid4())
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO batch_sessions (session_id, root_path, output_path)
-            VALUES (?, ?, ?)
-        ''', (session_id, root_path, output_path))
-        
-        conn.commit()
-        conn.close()
+        with self._transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO batch_sessions (session_id, root_path, output_path)
+                VALUES (?, ?, ?)
+            ''', (session_id, root_path, output_path))
         
         return session_id
     
-    def add_documents(self, session_id: str, documents: List):
+    def add_documents(self, session_id: str, documents: Iterable,
+                      chunk_size: int = INGEST_CHUNK_SIZE, defer_indexes: bool = False) -> int:
         """
-        Aggiunge documenti alla sessione
+        Aggiunge documenti alla sessione (inserimento massivo).
+        Legge l'iterabile a blocchi di chunk_size: un executemany e una transazione per
+        blocco, così le letture di altri thread (tabella, statistiche) non restano bloccate.
+        Il JSON è salvato come testo originale del file (DocumentPair.json_text) quando disponibile.
         
         Args:
             session_id: ID sessione
-            documents: Lista DocumentPair da aggiungere
-        """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for doc in documents:
-            # Serializza json_data
-            json_data_str = json.dumps(doc.json_data) if doc.json_data else None
+            documents: Iterabile (anche generatore) di DocumentPair
+            chunk_size: Documenti per transazione
+            defer_indexes: Importazione "offline": indici secondari e trigger contatori
+                sospesi, ricostruiti alla fine; database bloccato per gli altri thread
+                fino al termine. Conviene solo se i documenti importati sono molti
+                rispetto a quelli già presenti (gli indici sono ricreati su tutta la tabella)
             
-            cursor.execute('''
-                INSERT INTO batch_documents 
-                (session_id, doc_path, json_path, relative_path, workflow_type, 
-                 status, json_data)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (session_id, doc.doc_path, doc.json_path, doc.relative_path,
-                  doc.workflow_type, doc.status, json_data_str))
-        
-        # Aggiorna contatore totale documenti
+        Returns:
+            Numero documenti inseriti
+        """
+        rows = (
+            (session_id, doc.doc_path, doc.json_path, doc.relative_path, doc.workflow_type,
+             doc.status, self._get_json_text(doc))
+            for doc in documents
+        )
+        
+        if not defer_indexes:
+            return self._insert_document_rows(session_id, rows, chunk_size)
+        
+        with self._lock:
+            with self._transaction() as cursor:
+                for index_name in DOCUMENT_INDEXES:
+                    cursor.execute(f'DROP INDEX IF EXISTS {index_name}')
+                cursor.execute('DROP TRIGGER IF EXISTS trg_batch_documents_insert')
+            try:
+                return self._insert_document_rows(session_id, rows, chunk_size)
+            finally:
+                with self._transaction() as cursor:
+                    for index_sql in DOCUMENT_INDEXES.values():
+                        cursor.execute(index_sql)
+                    self._create_counters(cursor)
+                    self._rebuild_session_counters(cursor, session_id)
+    
+    def _insert_document_rows(self, session_id: str, rows: Iterable[tuple], chunk_size: int) -> int:
+        """Inserisce righe batch_documents a blocchi (una transazione per blocco)"""
+        inserted = 0
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                return inserted
+            with self._transaction() as cursor:
+                cursor.executemany('''
+                    INSERT INTO batch_documents 
+                    (session_id, doc_path, json_path, relative_path, workflow_type, 
+                     status, json_data)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', chunk)
+                
+                # Aggiorna contatore totale documenti
+                cursor.execute('''
+                    UPDATE batch_sessions 
+                    SET total_documents = total_documents + ?
+                    WHERE session_id = ?
+                ''', (len(chunk), session_id))
+            inserted += len(chunk)
+    
+    def _rebuild_session_counters(self, cursor, session_id: str):
+        """Ricalcola contatori e processed_documents di una sessione dai documenti"""
+        cursor.execute('DELETE FROM batch_session_counts WHERE session_id = ?', (session_id,))
         cursor.execute('''
-            UPDATE batch_sessions 
-            SET total_documents = ?
+            INSERT INTO batch_session_counts (session_id, status, workflow_type, count)
+            SELECT session_id, IFNULL(status, ''), IFNULL(workflow_type, ''), COUNT(*)
+            FROM batch_documents
             WHERE session_id = ?
-        ''', (len(documents), session_id))
-        
-        conn.commit()
-        conn.close()
+            GROUP BY IFNULL(status, ''), IFNULL(workflow_type, '')
+        ''', (session_id,))
+        cursor.execute('''
+            UPDATE batch_sessions
+            SET processed_documents = (
+                SELECT COUNT(*) FROM batch_documents
+                WHERE session_id = ? AND status = 'completed'
+            )
+            WHERE session_id = ?
+        ''', (session_id, session_id))
+    
+    @staticmethod
+    def _get_json_text(doc) -> Optional[str]:
+        """Testo JSON da salvare: originale dal disco se presente, altrimenti serializzato"""
+        json_text = getattr(doc, 'json_text', None)
+        if json_text:
+            return json_text
+        return json.dumps(doc.json_data) if doc.json_data else None
     
     def update_document_status(self, doc_id: int, status: str, 
                                error: str = None, exported_files: List[str] = None):
         """
-        Aggiorna stato documento
+        Aggiorna stato documento (dentro batched_updates: accodato e scritto col gruppo)
         
         Args:
             doc_id: ID documento
@@ -155,43 +400,81 @@ class BatchDatabase:
             error: Messaggio errore (opzionale)
             exported_files: Lista file esportati (opzionale)
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         exported_str = json.dumps(exported_files) if exported_files else None
+        update = (status, error, exported_str, doc_id)
+        
+        with self._lock:
+            if self._batch_depth:
+                self._pending_updates.append(update)
+                if (len(self._pending_updates) >= self._batch_max_pending or
+                        time.monotonic() - self._last_flush >= self._batch_max_delay):
+                    self._flush_locked()
+                return
+            
+            with self._transaction() as cursor:
+                self._write_status_updates(cursor, [update])
+    
+    @contextmanager
+    def batched_updates(self, max_pending: int = 500, max_delay: float = 1.0):
+        """
+        Raggruppa gli update_document_status in transazioni periodiche: una ogni
+        max_pending aggiornamenti o max_delay secondi, più una finale all'uscita.
+        Vale per tutti i thread; le letture scrivono prima gli aggiornamenti in attesa.
         
-        cursor.execute('''
+        Args:
+            max_pending: Aggiornamenti accumulati prima del commit
+            max_delay: Secondi massimi tra due commit (controllato ad ogni aggiornamento)
+        """
+        with self._lock:
+            if self._batch_depth == 0:
+                self._batch_max_pending = max_pending
+                self._batch_max_delay = max_delay
+                self._last_flush = time.monotonic()
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._flush_locked()
+    
+    def flush(self):
+        """Scrive subito gli aggiornamenti di stato in attesa"""
+        with self._lock:
+            self._flush_locked()
+    
+    def _flush_locked(self):
+        """Scrive gli aggiornamenti in attesa in una transazione (lock già acquisito)"""
+        self._last_flush = time.monotonic()
+        if not self._pending_updates:
+            return
+        updates, self._pending_updates = self._pending_updates, []
+        try:
+            with self._transaction() as cursor:
+                self._write_status_updates(cursor, updates)
+        except Exception:
+            self._pending_updates[:0] = updates  # Riprovati al prossimo flush
+            raise
+    
+    def _write_status_updates(self, cursor, updates: List[tuple]):
+        """
+        Applica aggiornamenti (status, error, exported, doc_id) nella transazione corrente.
+        Contatori sessione (batch_session_counts, processed_documents) aggiornati dai trigger.
+        """
+        cursor.executemany('''
             UPDATE batch_documents 
             SET status = ?, 
                 processed_at = CURRENT_TIMESTAMP, 
                 error_message = ?,
                 exported_files = ?
             WHERE id = ?
-        ''', (status, error, exported_str, doc_id))
-        
-        # Aggiorna contatore sessione se completato
-        if status == 'completed':
-            cursor.execute('''
-                SELECT session_id FROM batch_documents WHERE id = ?
-            ''', (doc_id,))
-            session_id = cursor.fetchone()[0]
-            
-            cursor.execute('''
-                UPDATE batch_sessions
-                SET processed_documents = (
-                    SELECT COUNT(*) FROM batch_documents
-                    WHERE session_id = ? AND status = 'completed'
-                )
-                WHERE session_id = ?
-            ''', (session_id, session_id))
-        
-        conn.commit()
-        conn.close()
+        ''', updates)
     
     def get_session_documents(self, session_id: str, status: str = None, 
                              workflow: str = None) -> List[Dict]:
         """
-        Recupera documenti della sessione
+        Recupera documenti completi della sessione (json_data deserializzato, per export/CSV)
         
         Args:
             session_id: ID sessione
@@ -201,9 +484,6 @@ class BatchDatabase:
         Returns:
             Lista dizionari con dati documenti
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         query = 'SELECT * FROM batch_documents WHERE session_id = ?'
         params = [session_id]
         
@@ -217,49 +497,289 @@ class BatchDatabase:
         
         query += ' ORDER BY id'
         
-        cursor.execute(query, params)
+        with self._read() as cursor:
+            cursor.execute(query, params)
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchall()
         
-        columns = [desc[0] for desc in cursor.description]
-        results = []
+        return [self._decode_document(dict(zip(columns, row))) for row in rows]
+    
+    def get_session_document_page(self, session_id: str, after_id: int = 0, limit: int = 500,
+                                  status: str = None) -> List[Dict]:
+        """
+        Pagina di documenti della sessione con le sole colonne della tabella (DOCUMENT_ROW_COLUMNS).
+        Paginazione keyset sull'id: costo indipendente dalla posizione della pagina
         
-        for row in cursor.fetchall():
-            doc_dict = dict(zip(columns, row))
-            
-            # Deserializza json_data
-            if doc_dict.get('json_data'):
-                try:
-                    doc_dict['json_data'] = json.loads(doc_dict['json_data'])
-                except:
-                    doc_dict['json_data'] = None
-            
-            # Deserializza exported_files
-            if doc_dict.get('exported_files'):
-                try:
-                    doc_dict['exported_files'] = json.loads(doc_dict['exported_files'])
-                except:
-                    doc_dict['exported_files'] = []
+        Args:
+            session_id: ID sessione
+            after_id: Ultimo id della pagina precedente (0 = dall'inizio)
+            limit: Documenti per pagina
+            status: Filtra per stato (opzionale)
             
-            results.append(doc_dict)
+        Returns:
+            Lista dizionari ordinata per id (meno di limit = ultima pagina)
+        """
+        query = f'SELECT {", ".join(DOCUMENT_ROW_COLUMNS)} FROM batch_documents WHERE session_id = ?'
+        params = [session_id]
         
-        conn.close()
-        return results
+        if status:
+            query += ' AND status = ?'
+            params.append(status)
+        
+        query += ' AND id > ? ORDER BY id LIMIT ?'
+        params.extend((after_id, limit))
+        
+        with self._read() as cursor:
+            rows = cursor.execute(query, params).fetchall()
+        
+        return [dict(zip(DOCUMENT_ROW_COLUMNS, row)) for row in rows]
     
-    def get_session_info(self, session_id: str) -> Optional[Dict]:
+    def get_session_document_ids(self, session_id: str, status: str = None) -> List[int]:
+        """Id dei documenti della sessione in ordine (es. coda di validazione sequenziale)"""
+        query = 'SELECT id FROM batch_documents WHERE session_id = ?'
+        params = [session_id]
+        
+        if status:
+            query += ' AND status = ?'
+            params.append(status)
+        
+        query += ' ORDER BY id'
+        
+        with self._read() as cursor:
+            return [row[0] for row in cursor.execute(query, params)]
+    
+    def get_document(self, doc_id: int) -> Optional[Dict]:
         """
-        Recupera informazioni sessione
+        Documento completo (json_data ed exported_files deserializzati), per apertura o dettagli
         
         Returns:
-            Dizionario con dati sessione o None
+            Dizionario documento o None se non esiste
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._read() as cursor:
+            cursor.execute('SELECT * FROM batch_documents WHERE id = ?', (doc_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            columns = [desc[0] for desc in cursor.description]
+        
+        return self._decode_document(dict(zip(columns, row)))
+    
+    def _decode_document(self, doc_dict: Dict) -> Dict:
+        """Deserializza json_data ed exported_files di una riga completa"""
+        if doc_dict.get('json_data'):
+            try:
+                doc_dict['json_data'] = json.loads(doc_dict['json_data'])
+            except:
+                doc_dict['json_data'] = None
+        
+        if doc_dict.get('exported_files'):
+            try:
+                doc_dict['exported_files'] = json.loads(doc_dict['exported_files'])
+            except:
+                doc_dict['exported_files'] = []
+        
+        return doc_dict
+    
+    # ==========================================
+    # INDICE FILE (rescan incrementale)
+    # ==========================================
+    
+    def get_indexed_directory(self, session_id: str, dir_path: str) -> Optional[tuple]:
+        """
+        Returns:
+            (mtime ns o None, nomi sottocartelle) dall'ultima scansione, None se non indicizzata
+        """
+        with self._read() as cursor:
+            cursor.execute('''
+                SELECT mtime, subdirs FROM batch_dir_index WHERE session_id = ? AND dir_path = ?
+            ''', (session_id, dir_path))
+            row = cursor.fetchone()
+        if not row:
+            return None
+        return row[0], json.loads(row[1]) if row[1] else []
+    
+    def get_indexed_directories(self, session_id: str) -> List[str]:
+        """Directory indicizzate della sessione"""
+        with self._read() as cursor:
+            cursor.execute('''
+                SELECT dir_path FROM batch_dir_index WHERE session_id = ?
+            ''', (session_id,))
+            return [row[0] for row in cursor.fetchall()]
+    
+    def get_indexed_files(self, session_id: str, dir_path: str) -> Dict[str, tuple]:
+        """
+        Coppie indicizzate di una directory
         
+        Returns:
+            doc_path -> (doc_path, json_path, doc_size, doc_mtime, json_size, json_mtime,
+                         workflow_type, page_count)
+        """
+        with self._read() as cursor:
+            cursor.execute('''
+                SELECT doc_path, json_path, doc_size, doc_mtime, json_size, json_mtime,
+                       workflow_type, page_count
+                FROM batch_file_index WHERE session_id = ? AND dir_path = ?
+            ''', (session_id, dir_path))
+            return {row[0]: row for row in cursor.fetchall()}
+    
+    def count_indexed_files(self, session_id: str, dir_path: str) -> int:
+        """Numero coppie indicizzate di una directory"""
+        with self._read() as cursor:
+            cursor.execute('''
+                SELECT COUNT(*) FROM batch_file_index WHERE session_id = ? AND dir_path = ?
+            ''', (session_id, dir_path))
+            return cursor.fetchone()[0]
+    
+    def get_indexed_page_count(self, session_id: str, doc_path: str) -> Optional[int]:
+        """Numero pagine salvato nell'indice (None se non ancora contato o non indicizzato)"""
+        with self._read() as cursor:
+            cursor.execute('''
+                SELECT page_count FROM batch_file_index WHERE session_id = ? AND doc_path = ?
+            ''', (session_id, doc_path))
+            row = cursor.fetchone()
+        return row[0] if row else None
+    
+    def set_indexed_page_count(self, session_id: str, doc_path: str, page_count: int):
+        """Salva nell'indice il numero pagine contato su richiesta"""
+        with self._transaction() as cursor:
+            cursor.execute('''
+                UPDATE batch_file_index SET page_count = ? WHERE session_id = ? AND doc_path = ?
+            ''', (page_count, session_id, doc_path))
+    
+    def update_indexed_directory(self, session_id: str, dir_path: str, mtime: Optional[int],
+                                 subdirs: List[str], records: List[tuple]):
+        """
+        Sostituisce l'indice di una directory riletta
+        
+        Args:
+            mtime: mtime directory in ns (None = da rileggere alla prossima scansione)
+            subdirs: Nomi sottocartelle
+            records: Tuple come get_indexed_files delle coppie presenti
+        """
+        with self._transaction() as cursor:
+            self._replace_indexed_directory(cursor, session_id, dir_path, mtime, subdirs, records)
+    
+    def remove_indexed_directories(self, session_id: str, dir_paths: List[str]):
+        """Rimuove dall'indice directory non più presenti (e le loro coppie)"""
+        with self._transaction() as cursor:
+            self._delete_indexed_directories(cursor, session_id, dir_paths)
+    
+    def _replace_indexed_directory(self, cursor, session_id: str, dir_path: str, mtime: Optional[int],
+                                   subdirs: List[str], records: List[tuple]):
         cursor.execute('''
-            SELECT * FROM batch_sessions WHERE session_id = ?
-        ''', (session_id,))
+            INSERT OR REPLACE INTO batch_dir_index (session_id, dir_path, mtime, subdirs)
+            VALUES (?, ?, ?, ?)
+        ''', (session_id, dir_path, mtime, json.dumps(subdirs)))
+        cursor.execute('''
+            DELETE FROM batch_file_index WHERE session_id = ? AND dir_path = ?
+        ''', (session_id, dir_path))
+        cursor.executemany('''
+            INSERT OR REPLACE INTO batch_file_index
+            (session_id, dir_path, doc_path, json_path, doc_size, doc_mtime, json_size, json_mtime,
+             workflow_type, page_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [(session_id, dir_path) + tuple(record) for record in records])
+    
+    def _delete_indexed_directories(self, cursor, session_id: str, dir_paths: List[str]):
+        rows = [(session_id, dir_path) for dir_path in dir_paths]
+        cursor.executemany('DELETE FROM batch_dir_index WHERE session_id = ? AND dir_path = ?', rows)
+        cursor.executemany('DELETE FROM batch_file_index WHERE session_id = ? AND dir_path = ?', rows)
+    
+    def merge_scan_diff(self, session_id: str, diff) -> Dict:
+        """
+        Applica alla sessione le differenze di un rescan incrementale, insieme all'indice
+        file della sessione (una transazione: indice e documenti restano allineati anche se
+        il rescan si interrompe prima del merge).
+        Coppie nuove inserite, modificate riportate a pending con il nuovo JSON, rimosse eliminate
         
-        row = cursor.fetchone()
-        conn.close()
+        Args:
+            session_id: ID sessione
+            diff: ScanDiff da BatchScanner.rescan
+            
+        Returns:
+            Dizionario con 'added', 'changed', 'removed' applicati
+        """
+        new_or_changed = list(diff.added) + list(diff.changed)
+        
+        with self._lock:
+            self._flush_locked()
+            with self._transaction() as cursor:
+                # Id nella sessione dei path coinvolti (tabella temporanea: una sola scansione della sessione)
+                cursor.execute('CREATE TEMP TABLE IF NOT EXISTS scan_diff_paths (doc_path TEXT PRIMARY KEY)')
+                cursor.execute('DELETE FROM temp.scan_diff_paths')
+                cursor.executemany(
+                    'INSERT OR IGNORE INTO temp.scan_diff_paths (doc_path) VALUES (?)',
+                    [(path,) for path in diff.removed] + [(pair.doc_path,) for pair in new_or_changed]
+                )
+                cursor.execute('''
+                    SELECT doc_path, id FROM batch_documents
+                    WHERE session_id = ? AND doc_path IN (SELECT doc_path FROM temp.scan_diff_paths)
+                ''', (session_id,))
+                existing = dict(cursor.fetchall())
+                cursor.execute('DELETE FROM temp.scan_diff_paths')
+                
+                removed_ids = [(existing[path],) for path in diff.removed if path in existing]
+                cursor.executemany('DELETE FROM batch_documents WHERE id = ?', removed_ids)
+                
+                # Documento modificato: da rivalidare. Coppie "nuove" già nella sessione (indice
+                # assente, es. sessione creata prima dell'indice) solo se il JSON è cambiato
+                update_sql = '''
+                    UPDATE batch_documents
+                    SET json_path = ?, relative_path = ?, workflow_type = ?, json_data = ?,
+                        status = 'pending', processed_at = NULL, error_message = NULL,
+                        exported_files = NULL
+                    WHERE id = ?
+                '''
+                changed = 0
+                for pairs, condition in ((diff.changed, ''), (diff.added, ' AND json_data IS NOT ?')):
+                    updates = []
+                    for pair in pairs:
+                        if pair.doc_path in existing:
+                            json_text = self._get_json_text(pair)
+                            updates.append((pair.json_path, pair.relative_path, pair.workflow_type, json_text,
+                                            existing[pair.doc_path]) + ((json_text,) if condition else ()))
+                    if updates:
+                        cursor.executemany(update_sql + condition, updates)
+                        changed += cursor.rowcount
+                
+                added = self._insert_document_rows(session_id, (
+                    (session_id, pair.doc_path, pair.json_path, pair.relative_path, pair.workflow_type,
+                     'pending', self._get_json_text(pair))
+                    for pair in new_or_changed if pair.doc_path not in existing
+                ), INGEST_CHUNK_SIZE)
+                
+                cursor.execute('''
+                    UPDATE batch_sessions
+                    SET total_documents = total_documents - ?
+                    WHERE session_id = ?
+                ''', (len(removed_ids), session_id))
+                
+                # Indice file: directory rilette e sparite
+                for dir_path, mtime, subdirs, records in diff.index_updates:
+                    self._replace_indexed_directory(cursor, session_id, dir_path, mtime, subdirs, records)
+                self._delete_indexed_directories(cursor, session_id, diff.removed_dirs)
+                
+                if added or changed or removed_ids:
+                    # Sessione riaperta: ci sono documenti da (ri)validare o esportare
+                    cursor.execute('''
+                        UPDATE batch_sessions SET completed = 0, completed_at = NULL
+                        WHERE session_id = ?
+                    ''', (session_id,))
+        
+        return {'added': added, 'changed': changed, 'removed': len(removed_ids)}
+    
+    def get_session_info(self, session_id: str) -> Optional[Dict]:
+        """
+        Recupera informazioni sessione
+        
+        Returns:
+            Dizionario con dati sessione o None
+        """
+        with self._read() as cursor:
+            cursor.execute('''
+                SELECT * FROM batch_sessions WHERE session_id = ?
+            ''', (session_id,))
+            row = cursor.fetchone()
         
         if not row:
             return None
@@ -274,34 +794,25 @@ class BatchDatabase:
         Returns:
             Lista sessioni incomplete ordinate per data
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM batch_sessions 
-            WHERE completed = 0
-            ORDER BY created_at DESC
-        ''')
-        
-        columns = [desc[0] for desc in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        with self._read() as cursor:
+            cursor.execute('''
+                SELECT * FROM batch_sessions 
+                WHERE completed = 0
+                ORDER BY created_at DESC
+            ''')
+            columns = [desc[0] for desc in cursor.description]
+            results = [dict(zip(columns, row)) for row in cursor.fetchall()]
         
-        conn.close()
         return results
     
     def mark_session_completed(self, session_id: str):
         """Marca sessione come completata"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE batch_sessions
-            SET completed = 1, completed_at = CURRENT_TIMESTAMP
-            WHERE session_id = ?
-        ''', (session_id,))
-        
-        conn.commit()
-        conn.close()
+        with self._transaction() as cursor:
+            cursor.execute('''
+                UPDATE batch_sessions
+                SET completed = 1, completed_at = CURRENT_TIMESTAMP
+                WHERE session_id = ?
+            ''', (session_id,))
     
     def delete_session(self, session_id: str):
         """
@@ -310,55 +821,41 @@ class BatchDatabase:
         Args:
             session_id: ID sessione da eliminare
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Elimina documenti
-        cursor.execute('DELETE FROM batch_documents WHERE session_id = ?', (session_id,))
-        
-        # Elimina sessione
-        cursor.execute('DELETE FROM batch_sessions WHERE session_id = ?', (session_id,))
-        
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._flush_locked()  # Aggiornamenti in attesa prima della cancellazione
+            with self._transaction() as cursor:
+                # Elimina documenti
+                cursor.execute('DELETE FROM batch_documents WHERE session_id = ?', (session_id,))
+                
+                # Elimina sessione e contatori (azzerati dal trigger)
+                cursor.execute('DELETE FROM batch_sessions WHERE session_id = ?', (session_id,))
+                cursor.execute('DELETE FROM batch_session_counts WHERE session_id = ?', (session_id,))
+                cursor.execute('DELETE FROM batch_file_index WHERE session_id = ?', (session_id,))
+                cursor.execute('DELETE FROM batch_dir_index WHERE session_id = ?', (session_id,))
     
     def get_session_statistics(self, session_id: str) -> Dict:
         """
-        Calcola statistiche sessione
+        Statistiche sessione dai contatori (costo indipendente dal numero di documenti)
         
         Returns:
             Dizionario con statistiche
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Conta per stato
-        cursor.execute('''
-            SELECT status, COUNT(*) as count
-            FROM batch_documents
-            WHERE session_id = ?
-            GROUP BY status
-        ''', (session_id,))
-        
-        status_counts = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        # Conta per workflow
-        cursor.execute('''
-            SELECT workflow_type, COUNT(*) as count
-            FROM batch_documents
-            WHERE session_id = ?
-            GROUP BY workflow_type
-        ''', (session_id,))
-        
-        workflow_counts = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        # Totali
-        cursor.execute('''
-            SELECT COUNT(*) FROM batch_documents WHERE session_id = ?
-        ''', (session_id,))
-        total = cursor.fetchone()[0]
-        
-        conn.close()
+        with self._read() as cursor:
+            cursor.execute('''
+                SELECT status, workflow_type, count
+                FROM batch_session_counts
+                WHERE session_id = ? AND count > 0
+            ''', (session_id,))
+            rows = cursor.fetchall()
+        
+        status_counts = {}
+        workflow_counts = {}
+        for status, workflow_type, count in rows:
+            status = status or None
+            workflow_type = workflow_type or None
+            status_counts[status] = status_counts.get(status, 0) + count
+            workflow_counts[workflow_type] = workflow_counts.get(workflow_type, 0) + count
+        total = sum(status_counts.values())
         
         return {
             'total': total,
@@ -368,5 +865,21 @@ class BatchDatabase:
             'processing': status_counts.get('processing', 0),
             'completed': status_counts.get('completed', 0),
             'error': status_counts.get('error', 0),
+            'skipped': status_counts.get('skipped', 0),
             'progress_percent': (status_counts.get('completed', 0) / total * 100) if total > 0 else 0
-        }
\ No newline at end of file
+        }
+    
+    def get_stats(self) -> dict:
+        """Statistiche scritture (per monitoraggio)"""
+        with self._lock:
+            return {
+                'commits': self.commits,
+                'pending_updates': len(self._pending_updates),
+                'batching': self._batch_depth > 0
+            }
+    
+    def close(self):
+        """Scrive gli aggiornamenti in attesa e chiude la connessione"""
+        with self._lock:
+            self._flush_locked()
+            self.conn.close()
@@ -3,13 +3,56 @@ Batch Exporter - Gestisce export documenti preservando struttura directory
 """
 
 import os
-from typing import List, Dict, Callable
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Callable, Optional
 from PIL import Image
 
-from loaders import create_document_loader
+from loaders import create_document_loader, configure_thumbnail_cache
 from export import ExportManager
 
 
+class PageSource:
+    """Riferimento leggero a una pagina: l'immagine viene renderizzata solo in export"""
+    __slots__ = ('pagenum', 'document_loader', 'image')
+    
+    def __init__(self, pagenum: int, document_loader):
+        self.pagenum = pagenum
+        self.document_loader = document_loader
+        self.image = None
+
+
+# Exporter del processo worker (uno per processo, creato da _init_export_worker)
+_worker_exporter = None
+
+
+def _init_export_worker(config_manager):
+    """Inizializza il BatchExporter del processo worker"""
+    global _worker_exporter
+    # Nessun dialog Tk nei processi worker: 'ask_overwrite' diventa 'auto_rename'
+    if config_manager.get('file_handling_mode') == 'ask_overwrite':
+        config_manager.set('file_handling_mode', 'auto_rename')
+    # Indici IFD non condivisi: nessun processo worker apre il DB SQLite delle miniature
+    configure_thumbnail_cache(enabled=False)
+    _worker_exporter = BatchExporter(config_manager)
+    # Più processi scrivono nelle stesse cartelle: nomi riservati con O_EXCL
+    _worker_exporter.export_manager.reserve_output_files = True
+
+
+def _export_document_worker(doc_dict: Dict, base_output: str) -> tuple:
+    """
+    Esporta un documento nel processo worker
+    
+    Returns:
+        Tuple (doc_id, pid, exported_files, error)
+    """
+    try:
+        exported = _worker_exporter.export_document(doc_dict, base_output)
+        return doc_dict['id'], os.getpid(), exported, None
+    except Exception as e:
+        return doc_dict['id'], os.getpid(), [], str(e)
+
+
 class BatchExporter:
     """Gestisce export batch con preservazione struttura multi-livello"""
     
@@ -26,7 +69,7 @@ class BatchExporter:
         if export_manager:
             self.export_manager = export_manager
         else:
-            self.export_manager = ExportManager(config_manager.config_data)
+            self.export_manager = ExportManager(config_manager)
     
     def export_document(self, doc_dict: Dict, base_output: str,
                        progress_callback: Callable = None) -> List[str]:
@@ -82,32 +125,135 @@ class BatchExporter:
             loader = create_document_loader(doc_path)
             loader.load()
             
-            # Estrai nome base documento
-            doc_basename = os.path.splitext(os.path.basename(doc_path))[0]
-            
-            # Elabora in base a workflow
-            workflow_type = doc_dict['workflow_type']
-            json_data = doc_dict.get('json_data', {})
-            
-            if workflow_type == 'split_categorie':
-                exported = self._export_split_categorie(
-                    loader, doc_basename, json_data, output_dir, progress_callback
-                )
-            else:
-                exported = self._export_metadati_semplici(
-                    loader, doc_basename, json_data, output_dir, progress_callback
-                )
+            try:
+                # Estrai nome base documento
+                doc_basename = os.path.splitext(os.path.basename(doc_path))[0]
+                
+                # Elabora in base a workflow
+                workflow_type = doc_dict['workflow_type']
+                json_data = doc_dict.get('json_data', {})
+                
+                if workflow_type == 'split_categorie':
+                    exported = self._export_split_categorie(
+                        loader, doc_basename, json_data, output_dir, progress_callback
+                    )
+                else:
+                    exported = self._export_metadati_semplici(
+                        loader, doc_basename, json_data, output_dir, progress_callback
+                    )
+            finally:
+                # Libera file handle e pagine in cache del documento
+                loader.close()
             
             return exported
             
         except Exception as e:
             raise Exception(f"Errore export documento {doc_dict['doc_path']}: {str(e)}")
     
+    def get_export_workers(self) -> int:
+        """Numero processi export da config ('batch_export_workers', 0 = automatico)"""
+        workers = self.config_manager.get('batch_export_workers', 0) or 0
+        if workers <= 0:
+            workers = max(1, (os.cpu_count() or 1) - 1)
+        return workers
+    
+    def export_documents_parallel(self, documents: List[Dict], base_output: str,
+                                  result_callback: Callable = None,
+                                  progress_callback: Callable = None,
+                                  cancel_event: threading.Event = None,
+                                  max_workers: Optional[int] = None) -> Dict:
+        """
+        Esporta documenti in parallelo con un ProcessPoolExecutor
+        
+        Ogni worker ha il proprio BatchExporter e apre un loader per documento.
+        I risultati tornano al thread chiamante, che è l'unico a invocare
+        result_callback (es. scrittura su BatchDatabase).
+        
+        Args:
+            documents: Lista dizionari documento da database
+            base_output: Cartella output base
+            result_callback: callback(doc_id, exported_files, error) per documento
+            progress_callback: callback(done, total, per_worker) con documenti per worker (pid)
+            cancel_event: Event per annullare i documenti non ancora avviati
+            max_workers: Numero processi (None = da config)
+            
+        Returns:
+            Dizionario con 'exported', 'errors', 'cancelled', 'per_worker'
+        """
+        workers = min(max_workers or self.get_export_workers(), len(documents))
+        summary = {'exported': 0, 'errors': 0, 'cancelled': False, 'per_worker': {}}
+        total = len(documents)
+        
+        def handle_result(doc_id, pid, exported_files, error):
+            if error:
+                print(f"[ERROR] Export failed for document {doc_id}: {error}")
+                summary['errors'] += 1
+            else:
+                summary['exported'] += 1
+            summary['per_worker'][pid] = summary['per_worker'].get(pid, 0) + 1
+            
+            if result_callback:
+                result_callback(doc_id, exported_files, error)
+            if progress_callback:
+                done = summary['exported'] + summary['errors']
+                progress_callback(done, total, dict(summary['per_worker']))
+        
+        # Sequenziale nel thread corrente (1 worker o 1 documento)
+        if workers <= 1 or total <= 1:
+            for doc in documents:
+                if cancel_event and cancel_event.is_set():
+                    summary['cancelled'] = True
+                    break
+                try:
+                    exported = self.export_document(doc, base_output)
+                    handle_result(doc['id'], os.getpid(), exported, None)
+                except Exception as e:
+                    handle_result(doc['id'], os.getpid(), [], str(e))
+            return summary
+        
+        print(f"[BATCH EXPORT] Parallel export: {total} documents, {workers} workers")
+        
+        # Documenti in volo limitati: la cancellazione resta reattiva
+        max_in_flight = workers * 2
+        doc_iter = iter(documents)
+        in_flight = {}  # future -> doc_id
+        
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_export_worker,
+                                 initargs=(self.config_manager,)) as executor:
+            while True:
+                while (len(in_flight) < max_in_flight and
+                       not (cancel_event and cancel_event.is_set())):
+                    doc = next(doc_iter, None)
+                    if doc is None:
+                        break
+                    future = executor.submit(_export_document_worker, doc, base_output)
+                    in_flight[future] = doc['id']
+                
+                if not in_flight:
+                    break
+                
+                done, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    doc_id = in_flight.pop(future)
+                    if future.cancelled():
+                        continue
+                    try:
+                        handle_result(*future.result())
+                    except Exception as e:
+                        # Worker terminato in modo anomalo (es. BrokenProcessPool)
+                        handle_result(doc_id, None, [], str(e))
+                
+                if cancel_event and cancel_event.is_set():
+                    summary['cancelled'] = True
+                    for future in in_flight:
+                        future.cancel()
+        
+        return summary
+    
     def _export_split_categorie(self, loader, doc_basename: str, json_data: Dict,
                                 output_dir: str, progress_callback: Callable) -> List[str]:
         """Export per workflow Split Categorie"""
-        from gui.components import DocumentGroup
-        
         # Crea document groups temporanei
         categories = json_data.get('categories', [])
         document_groups = []
@@ -146,15 +292,8 @@ class BatchExporter:
                 self.categoryname = category_name
                 self.pages = pages
                 self.document_counter = counter
-                self.thumbnails = []
-                
-                # Crea thumbnails mock
-                for page_num in pages:
-                    thumb = type('obj', (object,), {
-                        'pagenum': page_num,
-                        'image': loader.get_page(page_num)
-                    })()
-                    self.thumbnails.append(thumb)
+                # Page source: renderizzate on demand da ExportManager
+                self.thumbnails = [PageSource(page_num, loader) for page_num in pages]
         
         # Crea groups temporanei
         temp_groups = []
@@ -178,14 +317,7 @@ class BatchExporter:
                 self.categoryname = category_name
                 self.pages = list(range(1, total_pages + 1))
                 self.document_counter = 1
-                self.thumbnails = []
-                
-                for page_num in self.pages:
-                    thumb = type('obj', (object,), {
-                        'pagenum': page_num,
-                        'image': loader.get_page(page_num)
-                    })()
-                    self.thumbnails.append(thumb)
+                self.thumbnails = [PageSource(page_num, loader) for page_num in self.pages]
         
         # Usa nome documento come categoria
         group = TempDocumentGroup(doc_basename, loader.totalpages)
@@ -4,18 +4,38 @@ Batch Scanner - Scansione ricorsiva directory con rilevamento workflow automatic
 
 import os
 import json
-from typing import List, Optional, Dict
-from dataclasses import dataclass
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Dict
+from dataclasses import dataclass, field
 
-@dataclass
+import fitz
+
+from loaders.tiff_index import read_tiff_ifd_index
+
+# Intervallo minimo tra due notifiche di avanzamento scansione (secondi)
+PROGRESS_INTERVAL = 0.5
+# Thread di lettura directory/JSON (I/O: su share di rete la latenza domina)
+DEFAULT_SCAN_WORKERS = 8
+# mtime directory più recenti di così non sono salvati nell'indice: una modifica nello
+# stesso intervallo di risoluzione del timestamp non sarebbe rilevata (riletta la volta dopo)
+RECENT_MTIME_NS = 2_000_000_000
+# Su Windows DirEntry.stat() usa i dati dell'elenco directory (nessuna chiamata in più):
+# stat dei file presi dall'elenco anche nelle scansioni complete
+LISTING_STATS_FREE = os.name == 'nt'
+
+
+@dataclass(slots=True)
 class DocumentPair:
-    """Rappresenta una coppia documento+JSON rilevata"""
+    """Rappresenta una coppia documento+JSON rilevata (slots: record compatto anche a milioni di coppie)"""
     id: Optional[int] = None
     doc_path: str = ""
     json_path: str = ""
     relative_path: str = ""
     workflow_type: str = ""  # 'split_categorie' | 'metadati_semplici'
     json_data: dict = None
+    json_text: Optional[str] = None  # Testo JSON originale (salvato così com'è nel database)
     status: str = "pending"  # pending, processing, completed, error
     error_message: Optional[str] = None
     
@@ -28,25 +48,49 @@ class DocumentPair:
         return os.path.basename(self.json_path)
 
 
+@dataclass
+class ScanDiff:
+    """
+    Differenze di un rescan incrementale rispetto all'indice file della sessione.
+    Gli aggiornamenti dell'indice sono applicati da BatchDatabase.merge_scan_diff insieme ai documenti
+    """
+    added: List[DocumentPair] = field(default_factory=list)
+    changed: List[DocumentPair] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)  # doc_path
+    unchanged: int = 0
+    index_updates: List[tuple] = field(default_factory=list)  # (dir_path, mtime, sottocartelle, record)
+    removed_dirs: List[str] = field(default_factory=list)
+    
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+
 class BatchScanner:
     """Gestisce scansione ricorsiva directory e rilevamento workflow"""
     
-    def __init__(self, supported_extensions=None):
+    def __init__(self, supported_extensions=None, max_workers: int = DEFAULT_SCAN_WORKERS):
         """
         Inizializza scanner
         
         Args:
             supported_extensions: Lista estensioni supportate (default: PDF, TIFF, TIF)
+            max_workers: Thread per elenco directory e lettura JSON (1 = sequenziale)
         """
         self.supported_extensions = supported_extensions or ['.pdf', '.tiff', '.tif']
+        self.max_workers = max_workers
         self.scan_stats = {
             'total_dirs': 0,
+            'total_files': 0,
             'documents_found': 0,
             'json_found': 0,
             'pairs_matched': 0,
             'split_categorie': 0,
-            'metadati_semplici': 0
+            'metadati_semplici': 0,
+            'dirs_unchanged': 0,
+            'pairs_unchanged': 0,
+            'dirs_unreadable': 0
         }
+        self._scan_started: Optional[float] = None
     
     def scan_directory(self, root_path: str, max_depth: int = -1) -> List[DocumentPair]:
         """
@@ -54,7 +98,7 @@ class BatchScanner:
         
         Args:
             root_path: Percorso root da scansionare
-            max_depth: Profondità massima (-1 = illimitato)
+            max_depth: Livelli di sottocartelle (-1 = illimitato, 0 = solo root)
             
         Returns:
             Lista di DocumentPair con metadati completi
@@ -62,6 +106,106 @@ class BatchScanner:
         Raises:
             ValueError: Se root_path non esiste
         """
+        return list(self.iter_scan(root_path, max_depth, keep_json_data=True))
+    
+    def iter_scan(self, root_path: str, max_depth: int = -1,
+                  progress_callback: Optional[Callable[[Dict], None]] = None,
+                  keep_json_data: bool = False,
+                  max_workers: Optional[int] = None,
+                  index_db=None, session_id: Optional[str] = None) -> Iterator[DocumentPair]:
+        """
+        Scansione incrementale: ogni coppia è restituita appena abbinata.
+        Ordine deterministico: cartelle in profondità, nomi in ordine alfabetico
+        
+        Args:
+            root_path: Percorso root da scansionare
+            max_depth: Livelli di sottocartelle (-1 = illimitato, 0 = solo root)
+            progress_callback: callback(get_progress()) al massimo ogni PROGRESS_INTERVAL secondi
+            keep_json_data: Mantiene anche il JSON deserializzato (altrimenti solo json_text)
+            max_workers: Thread di lettura (None = valore dello scanner)
+            index_db: BatchDatabase in cui aggiornare l'indice file (per i rescan incrementali)
+            session_id: Sessione a cui appartiene l'indice (con index_db)
+            
+        Raises:
+            ValueError: Se root_path non esiste (alla prima iterazione)
+        """
+        for pair in self._scan(root_path, max_depth, progress_callback, keep_json_data, max_workers,
+                               index_db, session_id):
+            if pair is not None:
+                yield pair
+    
+    def iter_scan_chunks(self, root_path: str, max_depth: int = -1, chunk_size: int = 1000,
+                         max_delay: float = 0.5,
+                         progress_callback: Optional[Callable[[Dict], None]] = None,
+                         max_workers: Optional[int] = None,
+                         index_db=None, session_id: Optional[str] = None) -> Iterator[List[DocumentPair]]:
+        """
+        Scansione incrementale a blocchi (es. per BatchDatabase.add_documents):
+        un blocco ogni chunk_size coppie o max_delay secondi, così i primi documenti
+        sono disponibili subito anche su alberi enormi
+        
+        Args:
+            root_path: Percorso root da scansionare
+            max_depth: Livelli di sottocartelle (-1 = illimitato, 0 = solo root)
+            chunk_size: Coppie massime per blocco
+            max_delay: Secondi massimi di attesa di un blocco non pieno (controllati ad ogni directory)
+            progress_callback: callback(get_progress()) al massimo ogni PROGRESS_INTERVAL secondi
+            max_workers: Thread di lettura (None = valore dello scanner)
+            index_db: BatchDatabase in cui aggiornare l'indice file (per i rescan incrementali)
+            session_id: Sessione a cui appartiene l'indice (con index_db)
+        """
+        chunk = []
+        last_chunk = time.monotonic()
+        for pair in self._scan(root_path, max_depth, progress_callback, False, max_workers,
+                               index_db, session_id):
+            if pair is not None:
+                chunk.append(pair)
+            if chunk and (len(chunk) >= chunk_size or time.monotonic() - last_chunk >= max_delay):
+                yield chunk
+                chunk = []
+                last_chunk = time.monotonic()
+        if chunk:
+            yield chunk
+    
+    def rescan(self, root_path: str, index_db, session_id: str, max_depth: int = -1,
+               progress_callback: Optional[Callable[[Dict], None]] = None,
+               max_workers: Optional[int] = None) -> ScanDiff:
+        """
+        Rescan incrementale con l'indice file della sessione: directory con mtime invariato
+        non rilette, coppie con dimensione/mtime invariati non riaperte. Il database non
+        viene modificato: differenze e indice applicati con BatchDatabase.merge_scan_diff.
+        Nota: una directory invariata non viene elencata, quindi un file riscritto sul posto
+        (senza creazione/rinomina) in una cartella invariata non è rilevato
+        
+        Args:
+            root_path: Percorso root della sessione
+            index_db: BatchDatabase con l'indice file
+            session_id: Sessione di cui confrontare l'indice
+            max_depth: Livelli di sottocartelle (-1 = illimitato, 0 = solo root)
+            progress_callback: callback(get_progress()) al massimo ogni PROGRESS_INTERVAL secondi
+            max_workers: Thread di lettura (None = valore dello scanner)
+            
+        Returns:
+            ScanDiff (sessione senza indice: tutte le coppie in added)
+        """
+        diff = ScanDiff()
+        for _ in self._scan(root_path, max_depth, progress_callback, False, max_workers,
+                            index_db, session_id, diff):
+            pass
+        return diff
+    
+    def _scan(self, root_path: str, max_depth: int,
+              progress_callback: Optional[Callable[[Dict], None]],
+              keep_json_data: bool, max_workers: Optional[int] = None,
+              index_db=None, session_id: Optional[str] = None,
+              diff: Optional[ScanDiff] = None) -> Iterator[Optional[DocumentPair]]:
+        """
+        Visita directory: restituisce le coppie trovate e None alla fine di ogni directory.
+        Elenchi directory (os.scandir) e letture JSON girano in un pool di thread, in anticipo
+        rispetto al consumo; l'output segue sempre l'ordine della visita in profondità.
+        Con index_db aggiorna l'indice file della sessione; con diff (rescan) salta ciò che
+        l'indice dà per invariato e raccoglie gli aggiornamenti dell'indice nel diff
+        """
         if not os.path.exists(root_path):
             raise ValueError(f"Percorso non esistente: {root_path}")
         
@@ -70,55 +214,242 @@ class BatchScanner:
         
         # Reset statistiche
         self.scan_stats = {k: 0 for k in self.scan_stats}
+        self._scan_started = time.monotonic()
+        last_progress = self._scan_started
         
-        found_pairs = []
+        incremental = diff is not None and index_db is not None
+        visited = set()  # Directory visitate (per le directory sparite dall'indice)
+        unreadable = []  # Prefissi directory non leggibili: indice loro e del sottoalbero lasciato com'era
         
-        for dirpath, dirnames, filenames in os.walk(root_path):
-            self.scan_stats['total_dirs'] += 1
-            
-            # Calcola profondità corrente
-            depth = dirpath[len(root_path):].count(os.sep)
-            
-            # Limita profondità se specificato
-            if max_depth != -1 and depth >= max_depth:
-                dirnames[:] = []  # Ferma discesa in sottodirectory
-                continue
-            
-            # Trova documenti supportati
-            docs = [f for f in filenames 
-                   if os.path.splitext(f.lower())[1] in self.supported_extensions]
-            jsons = [f for f in filenames if f.lower().endswith('.json')]
-            
-            self.scan_stats['documents_found'] += len(docs)
-            self.scan_stats['json_found'] += len(jsons)
+        workers = max(1, max_workers or self.max_workers or 1)
+        # Letture JSON in anticipo al massimo (limita memoria e lavoro da annullare)
+        window = workers * 4
+        
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-scan")
+        
+        def list_directory(dirpath):
+            indexed = index_db.get_indexed_directory(session_id, dirpath) if incremental else None
+            return executor.submit(self._list_directory, dirpath, index_db is not None, indexed,
+                                   incremental or (index_db is not None and LISTING_STATS_FREE))
+        
+        try:
+            # Pila visita in profondità: (directory, profondità, future elenco contenuto)
+            stack = [(root_path, 0, list_directory(root_path))]
+            # In ordine di output: (nome documento, future coppia, directory, record indice)
+            # per le coppie, dizionario directory alla fine di ogni directory
+            pending = deque()
             
-            # Match PDF + JSON
-            for doc in docs:
-                basename = os.path.splitext(doc)[0]
-                json_name = f"{basename}.json"
-                
-                if json_name in jsons:
-                    try:
-                        doc_pair = self._create_document_pair(
-                            dirpath, doc, json_name, root_path
-                        )
-                        found_pairs.append(doc_pair)
-                        self.scan_stats['pairs_matched'] += 1
+            while stack or pending:
+                # Avanza nella visita finché le letture in corso non riempiono la finestra
+                while stack and len(pending) < window:
+                    dirpath, depth, listing = stack.pop()
+                    listing = listing.result()
+                    self.scan_stats['total_dirs'] += 1
+                    if listing is None:
+                        # Errore di lettura (anche temporaneo): nessuna coppia rimossa, sottocartelle
+                        # non visitate, mtime non salvato (la prossima scansione la rilegge)
+                        self.scan_stats['dirs_unreadable'] += 1
+                        unreadable.append(dirpath.rstrip(os.sep) + os.sep)
+                        pending.append({'path': dirpath, 'records': None})
+                        continue
+                    
+                    subdirs, filenames, file_stats, dir_mtime = listing
+                    if index_db:
+                        visited.add(dirpath)
+                    
+                    # Sottocartelle elencate subito (in parallelo), visitate in ordine alfabetico
+                    if max_depth == -1 or depth < max_depth:
+                        stack.extend(reversed([
+                            (subdir, depth + 1, list_directory(subdir)) for subdir in subdirs
+                        ]))
+                    
+                    if filenames is None:
+                        # Directory invariata dall'ultima scansione: coppie confermate senza rileggerle
+                        unchanged = index_db.count_indexed_files(session_id, dirpath)
+                        self.scan_stats['dirs_unchanged'] += 1
+                        self.scan_stats['pairs_unchanged'] += unchanged
+                        diff.unchanged += unchanged
+                        pending.append({'path': dirpath, 'records': None})
+                        continue
+                    
+                    self.scan_stats['total_files'] += len(filenames)
+                    directory = {
+                        'path': dirpath,
+                        'mtime': dir_mtime,
+                        'subdirs': [os.path.basename(subdir) for subdir in subdirs],
+                        'records': []
+                    }
+                    directory['indexed'] = index_db.get_indexed_files(session_id, dirpath) if incremental else {}
+                    
+                    # Trova documenti supportati
+                    docs = [f for f in filenames 
+                           if os.path.splitext(f.lower())[1] in self.supported_extensions]
+                    jsons = {f for f in filenames if f.lower().endswith('.json')}
+                    
+                    self.scan_stats['documents_found'] += len(docs)
+                    self.scan_stats['json_found'] += len(jsons)
+                    
+                    # Match PDF + JSON
+                    for doc in docs:
+                        json_name = f"{os.path.splitext(doc)[0]}.json"
+                        if json_name not in jsons:
+                            continue
+                        
+                        stat_key = None
+                        if file_stats is not None and doc in file_stats and json_name in file_stats:
+                            stat_key = file_stats[doc] + file_stats[json_name]
+                        
+                        record = directory['indexed'].get(os.path.join(dirpath, doc))
+                        if record is not None and stat_key is not None and tuple(record[2:6]) == stat_key:
+                            # Documento e JSON invariati: riga indice riconfermata, nessuna lettura
+                            directory['records'].append(record)
+                            self.scan_stats['pairs_unchanged'] += 1
+                            diff.unchanged += 1
+                            continue
                         
-                        # Statistiche workflow
-                        if doc_pair.workflow_type == 'split_categorie':
-                            self.scan_stats['split_categorie'] += 1
+                        if index_db:
+                            future = executor.submit(
+                                self._create_indexed_pair, dirpath, doc, json_name, root_path,
+                                keep_json_data, file_stats.get(doc) if file_stats else None
+                            )
                         else:
-                            self.scan_stats['metadati_semplici'] += 1
-                            
-                    except Exception as e:
-                        print(f"[WARNING] Errore processing {doc}: {e}")
-                        continue
+                            future = executor.submit(
+                                self._create_document_pair, dirpath, doc, json_name, root_path, keep_json_data
+                            )
+                        pending.append((doc, future, directory, record))
+                    pending.append(directory)
+                
+                item = pending.popleft()
+                if isinstance(item, dict):
+                    # Fine directory: indice aggiornato, directory rilette
+                    if index_db and item['records'] is not None:
+                        if incremental:
+                            # Coppie indicizzate non più presenti nella directory
+                            present = {record[0] for record in item['records']}
+                            diff.removed.extend(path for path in item['indexed'] if path not in present)
+                            diff.index_updates.append(
+                                (item['path'], item['mtime'], item['subdirs'], item['records'])
+                            )
+                        else:
+                            index_db.update_indexed_directory(
+                                session_id, item['path'], item['mtime'], item['subdirs'], item['records']
+                            )
+                    yield None
+                    if progress_callback and time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                        last_progress = time.monotonic()
+                        progress_callback(self.get_progress())
+                    continue
+                
+                doc, future, directory, record = item
+                try:
+                    if index_db:
+                        doc_pair, stat_key = future.result()
+                    else:
+                        doc_pair = future.result()
+                except Exception as e:
+                    print(f"[WARNING] Errore processing {doc}: {e}")
+                    if record is not None:
+                        # Coppia già indicizzata non leggibile ora (JSON in scrittura, file bloccato):
+                        # resta nell'indice con i vecchi dati, non è rimossa e sarà riletta al prossimo rescan
+                        directory['records'].append(record)
+                    continue
+                
+                self.scan_stats['pairs_matched'] += 1
+                
+                # Statistiche workflow
+                if doc_pair.workflow_type == 'split_categorie':
+                    self.scan_stats['split_categorie'] += 1
+                else:
+                    self.scan_stats['metadati_semplici'] += 1
+                
+                if index_db:
+                    directory['records'].append(
+                        (doc_pair.doc_path, doc_pair.json_path) + stat_key +
+                        (doc_pair.workflow_type, None)  # Pagine contate solo su richiesta
+                    )
+                if diff is not None:
+                    (diff.added if record is None else diff.changed).append(doc_pair)
+                
+                yield doc_pair
+        finally:
+            # Anche se il consumatore interrompe la scansione: lavoro in coda annullato
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        if index_db:
+            # Scansione completa: directory indicizzate non visitate (sparite o oltre la profondità)
+            vanished = [
+                path for path in index_db.get_indexed_directories(session_id)
+                if path not in visited and not any((path + os.sep).startswith(prefix) for prefix in unreadable)
+            ]
+            if incremental:
+                for path in vanished:
+                    diff.removed.extend(index_db.get_indexed_files(session_id, path))
+                diff.removed_dirs.extend(vanished)
+            elif vanished:
+                index_db.remove_indexed_directories(session_id, vanished)
         
-        return found_pairs
+        if progress_callback:
+            progress_callback(self.get_progress())
+    
+    def _list_directory(self, dirpath: str, with_mtime: bool = False,
+                        indexed: Optional[tuple] = None, with_file_stats: bool = False) -> tuple:
+        """
+        Sottocartelle (path) e file (nomi) ordinati, con una sola lettura os.scandir.
+        Tipo dal DirEntry (senza stat separati dove il filesystem lo fornisce);
+        link a cartelle non seguiti, come os.walk
+        
+        Args:
+            with_mtime: Anche mtime directory
+            indexed: (mtime, sottocartelle) dall'indice: se mtime uguale la directory non è riletta
+            with_file_stats: Anche (dimensione, mtime ns) di documenti/JSON (rescan: confronto con l'indice)
+            
+        Returns:
+            (sottocartelle, file, stat file, mtime directory); file e stat None se invariata;
+            None se la directory non è leggibile
+        """
+        mtime = None
+        if with_mtime:
+            try:
+                mtime = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                mtime = None
+            if indexed is not None and mtime is not None and indexed[0] == mtime:
+                return [os.path.join(dirpath, name) for name in indexed[1]], None, None, mtime
+            if mtime is not None and time.time_ns() - mtime < RECENT_MTIME_NS:
+                mtime = None
+        
+        subdirs, filenames = [], []
+        file_stats = {} if with_file_stats else None
+        try:
+            with os.scandir(dirpath) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                        continue
+                    filenames.append(entry.name)
+                    if with_file_stats:
+                        ext = os.path.splitext(entry.name.lower())[1]
+                        if ext == '.json' or ext in self.supported_extensions:
+                            try:
+                                # Su Windows già nel DirEntry, altrove una stat
+                                st = entry.stat()
+                                file_stats[entry.name] = (st.st_size, st.st_mtime_ns)
+                            except OSError:
+                                pass
+        except OSError as e:
+            print(f"[WARNING] Directory non leggibile {dirpath}: {e}")
+            return None
+        subdirs.sort()
+        filenames.sort()
+        return subdirs, filenames, file_stats, mtime
     
     def _create_document_pair(self, dirpath: str, doc: str, json_name: str, 
-                             root_path: str) -> DocumentPair:
+                             root_path: str, keep_json_data: bool = True) -> DocumentPair:
         """
         Crea DocumentPair con rilevamento workflow automatico
         
@@ -127,20 +458,55 @@ class BatchScanner:
             doc: Nome file documento
             json_name: Nome file JSON
             root_path: Path root per calcolo path relativo
+            keep_json_data: False = solo testo JSON (dizionario usato per il workflow e scartato)
             
         Returns:
             DocumentPair configurato
         """
-        doc_path = os.path.join(dirpath, doc)
-        json_path = os.path.join(dirpath, json_name)
+        json_text, json_data, _ = self._read_json(os.path.join(dirpath, json_name), json_name)
+        return self._build_document_pair(dirpath, doc, json_name, root_path, json_text, json_data,
+                                         keep_json_data)
+    
+    def _create_indexed_pair(self, dirpath: str, doc: str, json_name: str, root_path: str,
+                             keep_json_data: bool = True, doc_stat: Optional[tuple] = None) -> tuple:
+        """
+        Come _create_document_pair, più la chiave stat per l'indice file
+        (dimensione, mtime ns di documento e JSON), letta nel thread di lettura
+        
+        Args:
+            doc_stat: (dimensione, mtime ns) del documento già noti dall'elenco directory
         
-        # Carica JSON e rileva workflow
+        Returns:
+            (DocumentPair, (doc_size, doc_mtime, json_size, json_mtime))
+        """
+        if doc_stat is None:
+            st = os.stat(os.path.join(dirpath, doc))
+            doc_stat = (st.st_size, st.st_mtime_ns)
+        json_text, json_data, json_stat = self._read_json(os.path.join(dirpath, json_name), json_name)
+        doc_pair = self._build_document_pair(dirpath, doc, json_name, root_path, json_text, json_data,
+                                             keep_json_data)
+        return doc_pair, doc_stat + (json_stat.st_size, json_stat.st_mtime_ns)
+    
+    def _read_json(self, json_path: str, json_name: str) -> tuple:
+        """
+        Testo e contenuto JSON, con stat del file aperto (prima della lettura: una modifica
+        successiva cambia mtime ed è vista dal rescan)
+        
+        Returns:
+            (testo, dizionario, os.stat_result)
+        """
         try:
             with open(json_path, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
+                json_stat = os.fstat(f.fileno())
+                json_text = f.read()
+            json_data = json.loads(json_text)
         except Exception as e:
             raise ValueError(f"Errore lettura JSON {json_name}: {e}")
-        
+        return json_text, json_data, json_stat
+    
+    def _build_document_pair(self, dirpath: str, doc: str, json_name: str, root_path: str,
+                             json_text: str, json_data: dict, keep_json_data: bool) -> DocumentPair:
+        """DocumentPair da JSON già letto: workflow rilevato dal contenuto, path relativo alla root"""
         workflow_type = self._detect_workflow(json_data)
         
         # Calcola path relativo
@@ -150,14 +516,44 @@ class BatchScanner:
             relative_path = os.path.relpath(dirpath, root_path)
         
         return DocumentPair(
-            doc_path=doc_path,
-            json_path=json_path,
+            doc_path=os.path.join(dirpath, doc),
+            json_path=os.path.join(dirpath, json_name),
             relative_path=relative_path,
             workflow_type=workflow_type,
-            json_data=json_data,
+            json_data=json_data if keep_json_data else None,
+            json_text=json_text,
             status='pending'
         )
     
+    def get_page_count(self, doc_path: str, index_db=None, session_id: Optional[str] = None) -> Optional[int]:
+        """
+        Numero pagine del documento, contato alla prima richiesta e salvato nell'indice file
+        della sessione (la scansione non apre i documenti). Da chiamare da un solo thread alla volta:
+        PyMuPDF non va usato in parallelo
+        
+        Returns:
+            Numero pagine o None se il file non è leggibile
+        """
+        if index_db and session_id:
+            page_count = index_db.get_indexed_page_count(session_id, doc_path)
+            if page_count is not None:
+                return page_count
+        page_count = self._count_pages(doc_path)
+        if page_count is not None and index_db and session_id:
+            index_db.set_indexed_page_count(session_id, doc_path, page_count)
+        return page_count
+    
+    def _count_pages(self, doc_path: str) -> Optional[int]:
+        """Numero pagine senza decodificare immagini (None se il file non è leggibile)"""
+        try:
+            if doc_path.lower().endswith('.pdf'):
+                with fitz.open(doc_path) as doc:
+                    return doc.page_count
+            return len(read_tiff_ifd_index(doc_path))
+        except Exception as e:
+            print(f"[WARNING] Conteggio pagine non riuscito {doc_path}: {e}")
+            return None
+    
     def _detect_workflow(self, json_data: dict) -> str:
         """
         Rileva tipo workflow dal contenuto JSON
@@ -203,6 +599,17 @@ WORKFLOW RILEVATI:
     def get_stats(self) -> Dict:
         """Ritorna dizionario con statistiche scansione"""
         return self.scan_stats.copy()
+    
+    def get_progress(self) -> Dict:
+        """Statistiche scansione (anche in corso) con velocità: directory, file e coppie al secondo"""
+        progress = self.get_stats()
+        elapsed = time.monotonic() - self._scan_started if self._scan_started else 0.0
+        progress['elapsed'] = elapsed
+        for rate_key, count_key in (('dirs_per_sec', 'total_dirs'),
+                                    ('files_per_sec', 'total_files'),
+                                    ('pairs_per_sec', 'pairs_matched')):
+            progress[rate_key] = progress[count_key] / elapsed if elapsed > 0 else 0.0
+        return progress
 
 
 # Funzioni helper per uso esterno
@@ -2,7 +2,7 @@
 Configuration module for DynamicAI
 """
 
-from .settings import ConfigManager, CONFIG_FILE, DB_FILE, BATCH_DB_FILE
+from .settings import ConfigManager, CONFIG_FILE, DB_FILE, BATCH_DB_FILE, THUMBNAIL_CACHE_FILE
 from .constants import RESAMPLEFILTER, DEFAULT_CONFIG
 
-__all__ = ['ConfigManager', 'CONFIG_FILE', 'DB_FILE', 'BATCH_DB_FILE', 'RESAMPLEFILTER', 'DEFAULT_CONFIG']
+__all__ = ['ConfigManager', 'CONFIG_FILE', 'DB_FILE', 'BATCH_DB_FILE', 'THUMBNAIL_CACHE_FILE', 'RESAMPLEFILTER', 'DEFAULT_CONFIG']
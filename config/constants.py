@@ -45,7 +45,12 @@ DEFAULT_CONFIG = {
         'jpeg_progressive': False,
         'jpeg_subsampling': '4:2:0',
         'pdf_dpi': 300,
+        'pdf_passthrough': True,  # Copia pagine PDF sorgente senza rasterizzare
+        'jpeg_passthrough': True,  # Scansioni JPEG in PDF esportate senza ricodifica
+        'tiff_passthrough': True,  # Pagine TIFF G4/JPEG copiate nel PDF senza ricodifica
         'tiff_compression': 'tiff_lzw',
+        'tiff_bitonal_compression': 'group4',  # Pagine a 1 bit in TIFF (CCITT G4)
+        'preserve_color_mode': True,  # Pagine bitonali/grigie esportate senza conversione in RGB
     },
 
     'auto_save_changes': True,
@@ -56,6 +61,15 @@ DEFAULT_CONFIG = {
     'thumbnail_width': 80,
     'thumbnail_height': 100,
     'thumbnail_keep_aspect_ratio': False,  # Mantieni rapporto d'aspetto
+    'thumbnail_disk_cache': True,          # Cache miniature persistente su disco
+    'thumbnail_cache_max_mb': 256,         # Limite cache miniature (eviction LRU)
+    'thumbnail_render_workers': 0,         # Thread rendering miniature (0 = automatico)
+    'viewer_tile_cache_mb': 96,            # Cache tile viewer centrale (LRU)
+    'page_cache_max_mb': 512,              # Budget globale pagine in memoria (tutti i documenti)
+    'page_cache_admit_max_fraction': 0.25, # Pagine oltre questa frazione del budget non in cache (0 = nessun limite)
+    'max_open_documents': 32,              # Documenti aperti insieme (oltre: chiusi LRU e riaperti on-demand)
+    'viewer_prefetch_depth': 2,            # Pagine successive/precedenti renderizzate in anticipo
+    'viewer_prefetch_hover': True,         # Prefetch della pagina sotto il mouse
     'max_thumbnails_per_row': 4,           # ← AGGIUNGI QUESTA RIGA
     'min_thumbnails_per_row': 2,           # ← AGGIUNGI QUESTA RIGA  
     'default_thumbnails_per_row': 4,       # ← AGGIUNGI QUESTA RIGA
@@ -91,8 +105,10 @@ DEFAULT_CONFIG = {
     # ========================================
     'batch_input_mode': 'recursive',  # 'flat' | 'recursive'
     'batch_scan_depth': -1,  # -1 = unlimited, N = max depth
+    'batch_scan_workers': 8,  # Thread scansione cartelle/JSON (1 = sequenziale)
     'batch_preserve_structure': True,  # Preserve directory structure in output
     'batch_csv_mode': 'per_folder',  # 'per_folder' | 'global'
+    'batch_export_workers': 0,  # Processi export paralleli (0 = automatico, 1 = sequenziale)
     'batch_database_path': None,  # Verrà impostato dinamicamente
 
     # ---- NUOVA: Numerazione Documenti ----
@@ -46,9 +46,14 @@ def get_batch_db_file_path():
     """Path del file database batch SQLite."""
     return os.path.join(_user_config_dir(), f"{APP_NAME}_batch_state.db")
 
+def get_thumbnail_cache_file_path():
+    """Path del file cache miniature SQLite."""
+    return os.path.join(_user_config_dir(), f"{APP_NAME}_thumbnails.db")
+
 CONFIG_FILE = get_config_file_path()
 DB_FILE = get_db_file_path()
 BATCH_DB_FILE = get_batch_db_file_path()
+THUMBNAIL_CACHE_FILE = get_thumbnail_cache_file_path()
 
 class ConfigManager:
     """Gestisce la configurazione dell'applicazione."""
@@ -5,9 +5,11 @@ AGGIUNTO: export_metadata_csv() per gestione CSV incremental/per-file
 """
 
 import os
+import io
 import csv
-from PIL import Image
-from typing import List, Dict, Optional
+import fitz
+from PIL import Image, TiffImagePlugin
+from typing import List, Dict, Optional, Iterator
 import queue
 import threading
 
@@ -30,6 +32,10 @@ class ExportManager:
         # Thread-safe communication
         self.ui_update_queue = queue.Queue()
         self.cancel_event = threading.Event()
+        # Export paralleli (più processi sulla stessa cartella): i nomi file
+        # vengono riservati creandoli con O_EXCL prima della scrittura
+        self.reserve_output_files = False
+        self._reserved_paths = set()
 
     # -------------------------
     # Utility
@@ -48,23 +54,44 @@ class ExportManager:
     def prepare_image_for_save(self, img: Image.Image) -> Image.Image:
         """
         Normalize image before saving.
+        With export.preserve_color_mode, bitonal ('1') pages stay bitonal and
+        grayscale pages stay single-channel.
         """
-        if img.mode not in ["RGB", "L"]:
+        if self._preserve_color_mode():
+            if img.mode not in ["RGB", "L", "1"]:
+                img = img.convert("L" if img.mode == "LA" else "RGB")
+        elif img.mode not in ["RGB", "L"]:
             img = img.convert("RGB")
         return img
 
+    def _preserve_color_mode(self) -> bool:
+        """True se le pagine bitonali e in scala di grigi mantengono il loro modo in export"""
+        return self.config_manager.get('export', {}).get('preserve_color_mode', True)
+
+    def _get_tiff_compression(self, img: Image.Image, compression: str) -> str:
+        """
+        TIFF compression for a page: bitonal pages use export.tiff_bitonal_compression
+        (CCITT Group 4), the configured compression is used for everything else.
+        """
+        if img.mode == "1":
+            return self.config_manager.get('export', {}).get('tiff_bitonal_compression', 'group4')
+        if compression in ('group3', 'group4'):
+            return 'tiff_lzw'  # CCITT solo per immagini a 1 bit
+        return compression
+
     def get_unique_filepath(self, base_path: str) -> str:
         """
         Create unique filepath if file exists (Windows style: file(1).ext).
         """
-        if not os.path.exists(base_path):
+        exists = self._reserve_path if self.reserve_output_files else os.path.exists
+        if not exists(base_path):
             return base_path
 
         base, ext = os.path.splitext(base_path)
         counter = 1
         new_path = f"{base}({counter}){ext}"
 
-        while os.path.exists(new_path):
+        while exists(new_path):
             counter += 1
             new_path = f"{base}({counter}){ext}"
             if counter > 9999:
@@ -72,12 +99,44 @@ class ExportManager:
 
         return new_path
 
+    def _reserve_path(self, path: str) -> bool:
+        """
+        Crea il file vuoto in modo atomico (O_EXCL); True se il nome è già occupato.
+        Il file riservato viene poi sovrascritto dal salvataggio.
+        """
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return True
+        os.close(fd)
+        self._reserved_paths.add(path)
+        return False
+
+    def _release_unused_reservations(self, exported_files: List[str]):
+        """Rimuove i file riservati rimasti vuoti (pagina saltata o export fallito)"""
+        exported = set(exported_files)
+        for path in self._reserved_paths:
+            if os.path.basename(path) in exported:
+                continue
+            try:
+                if os.path.getsize(path) == 0:
+                    os.remove(path)
+            except OSError:
+                pass
+        self._reserved_paths.clear()
+
     # -------------------------
     # Export dispatcher
     # -------------------------
 
     def export_documents(self, output_folder: str, document_groups: List, document_name: str, progress_callback=None) -> List[str]:
-        """Export documents to configured format."""
+        """
+        Export documents to configured format.
+
+        Each group exposes 'categoryname' and 'thumbnails'; a thumbnail (page source) needs
+        'pagenum' and either a rendered 'image' or a 'document_loader' to render it on demand.
+        Pages are rendered, encoded and released one at a time.
+        """
         # NUOVA: Inizializza sessione export con contatori
         self.current_export_session += 1
         numbering_mode = self.config_manager.get('document_numbering', {}).get('numbering_mode', 'per_category')
@@ -96,30 +155,34 @@ class ExportManager:
             mode_text = "SPLIT (categorie)" if is_split_mode else "SINGLE (documento unico)"
             progress_callback(f"Modalità export: {mode_text}")
 
-        if is_split_mode:
-            # SPLIT MODE: Usa naming con _doc001_categoria
-            if export_format == 'JPEG':
-                exported_files = self._export_jpeg_single(output_folder, document_groups, document_name, progress_callback)
-            elif export_format == 'PDF_SINGLE':
-                exported_files = self._export_pdf_single(output_folder, document_groups, document_name, progress_callback)
-            elif export_format == 'PDF_MULTI':
-                exported_files = self._export_pdf_multi(output_folder, document_groups, document_name, progress_callback)
-            elif export_format == 'TIFF_SINGLE':
-                exported_files = self._export_tiff_single(output_folder, document_groups, document_name, progress_callback)
-            elif export_format == 'TIFF_MULTI':
-                exported_files = self._export_tiff_multi(output_folder, document_groups, document_name, progress_callback)
-        else:
-            # SINGLE MODE: Nome file originale (senza _doc001_)
-            if export_format == 'JPEG':
-                exported_files = self._export_jpeg_single_mode(output_folder, document_groups, document_name, progress_callback)
-            elif export_format == 'PDF_SINGLE':
-                exported_files = self._export_pdf_single_mode(output_folder, document_groups, document_name, progress_callback)
-            elif export_format == 'PDF_MULTI':
-                exported_files = self._export_pdf_multi_single_mode(output_folder, document_groups, document_name, progress_callback)
-            elif export_format == 'TIFF_SINGLE':
-                exported_files = self._export_tiff_single_mode(output_folder, document_groups, document_name, progress_callback)
-            elif export_format == 'TIFF_MULTI':
-                exported_files = self._export_tiff_multi_single_mode(output_folder, document_groups, document_name, progress_callback)
+        try:
+            if is_split_mode:
+                # SPLIT MODE: Usa naming con _doc001_categoria
+                if export_format == 'JPEG':
+                    exported_files = self._export_jpeg_single(output_folder, document_groups, document_name, progress_callback)
+                elif export_format == 'PDF_SINGLE':
+                    exported_files = self._export_pdf_single(output_folder, document_groups, document_name, progress_callback)
+                elif export_format == 'PDF_MULTI':
+                    exported_files = self._export_pdf_multi(output_folder, document_groups, document_name, progress_callback)
+                elif export_format == 'TIFF_SINGLE':
+                    exported_files = self._export_tiff_single(output_folder, document_groups, document_name, progress_callback)
+                elif export_format == 'TIFF_MULTI':
+                    exported_files = self._export_tiff_multi(output_folder, document_groups, document_name, progress_callback)
+            else:
+                # SINGLE MODE: Nome file originale (senza _doc001_)
+                if export_format == 'JPEG':
+                    exported_files = self._export_jpeg_single_mode(output_folder, document_groups, document_name, progress_callback)
+                elif export_format == 'PDF_SINGLE':
+                    exported_files = self._export_pdf_single_mode(output_folder, document_groups, document_name, progress_callback)
+                elif export_format == 'PDF_MULTI':
+                    exported_files = self._export_pdf_multi_single_mode(output_folder, document_groups, document_name, progress_callback)
+                elif export_format == 'TIFF_SINGLE':
+                    exported_files = self._export_tiff_single_mode(output_folder, document_groups, document_name, progress_callback)
+                elif export_format == 'TIFF_MULTI':
+                    exported_files = self._export_tiff_multi_single_mode(output_folder, document_groups, document_name, progress_callback)
+        finally:
+            if self._reserved_paths:
+                self._release_unused_reservations(exported_files)
 
         return exported_files
 
@@ -153,15 +216,14 @@ class ExportManager:
                 filename = f"{numbered_filename}.jpg"
                 filepath = os.path.join(output_folder, filename)
 
-                if os.path.exists(filepath):
+                if self.reserve_output_files or os.path.exists(filepath):
                     filepath = self._handle_existing_file(filepath, file_handling, filename)
                     if filepath is None:
                         page_counter += 1
                         continue
                     filename = os.path.basename(filepath)
 
-                img = self.prepare_image_for_save(thumbnail.image)
-                img.save(filepath, 'JPEG', quality=quality, optimize=True)
+                self._save_jpeg_page(filepath, thumbnail, quality)
 
                 exported_files.append(filename)
                 page_counter += 1
@@ -192,16 +254,13 @@ class ExportManager:
             filename = f"{numbered_filename}.pdf"
             filepath = os.path.join(output_folder, filename)
 
-            if os.path.exists(filepath):
+            if self.reserve_output_files or os.path.exists(filepath):
                 filepath = self._handle_existing_file(filepath, file_handling, filename)
                 if filepath is None:
                     continue
                 filename = os.path.basename(filepath)
 
-            images = [self.prepare_image_for_save(t.image) for t in group.thumbnails]
-
-            if images:
-                images[0].save(filepath, 'PDF', save_all=True, append_images=images[1:] if len(images) > 1 else [])
+            if self._save_pdf_pages(filepath, group.thumbnails):
                 exported_files.append(filename)
 
         return exported_files
@@ -231,15 +290,14 @@ class ExportManager:
                 filename = f"{numbered_filename}.pdf"
                 filepath = os.path.join(output_folder, filename)
 
-                if os.path.exists(filepath):
+                if self.reserve_output_files or os.path.exists(filepath):
                     filepath = self._handle_existing_file(filepath, file_handling, filename)
                     if filepath is None:
                         page_counter += 1
                         continue
                     filename = os.path.basename(filepath)
 
-                img = self.prepare_image_for_save(thumbnail.image)
-                img.save(filepath, 'PDF')
+                self._save_pdf_pages(filepath, [thumbnail])
 
                 exported_files.append(filename)
                 page_counter += 1
@@ -272,15 +330,15 @@ class ExportManager:
                 filename = f"{numbered_filename}.tiff"
                 filepath = os.path.join(output_folder, filename)
 
-                if os.path.exists(filepath):
+                if self.reserve_output_files or os.path.exists(filepath):
                     filepath = self._handle_existing_file(filepath, file_handling, filename)
                     if filepath is None:
                         page_counter += 1
                         continue
                     filename = os.path.basename(filepath)
 
-                img = self.prepare_image_for_save(thumbnail.image)
-                img.save(filepath, 'TIFF', compression=compression)
+                img = self.prepare_image_for_save(self._get_thumbnail_image(thumbnail))
+                self._save_tiff_image(filepath, img, compression)
 
                 exported_files.append(filename)
                 page_counter += 1
@@ -312,16 +370,13 @@ class ExportManager:
             filename = f"{numbered_filename}.tiff"
             filepath = os.path.join(output_folder, filename)
 
-            if os.path.exists(filepath):
+            if self.reserve_output_files or os.path.exists(filepath):
                 filepath = self._handle_existing_file(filepath, file_handling, filename)
                 if filepath is None:
                     continue
                 filename = os.path.basename(filepath)
 
-            images = [self.prepare_image_for_save(t.image) for t in group.thumbnails]
-
-            if images:
-                images[0].save(filepath, 'TIFF', save_all=True, append_images=images[1:] if len(images) > 1 else [], compression=compression)
+            if self._save_tiff_pages(filepath, group.thumbnails, compression):
                 exported_files.append(filename)
 
         return exported_files
@@ -356,14 +411,13 @@ class ExportManager:
             filename = f"{numbered_filename}.jpg"
             filepath = os.path.join(output_folder, filename)
 
-            if os.path.exists(filepath):
+            if self.reserve_output_files or os.path.exists(filepath):
                 filepath = self._handle_existing_file(filepath, file_handling, filename)
                 if filepath is None:
                     continue
                 filename = os.path.basename(filepath)
 
-            img = self.prepare_image_for_save(thumbnail.image)
-            img.save(filepath, 'JPEG', quality=quality, optimize=True)
+            self._save_jpeg_page(filepath, thumbnail, quality)
             exported_files.append(filename)
 
         return exported_files
@@ -392,14 +446,13 @@ class ExportManager:
             filename = f"{numbered_filename}.pdf"
             filepath = os.path.join(output_folder, filename)
 
-            if os.path.exists(filepath):
+            if self.reserve_output_files or os.path.exists(filepath):
                 filepath = self._handle_existing_file(filepath, file_handling, filename)
                 if filepath is None:
                     continue
                 filename = os.path.basename(filepath)
 
-            img = self.prepare_image_for_save(thumbnail.image)
-            img.save(filepath, 'PDF')
+            self._save_pdf_pages(filepath, [thumbnail])
             exported_files.append(filename)
 
         return exported_files
@@ -426,16 +479,13 @@ class ExportManager:
         filename = f"{numbered_filename}.pdf"
         filepath = os.path.join(output_folder, filename)
 
-        if os.path.exists(filepath):
+        if self.reserve_output_files or os.path.exists(filepath):
             filepath = self._handle_existing_file(filepath, file_handling, filename)
             if filepath is None:
                 return []
             filename = os.path.basename(filepath)
 
-        images = [self.prepare_image_for_save(t.image) for t in group.thumbnails]
-
-        if images:
-            images[0].save(filepath, 'PDF', save_all=True, append_images=images[1:] if len(images) > 1 else [])
+        if self._save_pdf_pages(filepath, group.thumbnails):
             exported_files.append(filename)
 
         return exported_files
@@ -465,14 +515,14 @@ class ExportManager:
             filename = f"{numbered_filename}.tiff"
             filepath = os.path.join(output_folder, filename)
 
-            if os.path.exists(filepath):
+            if self.reserve_output_files or os.path.exists(filepath):
                 filepath = self._handle_existing_file(filepath, file_handling, filename)
                 if filepath is None:
                     continue
                 filename = os.path.basename(filepath)
 
-            img = self.prepare_image_for_save(thumbnail.image)
-            img.save(filepath, 'TIFF', compression=compression)
+            img = self.prepare_image_for_save(self._get_thumbnail_image(thumbnail))
+            self._save_tiff_image(filepath, img, compression)
             exported_files.append(filename)
 
         return exported_files
@@ -500,20 +550,216 @@ class ExportManager:
         filename = f"{numbered_filename}.tiff"
         filepath = os.path.join(output_folder, filename)
 
-        if os.path.exists(filepath):
+        if self.reserve_output_files or os.path.exists(filepath):
             filepath = self._handle_existing_file(filepath, file_handling, filename)
             if filepath is None:
                 return []
             filename = os.path.basename(filepath)
 
-        images = [self.prepare_image_for_save(t.image) for t in group.thumbnails]
-
-        if images:
-            images[0].save(filepath, 'TIFF', save_all=True, append_images=images[1:] if len(images) > 1 else [], compression=compression)
+        if self._save_tiff_pages(filepath, group.thumbnails, compression):
             exported_files.append(filename)
 
         return exported_files
 
+    # -------------------------
+    # PDF writer (vector passthrough)
+    # -------------------------
+
+    def _get_pdf_source_path(self, thumbnail) -> Optional[str]:
+        """
+        Return source PDF path of a thumbnail, or None if the page is not PDF-backed.
+        """
+        loader = getattr(thumbnail, 'document_loader', None)
+        path = getattr(loader, 'path', None)
+        if path and path.lower().endswith('.pdf') and os.path.exists(path):
+            return path
+        return None
+
+    def _get_pdf_passthrough_path(self, thumbnail) -> Optional[str]:
+        """
+        Return the source PDF to copy the page from without rasterizing, or None
+        if the page has to be written as a raster page.
+        """
+        if not self.config_manager.get('export', {}).get('pdf_passthrough', True):
+            return None
+        return self._get_pdf_source_path(thumbnail)
+
+    def _save_pdf_pages(self, filepath: str, thumbnails: List) -> bool:
+        """
+        Save pages as a (multi-page) PDF, page by page in the original order.
+        Pages from PDF sources are copied as-is with PyMuPDF (text/vector preserved),
+        consecutive pages of the same source in one range; TIFF sources are written
+        as raster pages (G4/JPEG strips embedded without re-encoding), also in mixed groups.
+        """
+        if not thumbnails:
+            return False
+
+        sources = {}
+        copied = False
+        out_doc = fitz.open()
+        try:
+            # Pagine PDF consecutive dello stesso sorgente: [path, from, to] 0-based
+            pdf_range = None
+            for thumbnail in thumbnails:
+                path = self._get_pdf_passthrough_path(thumbnail)
+                page_index = thumbnail.pagenum - 1
+                if path and pdf_range and pdf_range[0] == path and pdf_range[2] == page_index - 1:
+                    pdf_range[2] = page_index
+                    continue
+                if pdf_range:
+                    self._insert_pdf_range(out_doc, sources, *pdf_range)
+                    pdf_range = None
+                if path:
+                    pdf_range = [path, page_index, page_index]
+                    copied = True
+                else:
+                    self._append_raster_page(out_doc, thumbnail)
+            if pdf_range:
+                self._insert_pdf_range(out_doc, sources, *pdf_range)
+
+            if copied:
+                out_doc.save(filepath, garbage=3, deflate=True)
+            else:
+                out_doc.save(filepath)
+        finally:
+            out_doc.close()
+            for src in sources.values():
+                src.close()
+        return True
+
+    def _insert_pdf_range(self, out_doc, sources: dict, path: str, from_page: int, to_page: int):
+        """Copy source pages from_page..to_page (0-based) into the output PDF."""
+        if path not in sources:
+            # Handle separato: il documento del loader è in uso dalla GUI
+            sources[path] = fitz.open(path)
+        out_doc.insert_pdf(sources[path], from_page=from_page, to_page=to_page)
+
+    def _append_raster_page(self, out_doc, thumbnail):
+        """
+        Append one raster page, so only one decoded page is held in memory.
+        G4/JPEG TIFF pages are embedded from their compressed strip without decoding.
+        Other bitonal pages are stored as 1-bit CCITT G4 images, the rest JPEG-encoded
+        (grayscale pages as single-channel JPEG). Page size follows the image DPI (72 if unknown).
+        """
+        pdf_image = self._get_tiff_passthrough(thumbnail)
+        if pdf_image is not None:
+            self._insert_pdf_image(out_doc, pdf_image)
+            return
+
+        img = self.prepare_image_for_save(self._get_thumbnail_image(thumbnail))
+        dpi_x, dpi_y = (float(v) or 72 for v in (img.info.get('dpi') or (72, 72)))  # TIFF: IFDRational
+        buffer = io.BytesIO()
+        if img.mode == "1":
+            # Pagina PDF bilevel scritta da Pillow (CCITTFaxDecode), copiata senza ricodifica
+            img.save(buffer, 'PDF', dpi=(dpi_x, dpi_y))
+            with fitz.open('pdf', buffer.getvalue()) as page_doc:
+                out_doc.insert_pdf(page_doc)
+        else:
+            img.save(buffer, 'JPEG')
+            page = out_doc.new_page(width=img.width * 72 / dpi_x, height=img.height * 72 / dpi_y)
+            page.insert_image(page.rect, stream=buffer.getvalue())
+
+    def _get_tiff_passthrough(self, thumbnail) -> Optional[dict]:
+        """
+        Return the compressed strip of a G4/JPEG TIFF page ready for a PDF image
+        XObject, or None if the page has to be decoded and re-encoded.
+        """
+        if not self.config_manager.get('export', {}).get('tiff_passthrough', True):
+            return None
+        get_page_pdf_image = getattr(getattr(thumbnail, 'document_loader', None), 'get_page_pdf_image', None)
+        if get_page_pdf_image is None:
+            return None
+        return get_page_pdf_image(thumbnail.pagenum)
+
+    def _insert_pdf_image(self, out_doc, pdf_image: dict):
+        """
+        Append a page showing the compressed image stream as-is (no decode/re-encode).
+        """
+        keys = pdf_image['keys']
+        dpi_x, dpi_y = pdf_image['dpi'] or (72, 72)
+        page = out_doc.new_page(width=int(keys['Width']) * 72 / dpi_x,
+                                height=int(keys['Height']) * 72 / dpi_y)
+        xref = out_doc.get_new_xref()
+        out_doc.update_object(xref, "<<>>")
+        out_doc.update_stream(xref, pdf_image['data'], compress=False)
+        for key, value in keys.items():
+            out_doc.xref_set_key(xref, key, value)
+        page.insert_image(page.rect, xref=xref)
+
+    # -------------------------
+    # Page sources (streaming)
+    # -------------------------
+
+    def _get_thumbnail_image(self, thumbnail) -> Optional[Image.Image]:
+        """
+        Return page image of a thumbnail/page source.
+        Pages with a 'document_loader' are rendered on demand with the 'export' profile
+        at export.pdf_dpi and not retained here; otherwise the page 'image' is used.
+        With export.preserve_color_mode, grayscale and 1-bit pages keep their mode.
+        """
+        loader = getattr(thumbnail, 'document_loader', None)
+        if loader is None:
+            image = getattr(thumbnail, 'image', None)
+            if image is None:
+                raise ValueError(f"Pagina {thumbnail.pagenum} senza immagine né loader")
+            return image
+
+        dpi = self.config_manager.get('export', {}).get('pdf_dpi', 300)
+        colorspace = 'auto' if self._preserve_color_mode() else None
+        image = loader.get_page(thumbnail.pagenum, profile='export', dpi=dpi, colorspace=colorspace)
+        if image is None:
+            raise ValueError(f"Impossibile caricare pagina {thumbnail.pagenum}")
+        return image
+
+    def _get_jpeg_passthrough(self, thumbnail) -> Optional[bytes]:
+        """
+        Return the original JPEG bytes of a scanned PDF page, or None if the page
+        has to be rendered and re-encoded.
+        """
+        if not self.config_manager.get('export', {}).get('jpeg_passthrough', True):
+            return None
+        get_page_jpeg = getattr(getattr(thumbnail, 'document_loader', None), 'get_page_jpeg', None)
+        if get_page_jpeg is None:
+            return None
+        return get_page_jpeg(thumbnail.pagenum)
+
+    def _save_jpeg_page(self, filepath: str, thumbnail, quality: int):
+        """
+        Save one page as JPEG. Embedded scanner JPEGs are written as-is (no decode/re-encode).
+        """
+        data = self._get_jpeg_passthrough(thumbnail)
+        if data is not None:
+            with open(filepath, 'wb') as f:
+                f.write(data)
+            return
+
+        img = self.prepare_image_for_save(self._get_thumbnail_image(thumbnail))
+        img.save(filepath, 'JPEG', quality=quality, optimize=True, dpi=img.info.get('dpi', (72, 72)))
+
+    def _iter_page_images(self, thumbnails) -> Iterator[Image.Image]:
+        """Yield normalized page images one at a time."""
+        for thumbnail in thumbnails:
+            yield self.prepare_image_for_save(self._get_thumbnail_image(thumbnail))
+
+    def _save_tiff_pages(self, filepath: str, thumbnails: List, compression: str) -> bool:
+        """
+        Save pages as multi-page TIFF, appending one frame at a time.
+        """
+        if not thumbnails:
+            return False
+
+        with TiffImagePlugin.AppendingTiffWriter(filepath, True) as tiff_file:
+            for img in self._iter_page_images(thumbnails):
+                self._save_tiff_image(tiff_file, img, compression)
+                tiff_file.newFrame()
+                del img
+        return True
+
+    def _save_tiff_image(self, target, img: Image.Image, compression: str):
+        """Write one TIFF page (file path or AppendingTiffWriter frame)."""
+        img.save(target, 'TIFF', compression=self._get_tiff_compression(img, compression),
+                 dpi=img.info.get('dpi', (72, 72)))
+
     # -------------------------
     # Helpers
     # -------------------------
@@ -4,5 +4,6 @@ GUI components module for DynamicAI
 
 from .thumbnail import PageThumbnail
 from .document_group import DocumentGroup
+from .thumbnail_pool import ThumbnailSlot, ThumbnailWidgetPool
 
-__all__ = ['PageThumbnail', 'DocumentGroup']
+__all__ = ['PageThumbnail', 'DocumentGroup', 'ThumbnailSlot', 'ThumbnailWidgetPool']
@@ -11,6 +11,10 @@ from .thumbnail import PageThumbnail
 if TYPE_CHECKING:
     from gui.main_window import AIDOXAApp
 
+# Spazio cella oltre la miniatura: padding griglia + etichetta "Pagina N" + bordi
+CELL_PADDING = 6
+CELL_LABEL_HEIGHT = 26
+
 class DocumentGroup:
     """Represents a group of pages belonging to the same document category with multi-row layout"""
     
@@ -29,18 +33,17 @@ class DocumentGroup:
         self.min_thumbnails_per_row = 2
         self.max_thumbnails_per_row = 4
         self.last_calculated_width = 0  # ✅ Cache per evitare calcoli ridondanti
+        self.realized: set = set()  # Thumbnail con widget (nel viewport)
+
+        # Layout incrementale: posizioni ricalcolate solo da _dirty_from in poi
+        self._update_depth = 0
+        self._dirty_from: Optional[int] = None
+        self._layout_per_row = 0
+        self._layout_rows = 0
 
         # Create UI elements
         self.create_widgets()
         self.bind_events()
-        
-        # Configura massimo 4 colonne nel grid
-        for col in range(4):  # ← Cambia da range(6) a range(4)
-            self.pages_frame.grid_columnconfigure(col, weight=1, uniform='thumbnail')
-            
-        # Configura le righe (max 20 righe supporta fino a 80 thumbnail con 4/row)
-        for row in range(20):
-            self.pages_frame.grid_rowconfigure(row, weight=0)  # Le righe NON si espandono
                         
     def create_widgets(self):
         """Create the document group UI widgets"""
@@ -53,17 +56,10 @@ class DocumentGroup:
         # Create header with document counter and category name
         self.create_header()
         
-        # Container for thumbnails with grid layout - RESPONSIVE
-        self.pages_frame = tk.Frame(self.frame, bg="white")
+        # Container for thumbnails - VIRTUALIZZATO: altezza = righe * cella,
+        # widget posizionati con place() solo per le righe visibili
+        self.pages_frame = tk.Frame(self.frame, bg="white", height=1)
         self.pages_frame.pack(fill="both", expand=True, padx=5, pady=5)
-        
-        # ✅ Configure grid weights for responsive layout (tutte le colonne si espandono)
-        for col in range(6):  # Max 6 colonne possibili
-            self.pages_frame.grid_columnconfigure(col, weight=1, uniform="thumbnail")
-        
-        # ✅ NUOVO: Le righe si espandono verticalmente
-        for row in range(20):  # Max 20 righe (supporta fino a 80 thumbnail con 4/row)
-            self.pages_frame.grid_rowconfigure(row, weight=0)  # Le righe NON si espandono (solo le colonne)
 
     def create_header(self):
         """Create the document group header with counter and category"""
@@ -113,14 +109,17 @@ class DocumentGroup:
                                     min(self.max_thumbnails_per_row, 
                                         frame_width // total_thumb_width))
                 
-                # Only repack if the number changed significantly
+                # Colonne cambiate: un solo reflow (debounced) per tutti i gruppi
                 if abs(optimal_per_row - self.thumbnails_per_row) > 0:
-                    self.thumbnails_per_row = optimal_per_row
-                    self.after_idle_repack()
+                    self.mainapp.schedule_groups_reflow()
+                elif frame_width != self.last_calculated_width:
+                    # Stesse colonne, celle più larghe/strette: riposiziona solo le visibili
+                    self.last_calculated_width = frame_width
+                    self.mainapp.schedule_visible_thumbnails_update()
 
     def after_idle_repack(self):
         """Repack thumbnails after idle to avoid recursive calls"""
-        self.mainapp.after_idle(self.repack_thumbnails_grid)
+        self.mainapp.schedule_groups_reflow()
 
     def on_header_enter(self, event):
         """Handle mouse enter on header"""
@@ -225,6 +224,7 @@ class DocumentGroup:
                 position = None
         
         if position is None:
+            position = len(self.thumbnails)
             self.thumbnails.append(thumbnail)
             if page_num not in self.pages:
                 self.pages.append(page_num)
@@ -233,7 +233,7 @@ class DocumentGroup:
             if page_num not in self.pages:
                 self.pages.insert(position, page_num)
         
-        self.repack_thumbnails_grid()
+        self.invalidate_layout(position)
         return thumbnail
         
         if hasattr(self, 'document_loader') and self.document_loader:
@@ -283,6 +283,7 @@ class DocumentGroup:
         
         # Aggiungi alla lista
         if position is None:
+            position = len(self.thumbnails)
             self.thumbnails.append(thumbnail)
             if pagenum not in self.pages:
                 self.pages.append(pagenum)
@@ -291,25 +292,27 @@ class DocumentGroup:
             if pagenum not in self.pages:
                 self.pages.insert(position, pagenum)
         
-        # Repack grid
-        self.repack_thumbnails_grid()
+        # Solo le celle da position in poi cambiano riga/colonna
+        self.invalidate_layout(position)
         
-        # ⭐ CARICA IMMAGINE DOPO UN BREVE DELAY
-        self.mainapp.after(50, lambda: self._load_thumbnail_image(thumbnail))
+        # ⭐ Immagine richiesta quando la pagina entra nel viewport (realize)
         
         return thumbnail
 
+    def add_pages_lazy(self, pagenums, document_loader):
+        """Aggiungi più pagine lazy con un solo ricalcolo layout"""
+        self.begin_update()
+        try:
+            for pagenum in pagenums:
+                self.add_page_lazy(pagenum, document_loader)
+        finally:
+            self.end_update()
+
     def _load_thumbnail_image(self, thumbnail):
         """Helper per caricare immagine thumbnail in background"""
         try:
-            if not thumbnail.image_loaded and thumbnail.document_loader:
-                self.mainapp.debug_print(f"Loading image for page {thumbnail.pagenum}")
-                img = thumbnail.document_loader.get_page(thumbnail.pagenum)
-                if img:
-                    thumbnail.set_image(img)
-                    self.mainapp.debug_print(f"✅ Image loaded for page {thumbnail.pagenum}")
-                else:
-                    self.mainapp.debug_print(f"❌ Failed to load image for page {thumbnail.pagenum}")
+            if self.mainapp.request_thumbnail(thumbnail, priority=thumbnail.pagenum):
+                self.mainapp.debug_print(f"Queued image for page {thumbnail.pagenum}")
         except Exception as e:
             self.mainapp.debug_print(f"Error loading thumbnail image: {e}")   
 
@@ -358,42 +361,134 @@ class DocumentGroup:
         if thumbnail in self.thumbnails:
             index = self.thumbnails.index(thumbnail)
             self.thumbnails.remove(thumbnail)
-            thumbnail.grid_forget()  # Changed from pack_forget to grid_forget
+            self.realized.discard(thumbnail)
+            thumbnail.destroy()  # Slot restituito al pool
             if thumbnail.pagenum in self.pages:
                 self.pages.remove(thumbnail.pagenum)
-            # Repack remaining thumbnails
-            self.repack_thumbnails_grid()
+            # Riposiziona solo le thumbnail successive
+            self.invalidate_layout(index)
             return index
         return -1
 
+    def begin_update(self):
+        """Inizia modifica in blocco: il layout viene ricalcolato una volta in end_update()"""
+        self._update_depth += 1
+
+    def end_update(self):
+        """Termina modifica in blocco e applica il layout se necessario"""
+        self._update_depth = max(0, self._update_depth - 1)
+        if self._update_depth == 0 and self._dirty_from is not None:
+            self._apply_layout()
+
+    def invalidate_layout(self, from_index: int = 0):
+        """Segna da ricalcolare le posizioni da from_index in poi"""
+        if self._dirty_from is None or from_index < self._dirty_from:
+            self._dirty_from = max(0, from_index)
+        if self._update_depth == 0:
+            self._apply_layout()
+
     def repack_thumbnails_grid(self):
-        """Repack all thumbnails in grid layout"""
-        # Clear all current grid positions
-        for thumb in self.thumbnails:
-            thumb.grid_forget()
-        
-        # Calculate grid dimensions
-        total_thumbnails = len(self.thumbnails)
-        if total_thumbnails == 0:
-            return
-        
-        # Adjust thumbnails per row based on count and frame width
+        """Ricalcola posizioni (modello) e altezza griglia; i widget visibili vengono riposizionati"""
+        self.invalidate_layout(0)
+
+    def _apply_layout(self):
+        """Aggiorna riga/colonna delle sole celle invalidate e l'altezza se cambia il numero di righe"""
+        # Adjust thumbnails per row based on frame width
         current_frame_width = self.pages_frame.winfo_width()
         if current_frame_width > 1:
             thumb_width = self.mainapp.config_manager.get('thumbnail_width', 80)
-            padding_per_thumbnail = 6
+            padding_per_thumbnail = CELL_PADDING
             total_thumb_width = thumb_width + padding_per_thumbnail
             optimal_per_row = max(self.min_thumbnails_per_row, 
                                 min(self.max_thumbnails_per_row, 
                                     current_frame_width // total_thumb_width))
             self.thumbnails_per_row = optimal_per_row
         
-        # Grid layout - RESPONSIVE con sticky
-        for i, thumb in enumerate(self.thumbnails):
-            row = i // self.thumbnails_per_row
-            col = i % self.thumbnails_per_row
-            # ✅ sticky="new" = espandi orizzontalmente (east-west) e allinea in alto (north)
-            thumb.grid(row=row, column=col, padx=3, pady=3, sticky="new")
+        start = self._dirty_from or 0
+        self._dirty_from = None
+        if self.thumbnails_per_row != self._layout_per_row:
+            start = 0  # Colonne cambiate: tutte le posizioni cambiano
+            self._layout_per_row = self.thumbnails_per_row
+        
+        per_row = self.thumbnails_per_row
+        for i in range(start, len(self.thumbnails)):
+            thumb = self.thumbnails[i]
+            thumb.row = i // per_row
+            thumb.column = i % per_row
+        
+        rows = math.ceil(len(self.thumbnails) / per_row)
+        if rows != self._layout_rows:
+            self._layout_rows = rows
+            self.pages_frame.configure(height=max(1, rows * self.get_cell_size()[1]))
+        
+        self.mainapp.schedule_visible_thumbnails_update()
+
+    def reflow(self) -> bool:
+        """Ricalcola colonne dalla larghezza attuale (True se il layout è cambiato)"""
+        frame_width = self.pages_frame.winfo_width()
+        if frame_width <= 10:
+            return False
+        self.last_calculated_width = frame_width
+        new_per_row = self.calculate_optimal_thumbnails_per_row()
+        if new_per_row == self.thumbnails_per_row:
+            return False
+        self.thumbnails_per_row = new_per_row
+        self.invalidate_layout(0)
+        return True
+
+    def get_cell_size(self) -> tuple:
+        """Dimensione cella griglia (larghezza, altezza) in pixel"""
+        thumb_width = self.mainapp.config_manager.get('thumbnail_width', 80)
+        thumb_height = self.mainapp.config_manager.get('thumbnail_height', 100)
+        cell_width = max(thumb_width + CELL_PADDING,
+                         self.pages_frame.winfo_width() // max(1, self.thumbnails_per_row))
+        return cell_width, thumb_height + CELL_LABEL_HEIGHT + CELL_PADDING
+
+    def get_cell_y(self, thumbnail: PageThumbnail) -> int:
+        """Coordinata y della cella nel contenuto del canvas (per priorità caricamento)"""
+        cell_height = self.get_cell_size()[1]
+        return self.frame.winfo_y() + self.pages_frame.winfo_y() + max(0, thumbnail.row) * cell_height
+
+    def update_visible_cells(self, view_top: int, view_bottom: int, overscan_rows: int = 1):
+        """
+        Lega i widget del pool alle sole righe visibili (coordinate schermo) e
+        restituisce al pool quelli usciti dal viewport
+        """
+        pool = self.mainapp.thumbnail_pool
+        visible = set()
+
+        if self.thumbnails and self.pages_frame.winfo_ismapped():
+            cell_width, cell_height = self.get_cell_size()
+            per_row = max(1, self.thumbnails_per_row)
+            top = self.pages_frame.winfo_rooty()
+            rows = math.ceil(len(self.thumbnails) / per_row)
+
+            first_row = max(0, (view_top - top) // cell_height - overscan_rows)
+            last_row = min(rows - 1, (view_bottom - top) // cell_height + overscan_rows)
+            if last_row >= first_row:
+                start = first_row * per_row
+                end = min(len(self.thumbnails), (last_row + 1) * per_row)
+                visible = set(self.thumbnails[start:end])
+
+        for thumb in self.realized - visible:
+            thumb.unrealize(pool)
+
+        if visible:
+            pad = CELL_PADDING // 2
+            for thumb in visible:
+                was_realized = thumb.is_realized
+                slot = thumb.realize(pool)
+                # place() solo per celle nuove o con posizione/dimensione cambiata
+                placement = (thumb.column * cell_width + pad, thumb.row * cell_height + pad,
+                             cell_width - CELL_PADDING, cell_height - CELL_PADDING)
+                if thumb.placement != placement:
+                    thumb.placement = placement
+                    slot.frame.place(in_=self.pages_frame, x=placement[0], y=placement[1],
+                                     width=placement[2], height=placement[3])
+                if not was_realized:
+                    slot.frame.lift()
+
+        self.realized = visible
 
     def repack_thumbnails(self):
         """Legacy method - redirects to grid layout"""
@@ -412,17 +507,16 @@ class DocumentGroup:
         closest_distance = float('inf')
         closest_position = len(self.thumbnails)
         
+        cell_width = self.get_cell_size()[0]
         for i, thumb in enumerate(self.thumbnails):
             try:
                 # Get thumbnail center position
                 thumb_info = thumb.grid_info()
                 if thumb_info:
-                    row = thumb_info.get('row', 0)
                     col = thumb_info.get('column', 0)
                     
                     # Estimate position based on grid
-                    thumb_width = self.mainapp.config_manager.get('thumbnail_width', 80)
-                    thumb_x = col * (thumb_width + 6) + (thumb_width // 2)
+                    thumb_x = col * cell_width + (cell_width // 2)
                     
                     distance = abs(relative_x - thumb_x)
                     if distance < closest_distance:
@@ -446,7 +540,7 @@ class DocumentGroup:
             return self.thumbnails_per_row  # Usa valore corrente se frame non è pronto
             
         thumb_width = self.mainapp.config_manager.get('thumbnail_width', 80)
-        padding = 6
+        padding = CELL_PADDING
         border = 10
         available_width = frame_width - border
         total_thumb_width = thumb_width + padding
@@ -459,14 +553,7 @@ class DocumentGroup:
     def force_reflow(self):
         """Forza ricalcolo layout (chiamato da drag sash)"""
         try:
-            frame_width = self.pages_frame.winfo_width()
-            if frame_width > 10:
-                new_per_row = self.calculate_optimal_thumbnails_per_row()
-                if new_per_row != self.thumbnails_per_row:
-                    self.thumbnails_per_row = new_per_row
-                    self.last_calculated_width = frame_width
-                    self.repack_thumbnails_grid()
-                    return True
+            return self.reflow()
         except Exception as e:
             self.mainapp.debug_print(f"Error in force reflow: {e}")
         return False
@@ -534,8 +621,9 @@ class DocumentGroup:
         for thumbnail in self.thumbnails:
             thumbnail.update_thumbnail_size(thumb_width, thumb_height)
         
-        # Recalculate grid layout with new sizes
+        # Recalculate grid layout with new sizes (altezza cella cambiata)
         self.thumbnails_per_row = self.calculate_optimal_thumbnails_per_row()
+        self._layout_rows = 0
         self.repack_thumbnails_grid()
 
     def is_empty(self) -> bool:
@@ -564,9 +652,8 @@ class DocumentGroup:
         try:
             frame_width = self.pages_frame.winfo_width()
             if frame_width > 10:
-                self.thumbnails_per_row = self.calculate_optimal_thumbnails_per_row()
-                self.last_calculated_width = frame_width
-                self.repack_thumbnails_grid()
+                self.reflow()
+                self.mainapp.schedule_visible_thumbnails_update()
                 self.mainapp.debug_print(f"Initial layout: {self.thumbnails_per_row} per row (width: {frame_width}px)")
         except Exception as e:
             self.mainapp.debug_print(f"Error in initial layout: {e}")
@@ -579,6 +666,7 @@ class DocumentGroup:
         """Destroy the document group and all its thumbnails"""
         for thumb in self.thumbnails:
             thumb.destroy()
+        self.realized.clear()
         self.frame.destroy()
 
     def get_info(self) -> dict:
@@ -591,5 +679,6 @@ class DocumentGroup:
             'selected': self.isselected,
             'empty': self.is_empty(),
             'thumbnails_per_row': self.thumbnails_per_row,
+            'realized_widgets': len(self.realized),
             'grid_rows': math.ceil(len(self.thumbnails) / self.thumbnails_per_row) if self.thumbnails else 0
         }
\ No newline at end of file
@@ -3,16 +3,95 @@ Page thumbnail component for DynamicAI with grid layout support
 """
 
 import tkinter as tk
-from PIL import Image, ImageTk
+from PIL import Image, ImageDraw, ImageFont, ImageTk
 from config.constants import RESAMPLEFILTER
-from typing import TYPE_CHECKING, Tuple, Optional
+from typing import TYPE_CHECKING, Dict, Tuple, Optional
 
 if TYPE_CHECKING:
     from gui.main_window import AIDOXAApp
     from gui.components.document_group import DocumentGroup
 
+# Placeholder condivisi: uno per dimensione miniatura, non uno per pagina
+_placeholder_images: Dict[Tuple[int, int], Image.Image] = {}
+_placeholder_photos: Dict[Tuple[int, int], ImageTk.PhotoImage] = {}
+_placeholder_fonts: Dict[int, object] = {}
+
+
+def _get_placeholder_font(size: int):
+    """Font placeholder (caricato una sola volta per dimensione)"""
+    font = _placeholder_fonts.get(size)
+    if font is None:
+        try:
+            font = ImageFont.truetype("arial.ttf", size)
+        except:
+            font = ImageFont.load_default()
+        _placeholder_fonts[size] = font
+    return font
+
+
+def render_placeholder(size: Tuple[int, int] = (80, 100)) -> Image.Image:
+    """Disegna il placeholder di caricamento (senza numero pagina) - cache per dimensione"""
+    size = (int(size[0]), int(size[1]))
+    placeholder = _placeholder_images.get(size)
+    if placeholder is not None:
+        return placeholder
+
+    thumb_w, thumb_h = size
+
+    # Crea immagine placeholder con sfondo grigio chiaro
+    placeholder = Image.new('RGB', size, color='#E0E0E0')
+    draw = ImageDraw.Draw(placeholder)
+
+    # Disegna bordo
+    draw.rectangle([(2, 2), (thumb_w-3, thumb_h-3)], outline='#BDBDBD', width=2)
+
+    # Icona documento stilizzata nella metà alta (il centro resta al numero pagina)
+    icon_color = '#9E9E9E'
+    center_x = thumb_w // 2
+    center_y = thumb_h // 2 - 25
+    doc_w, doc_h = 30, 40
+    draw.rectangle(
+        [(center_x - doc_w//2, center_y - doc_h//2),
+         (center_x + doc_w//2, center_y + doc_h//2)],
+        outline=icon_color, width=2
+    )
+
+    # Linee orizzontali (testo simulato)
+    for i in range(3):
+        y = center_y - 10 + (i * 8)
+        draw.line([(center_x - 12, y), (center_x + 12, y)], fill=icon_color, width=1)
+
+    # Label "Caricamento..."
+    small_font = _get_placeholder_font(8)
+    loading_text = "Caricamento..."
+    try:
+        bbox = draw.textbbox((0, 0), loading_text, font=small_font)
+        text_w = bbox[2] - bbox[0]
+    except:
+        text_w = len(loading_text) * 6
+
+    loading_x = (thumb_w - text_w) // 2
+    draw.text((loading_x, thumb_h - 12), loading_text, fill='#9E9E9E', font=small_font)
+
+    _placeholder_images[size] = placeholder
+    return placeholder
+
+
+def get_placeholder_photo(size: Tuple[int, int] = (80, 100)) -> ImageTk.PhotoImage:
+    """PhotoImage placeholder condivisa per dimensione (richiede Tk attivo)"""
+    size = (int(size[0]), int(size[1]))
+    photo = _placeholder_photos.get(size)
+    if photo is None:
+        photo = ImageTk.PhotoImage(render_placeholder(size))
+        _placeholder_photos[size] = photo
+    return photo
+
 class PageThumbnail:
-    """Represents a page thumbnail with drag and drop capabilities and grid layout support"""
+    """
+    Page model in a document group with drag and drop capabilities.
+    Tk widgets are not owned: a recycled ThumbnailSlot is bound only while the
+    page is inside the viewport (see realize/unrealize).
+    """
     
     def __init__(self, parent: tk.Widget, pagenum: int, image: Image.Image,
                 categoryname: str, mainapp: 'AIDOXAApp', document_group: 'DocumentGroup',
@@ -36,6 +115,16 @@ class PageThumbnail:
         self.mainapp = mainapp
         self.document_group = document_group
         self.is_selected = False
+
+        # Widget (da pool) legati solo quando la pagina è nel viewport
+        self.slot = None
+        self.frame = None
+        self.img_label = None
+        self.text_label = None
+        self.thumbnail_imgtk = None
+        self.row = -1
+        self.column = -1
+        self.placement = None  # (x, y, w, h) dell'ultimo place() dello slot
         
         # ⭐ NUOVO: Lazy loading support
         self.document_loader = None  # Riferimento al loader per lazy loading
@@ -54,25 +143,11 @@ class PageThumbnail:
         self.is_dragging = False
         self.drag_start_pos: Optional[Tuple[int, int]] = None
         
-        # ✅ Usa dimensioni già impostate sopra
-        thumb_width = self.thumbnail_width
-        thumb_height = self.thumbnail_height
-        
-        # ⭐ NUOVO: Crea thumbnail o placeholder
-        if image is None:
-            # Lazy loading - crea placeholder
-            self.thumbnail_img_tk = self.create_placeholder_thumbnail((thumb_width, thumb_height))
-        else:
-            # Caricamento normale
-            self.thumbnail_img_tk = self.create_thumbnail(image, (thumb_width, thumb_height))
+        if image is not None:
             self.image_loaded = True
         
         # Store current thumbnail size for updates
-        self.current_thumb_size = (thumb_width, thumb_height)
-        
-        # Create UI elements
-        self.create_widgets()
-        self.bind_events()
+        self.current_thumb_size = (self.thumbnail_width, self.thumbnail_height)
         
         # ⭐ NUOVO: Auto-load se c'è document_loader
         if image is None and hasattr(self, 'document_loader') and self.document_loader:
@@ -81,46 +156,59 @@ class PageThumbnail:
     def try_auto_load(self):
         """Prova a caricare automaticamente l'immagine dopo creazione"""
         if not self.image_loaded and self.document_loader:
-            try:
-                self.mainapp.debug_print(f"Auto-loading image for page {self.pagenum}")
-                img = self.document_loader.get_page(self.pagenum)
-                if img:
-                    self.set_image(img)
-            except Exception as e:
-                self.mainapp.debug_print(f"Error in auto-load: {e}")
-
-    def create_widgets(self):
-        """Create the thumbnail UI widgets - RESPONSIVE"""
-        # Main frame with enhanced selection styling
-        self.frame = tk.Frame(self.parent, bd=2, relief="solid", bg="white")
-        
-        # ✅ NUOVO: Configura frame per centrare contenuto
-        self.frame.grid_rowconfigure(0, weight=1)  # Image row si espande
-        self.frame.grid_rowconfigure(1, weight=0)  # Label row fissa
-        self.frame.grid_columnconfigure(0, weight=1)  # Colonna si espande
-        
-        # Image Label - centrata
-        self.img_label = tk.Label(self.frame, image=self.thumbnail_img_tk, bg="white", cursor="hand2")
-        self.img_label.grid(row=0, column=0, padx=2, pady=2, sticky="n")  # Allineata in alto
-        
-        # Page label - centrata in basso
-        self.text_label = tk.Label(self.frame, text=f"Pagina {self.pagenum}", 
-                                  font=("Arial", 8, "bold"), bg="white")
-        self.text_label.grid(row=1, column=0, pady=(0, 2), sticky="ew")  # Si espande orizzontalmente
-
-    def bind_events(self):
-        """Bind mouse events for drag and drop and selection"""
-        widgets = [self.frame, self.img_label, self.text_label]
-        
-        for widget in widgets:
-            # Mouse events for drag and drop
-            widget.bind("<Button-1>", self.on_button_press)
-            widget.bind("<B1-Motion>", self.on_drag_motion)
-            widget.bind("<ButtonRelease-1>", self.on_button_release)
-            
-            # Hover events for visual feedback
-            widget.bind("<Enter>", self.on_enter)
-            widget.bind("<Leave>", self.on_leave)
+            self.mainapp.request_thumbnail(self, priority=self.pagenum)
+
+    @property
+    def is_realized(self) -> bool:
+        """True se la thumbnail ha widget visibili (è nel viewport)"""
+        return self.slot is not None
+
+    def realize(self, pool):
+        """Lega uno slot del pool a questa pagina e ne aggiorna il contenuto"""
+        if self.slot is None:
+            self.slot = pool.acquire(self)
+            self.frame = self.slot.frame
+            self.img_label = self.slot.img_label
+            self.text_label = self.slot.text_label
+
+            if self.image is not None:
+                self.thumbnail_imgtk = self.create_thumbnail(self.image, self.current_thumb_size)
+                self.img_label.configure(image=self.thumbnail_imgtk, text='')
+            else:
+                self.thumbnail_imgtk = self.create_placeholder_thumbnail(self.current_thumb_size)
+                self.img_label.configure(image=self.thumbnail_imgtk, text=f"#{self.pagenum}",
+                                         compound="center", fg='#616161', font=("Arial", 11, "bold"))
+            self.text_label.configure(text=f"Pagina {self.pagenum}")
+            self._apply_style()
+
+            if not self.image_loaded and self.document_loader:
+                self.mainapp.request_thumbnail(self, priority=max(0, self.row))
+        return self.slot
+
+    def unrealize(self, pool):
+        """Restituisce lo slot al pool (la pagina resta nel modello del gruppo)"""
+        if self.slot is None:
+            return
+        pool.release(self.slot)
+        self.slot = None
+        self.placement = None
+        self.frame = None
+        self.img_label = None
+        self.text_label = None
+        self.thumbnail_imgtk = None  # Libera PhotoImage fuori viewport
+
+    def _apply_style(self):
+        """Applica stile selezione/normale allo slot legato"""
+        if self.slot is None:
+            return
+        if self.is_selected:
+            self.frame.configure(bg="#87CEEB", relief="raised", bd=3)
+            bg = "#87CEEB"
+        else:
+            self.frame.configure(bg="white", relief="solid", bd=2)
+            bg = "white"
+        self.img_label.configure(bg=bg)
+        self.text_label.configure(bg=bg)
 
     def create_thumbnail(self, image: Image.Image, size: Tuple[int, int] = (80, 100)) -> ImageTk.PhotoImage:
         """Create a thumbnail version of the image"""
@@ -128,157 +216,66 @@ class PageThumbnail:
         img_copy.thumbnail(size, RESAMPLEFILTER)
         return ImageTk.PhotoImage(img_copy)
 
-    # ⭐⭐⭐ AGGIUNGI QUESTI METODI QUI ⭐⭐⭐
-
     def create_placeholder_thumbnail(self, size: Tuple[int, int] = (80, 100)) -> ImageTk.PhotoImage:
-        """Crea thumbnail placeholder veloce per lazy loading"""
-        from PIL import ImageDraw, ImageFont
-        
-        thumb_w, thumb_h = size
-        
-        # Crea immagine placeholder con sfondo grigio chiaro
-        placeholder = Image.new('RGB', size, color='#E0E0E0')
-        draw = ImageDraw.Draw(placeholder)
-        
-        # Disegna bordo
-        draw.rectangle([(2, 2), (thumb_w-3, thumb_h-3)], outline='#BDBDBD', width=2)
-        
-        # Disegna icona documento stilizzata
-        icon_color = '#9E9E9E'
-        center_x = thumb_w // 2
-        center_y = thumb_h // 2 - 10
-        
-        # Rettangolo documento
-        doc_w, doc_h = 30, 40
-        draw.rectangle(
-            [(center_x - doc_w//2, center_y - doc_h//2),
-             (center_x + doc_w//2, center_y + doc_h//2)],
-            outline=icon_color, width=2
-        )
-        
-        # Linee orizzontali (testo simulato)
-        for i in range(3):
-            y = center_y - 10 + (i * 8)
-            draw.line([(center_x - 12, y), (center_x + 12, y)], fill=icon_color, width=1)
-        
-        # Numero pagina
-        try:
-            font = ImageFont.truetype("arial.ttf", 16)
-        except:
-            font = ImageFont.load_default()
-        
-        text = f"#{self.pagenum}"
-        
-        # Calcola dimensioni testo per centrarlo
-        try:
-            bbox = draw.textbbox((0, 0), text, font=font)
-            text_w = bbox[2] - bbox[0]
-            text_h = bbox[3] - bbox[1]
-        except:
-            # Fallback per versioni vecchie di Pillow
-            text_w = len(text) * 10
-            text_h = 14
-        
-        text_x = (thumb_w - text_w) // 2
-        text_y = thumb_h - 25
-        
-        draw.text((text_x, text_y), text, fill='#616161', font=font)
-        
-        # Label "Caricamento..."
-        try:
-            small_font = ImageFont.truetype("arial.ttf", 8)
-        except:
-            small_font = ImageFont.load_default()
-        
-        loading_text = "Caricamento..."
-        try:
-            bbox = draw.textbbox((0, 0), loading_text, font=small_font)
-            text_w = bbox[2] - bbox[0]
-        except:
-            text_w = len(loading_text) * 6
-        
-        loading_x = (thumb_w - text_w) // 2
-        
-        draw.text((loading_x, thumb_h - 12), loading_text, fill='#9E9E9E', font=small_font)
+        """Placeholder condiviso per dimensione (il numero pagina è sovrapposto dal Label)"""
+        return get_placeholder_photo(size)
 
     def set_image(self, image: Image.Image):
         """Imposta immagine reale (chiamato da lazy loading)"""
         self.image = image
+        self.image_loaded = True
         
-        # Ricrea thumbnail con immagine reale
-        thumb_width = self.mainapp.config_manager.get('thumbnail_width', 80)
-        thumb_height = self.mainapp.config_manager.get('thumbnail_height', 100)
-        self.thumbnail_imgtk = self.create_thumbnail(image, (thumb_width, thumb_height))
-        
-        # Aggiorna label
-        self.img_label.configure(image=self.thumbnail_imgtk)
+        # PhotoImage solo se visibile, altrimenti creata al prossimo realize()
+        if self.slot is not None:
+            self.thumbnail_imgtk = self.create_thumbnail(image, self.current_thumb_size)
+            self.img_label.configure(image=self.thumbnail_imgtk, text='')
         
-        self.image_loaded = True
         self.mainapp.debug_print(f"Image loaded for page {self.pagenum}")
 
+    def get_view_image(self) -> Optional[Image.Image]:
+        """Immagine a risoluzione viewer (profilo 'view'); la miniatura resta in self.image"""
+        if self.document_loader:
+            img = self.document_loader.get_page(self.pagenum, profile='view')
+            if img:
+                return img
+        return self.image
+
     def set_document_loader(self, loader):
         """Imposta riferimento al document loader per lazy loading"""
         self.document_loader = loader
         self.mainapp.debug_print(f"Document loader set for page {self.pagenum}")
 
     def load_image_if_needed(self):
-        """Carica immagine reale se necessario (per viewport loading)"""
+        """Richiede immagine reale se necessario (rendering in background, True se accodata)"""
         if not self.image_loaded and self.document_loader:
-            try:
-                self.mainapp.debug_print(f"Loading image for viewport - page {self.pagenum}")
-                img = self.document_loader.get_page(self.pagenum)
-                if img:
-                    self.set_image(img)
-                    return True
-            except Exception as e:
-                self.mainapp.debug_print(f"Error in viewport loading: {e}")
+            return self.mainapp.request_thumbnail(self, priority=0)
         return False
 
     def is_in_viewport(self, canvas_widget) -> bool:
         """Controlla se la thumbnail è visibile nel viewport"""
-        try:
-            # Ottieni posizione del frame rispetto al canvas
-            frame_x = self.frame.winfo_x()
-            frame_y = self.frame.winfo_y()
-            frame_w = self.frame.winfo_width()
-            frame_h = self.frame.winfo_height()
-            
-            # Ottieni dimensioni visibili del canvas
-            canvas_width = canvas_widget.winfo_width()
-            canvas_height = canvas_widget.winfo_height()
-            
-            # Controlla se interseca con il viewport
-            visible = (frame_x < canvas_width and 
-                    frame_x + frame_w > 0 and
-                    frame_y < canvas_height and 
-                    frame_y + frame_h > 0)
-            
-            return visible
-            
-        except Exception as e:
-            # Se c'è un errore, assumiamo sia visibile per sicurezza
-            return True
+        return self.slot is not None
 
     def get_load_priority(self, scroll_top: int) -> int:
         """Ottieni priorità di caricamento basata su distanza da viewport"""
         try:
-            frame_y = self.frame.winfo_y()
-            distance = abs(frame_y - scroll_top)
+            cell_y = self.document_group.get_cell_y(self)
+            distance = abs(cell_y - scroll_top)
             # Priorità inverse (0 = alta, 1000+ = bassa)  
             return min(9999, distance)
         except:
             return 5000  # Priorità media se errore
 
     def on_enter(self, event):
-        """Handle mouse enter - show hover effect"""
-        if not self.is_selected:
+        """Handle mouse enter - show hover effect and prefetch the page for the viewer"""
+        if not self.is_selected and self.slot is not None:
             self.frame.configure(bg="#E0E0E0")
             self.img_label.configure(bg="#E0E0E0")
             self.text_label.configure(bg="#E0E0E0")
+        self.mainapp.prefetch_hover_page(self)
 
     def on_leave(self, event):
         """Handle mouse leave - remove hover effect"""
-        if not self.is_selected:
+        if not self.is_selected and self.slot is not None:
             self.frame.configure(bg="white")
             self.img_label.configure(bg="white")
             self.text_label.configure(bg="white")
@@ -287,13 +284,7 @@ class PageThumbnail:
         """Handle button press - start potential drag"""
         # ⭐ NUOVO: Carica immagine reale se non ancora caricata (lazy loading)
         if not self.image_loaded and self.document_loader:
-            try:
-                self.mainapp.debug_print(f"Loading image on demand for page {self.pagenum}")
-                img = self.document_loader.get_page(self.pagenum)
-                if img:
-                    self.set_image(img)
-            except Exception as e:
-                self.mainapp.debug_print(f"Error loading image on demand: {e}")
+            self.mainapp.request_thumbnail(self, priority=0)
         
         self.drag_start_pos = (event.x_root, event.y_root)
         self.is_dragging = False
@@ -348,19 +339,15 @@ class PageThumbnail:
     def select(self):
         """Select this thumbnail"""
         self.is_selected = True
-        self.frame.configure(bg="#87CEEB", relief="raised", bd=3)
-        self.img_label.configure(bg="#87CEEB")
-        self.text_label.configure(bg="#87CEEB")
+        self._apply_style()
 
     def deselect(self):
         self.is_selected = False
         try:
-            self.frame.configure(bg="white", relief="solid", bd=2)
+            self._apply_style()
         except tk.TclError:
             # Widget già distrutto, ignora
             pass
-        self.img_label.configure(bg="white")
-        self.text_label.configure(bg="white")
 
     def update_category(self, new_category: str):
         """Update the category name for this thumbnail"""
@@ -371,46 +358,32 @@ class PageThumbnail:
         """Update thumbnail size with new dimensions"""
         if (width, height) != self.current_thumb_size:
             self.current_thumb_size = (width, height)
-            self.thumbnail_imgtk = self.create_thumbnail(self.image, (width, height))
-            self.img_label.configure(image=self.thumbnail_imgtk)
-
-    # Grid layout methods
-    def grid(self, **kwargs):
-        """Place the thumbnail using grid geometry manager"""
-        self.frame.grid(**kwargs)
-
-    def grid_forget(self):
-        """Remove the thumbnail from grid display"""
-        self.frame.grid_forget()
+            if self.image is None:
+                return
+            if self.slot is not None:
+                self.thumbnail_imgtk = self.create_thumbnail(self.image, (width, height))
+                self.img_label.configure(image=self.thumbnail_imgtk)
+            if self.image_loaded and self.document_loader:
+                # Miniatura salvata alla dimensione precedente: rigenera in background alla nuova
+                self.image_loaded = False
+                if not self.mainapp.request_thumbnail(self, priority=self.pagenum):
+                    self.image_loaded = True
 
     def grid_info(self):
-        """Get grid information for this thumbnail"""
-        return self.frame.grid_info()
-
-    # Legacy pack methods for backward compatibility
-    def pack(self, **kwargs):
-        """Place the thumbnail using pack geometry manager (legacy)"""
-        self.frame.pack(**kwargs)
-
-    def pack_forget(self):
-        """Remove the thumbnail from pack display (legacy)"""
-        self.frame.pack_forget()
+        """Posizione nella griglia del gruppo (dal modello, anche se non visibile)"""
+        return {'row': self.row, 'column': self.column}
 
     def destroy(self):
-        """Destroy the thumbnail widget"""
+        """Release the bound widgets back to the pool"""
         try:
-            self.frame.destroy()
+            self.unrealize(self.mainapp.thumbnail_pool)
         except tk.TclError:
             # Widget already destroyed
-            pass
+            self.slot = None
 
     def get_info(self) -> dict:
         """Get thumbnail information"""
-        grid_info = {}
-        try:
-            grid_info = self.grid_info()
-        except tk.TclError:
-            grid_info = {}
+        grid_info = self.grid_info()
             
         return {
             'pagenum': self.pagenum,
@@ -418,6 +391,7 @@ class PageThumbnail:
             'selected': self.is_selected,
             'image_size': self.image.size if self.image else None,
             'thumbnail_size': self.current_thumb_size,
+            'realized': self.is_realized,
             'grid_position': {
                 'row': grid_info.get('row', -1),
                 'column': grid_info.get('column', -1)
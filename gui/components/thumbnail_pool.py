@@ -0,0 +1,112 @@
+"""
+Recycling pool of thumbnail widgets for the virtualized document panel
+"""
+
+import tkinter as tk
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from gui.components.thumbnail import PageThumbnail
+
+
+class ThumbnailSlot:
+    """Widget miniatura riciclabile (frame + immagine + etichetta), legato a una PageThumbnail alla volta"""
+
+    EVENTS = {
+        "<Button-1>": 'on_button_press',
+        "<B1-Motion>": 'on_drag_motion',
+        "<ButtonRelease-1>": 'on_button_release',
+        "<Enter>": 'on_enter',
+        "<Leave>": 'on_leave',
+    }
+
+    def __init__(self, parent: tk.Widget):
+        self.thumbnail: Optional['PageThumbnail'] = None
+
+        self.frame = tk.Frame(parent, bd=2, relief="solid", bg="white")
+        self.frame.grid_rowconfigure(0, weight=1)  # Image row si espande
+        self.frame.grid_rowconfigure(1, weight=0)  # Label row fissa
+        self.frame.grid_columnconfigure(0, weight=1)
+
+        self.img_label = tk.Label(self.frame, bg="white", cursor="hand2")
+        self.img_label.grid(row=0, column=0, padx=2, pady=2, sticky="n")
+
+        self.text_label = tk.Label(self.frame, font=("Arial", 8, "bold"), bg="white")
+        self.text_label.grid(row=1, column=0, pady=(0, 2), sticky="ew")
+
+        # Eventi inoltrati alla PageThumbnail attualmente legata
+        for widget in (self.frame, self.img_label, self.text_label):
+            for sequence, handler in self.EVENTS.items():
+                widget.bind(sequence, lambda e, h=handler: self._dispatch(h, e))
+
+    def _dispatch(self, handler: str, event):
+        if self.thumbnail is not None:
+            return getattr(self.thumbnail, handler)(event)
+
+    def exists(self) -> bool:
+        """False se i widget sono stati distrutti (es. reset workspace)"""
+        try:
+            return bool(self.frame.winfo_exists())
+        except tk.TclError:
+            return False
+
+
+class ThumbnailWidgetPool:
+    """
+    Pool di ThumbnailSlot condiviso da tutti i DocumentGroup.
+    I widget sono figli di un antenato comune (content_frame) e posizionati con
+    place(in_=pages_frame), quindi possono passare da un gruppo all'altro.
+    """
+
+    def __init__(self, parent: tk.Widget):
+        self.parent = parent
+        self._free: List[ThumbnailSlot] = []
+        self.created = 0
+        self.in_use = 0
+
+    def acquire(self, thumbnail: 'PageThumbnail') -> ThumbnailSlot:
+        """Slot libero (riciclato o nuovo) legato alla thumbnail"""
+        slot = None
+        while self._free:
+            candidate = self._free.pop()
+            if candidate.exists():
+                slot = candidate
+                break
+
+        if slot is None:
+            slot = ThumbnailSlot(self.parent)
+            self.created += 1
+
+        slot.thumbnail = thumbnail
+        self.in_use += 1
+        return slot
+
+    def release(self, slot: ThumbnailSlot):
+        """Restituisce lo slot al pool (nascosto, senza immagine)"""
+        slot.thumbnail = None
+        self.in_use = max(0, self.in_use - 1)
+        if not slot.exists():
+            return
+        try:
+            slot.frame.place_forget()
+            slot.img_label.configure(image='', text='')
+        except tk.TclError:
+            return
+        self._free.append(slot)
+
+    def clear(self):
+        """Dimentica gli slot liberi (da chiamare quando il parent viene svuotato)"""
+        for slot in self._free:
+            try:
+                slot.frame.destroy()
+            except tk.TclError:
+                pass
+        self._free.clear()
+
+    def get_stats(self) -> dict:
+        """Statistiche pool widget"""
+        return {
+            'created': self.created,
+            'in_use': self.in_use,
+            'free': len(self._free)
+        }
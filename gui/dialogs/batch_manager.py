@@ -6,7 +6,7 @@ import os
 import json  # ⭐ AGGIUNTO
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog  # ⭐ AGGIUNTO simpledialog
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 import threading
 import subprocess  # ⭐ AGGIUNTO per aprire file esterni
 import platform  # ⭐ AGGIUNTO per rilevare OS
@@ -23,6 +23,11 @@ from batch.batch_exporter import BatchExporter
 class BatchManagerDialog:
     """Dialog gestione batch con scansione ricorsiva e validazione sequenziale"""
     
+    # Righe caricate nella tabella per pagina (altre pagine caricate durante lo scroll)
+    TABLE_PAGE_SIZE = 500
+    # Frazione di scroll oltre la quale viene caricata la pagina successiva
+    TABLE_PREFETCH_THRESHOLD = 0.9
+    
     def __init__(self, parent, config_manager, main_app):
         """
         Inizializza Batch Manager
@@ -43,11 +48,19 @@ class BatchManagerDialog:
         
         # State
         self.current_session_id: Optional[str] = None
-        self.documents: List[Dict] = []
+        self.documents: Dict[int, Dict] = {}  # Righe caricate in tabella (id -> colonne, senza JSON)
+        self.table_last_id: int = 0
+        self.table_complete: bool = True
+        self._table_page_pending: bool = False
         self.current_doc_index: int = 0
-        self.sequential_docs: List[Dict] = []
+        self.sequential_docs: List[int] = []  # Id documenti da validare
+        self.current_doc: Optional[Dict] = None  # Documento completo aperto in validazione
         self.is_scanning: bool = False
         self.is_exporting: bool = False
+        self.export_cancel_event: Optional[threading.Event] = None
+        self._worker_threads: List[threading.Thread] = []  # Scansione/rescan/export in corso
+        self._closing: bool = False
+        self._db_closed: bool = False
         
         # UI Setup
         self.setup_ui()
@@ -61,6 +74,8 @@ class BatchManagerDialog:
         self.dialog.title("Batch Manager - Elaborazione Multipla")
         self.dialog.geometry("1200x750")
         self.dialog.transient(self.parent)
+        self.dialog.protocol("WM_DELETE_WINDOW", self.on_dialog_close)
+        self.dialog.bind("<Destroy>", self.on_dialog_destroy)
         
         # Header
         self.create_header()
@@ -160,6 +175,7 @@ class BatchManagerDialog:
         # Scrollbars
         scrollbar_y = tk.Scrollbar(tree_container, orient="vertical")
         scrollbar_y.pack(side="right", fill="y")
+        self.tree_scrollbar_y = scrollbar_y
         
         scrollbar_x = tk.Scrollbar(tree_container, orient="horizontal")
         scrollbar_x.pack(side="bottom", fill="x")
@@ -170,7 +186,7 @@ class BatchManagerDialog:
             tree_container,
             columns=columns,
             show='headings',
-            yscrollcommand=scrollbar_y.set,
+            yscrollcommand=self.on_tree_yscroll,
             xscrollcommand=scrollbar_x.set,
             selectmode='extended'
         )
@@ -348,63 +364,186 @@ class BatchManagerDialog:
             messagebox.showerror("Errore", "Percorso non valido")
             return
         
+        # Stessa cartella della sessione corrente: proposto il rescan incrementale
+        if self.current_session_id:
+            session_info = self.batch_db.get_session_info(self.current_session_id)
+            if session_info and os.path.normpath(session_info['root_path']) == os.path.normpath(batch_path):
+                response = messagebox.askyesnocancel(
+                    "Aggiorna Sessione",
+                    "La cartella è quella della sessione corrente.\n\n"
+                    "SÌ = Aggiorna la sessione (solo file nuovi, modificati o rimossi)\n"
+                    "NO = Nuova scansione completa\n"
+                    "ANNULLA = Annulla"
+                )
+                if response is None:
+                    return
+                if response:
+                    self.rescan_documents(self.current_session_id, session_info['root_path'])
+                    return
+        
         # Disable scan button during operation
         self.btn_scan.config(state="disabled", text="🔄 Scansione in corso...")
         self.update_status("🔄 Scansione directory in corso...", "blue")
         
         # Run scan in thread to avoid UI freeze
         def scan_thread():
+            session_id = None
             try:
                 # Get scan settings
                 batch_mode = self.config_manager.get('batch_input_mode', 'recursive')
                 max_depth = self.config_manager.get('batch_scan_depth', -1) if batch_mode == 'recursive' else 0
+                scan_workers = self.config_manager.get('batch_scan_workers', 8)
+                
+                # Create batch session
+                output_path = self.config_manager.get('default_output_folder', '')
+                session_id = self.batch_db.create_session(batch_path, output_path)
+                
+                def on_progress(progress):
+                    self.dialog.after(0, lambda p=progress: self.on_scan_progress(p))
                 
-                # Scan directory
-                documents = self.batch_scanner.scan_directory(batch_path, max_depth)
+                # Coppie scritte nel database a blocchi man mano che vengono trovate:
+                # la tabella si riempie durante la scansione
+                total_documents = 0
+                # Indice file aggiornato durante la scansione (rescan incrementali successivi)
+                for chunk in self.batch_scanner.iter_scan_chunks(batch_path, max_depth,
+                                                                 progress_callback=on_progress,
+                                                                 max_workers=scan_workers,
+                                                                 index_db=self.batch_db,
+                                                                 session_id=session_id):
+                    if self._closing:
+                        break  # Dialog in chiusura: thread di lettura fermati dallo scanner
+                    total_documents += self.batch_db.add_documents(session_id, chunk)
+                    self.dialog.after(0, lambda: self.on_scan_chunk(session_id))
                 
-                if not documents:
+                if self._closing:
+                    # Sessione parziale non proposta come ripristinabile
+                    self.batch_db.delete_session(session_id)
+                    return
+                
+                if not total_documents:
+                    self.batch_db.delete_session(session_id)
                     self.dialog.after(0, lambda: messagebox.showwarning(
                         "Attenzione",
                         "Nessun documento PDF/TIFF trovato con JSON corrispondente.\n\n"
                         "Verifica che la cartella contenga coppie documento+JSON."
                     ))
+                    self.dialog.after(0, lambda: self.update_status("⚪ Nessun documento trovato", "black"))
                     self.dialog.after(0, self.enable_scan_button)
                     return
                 
-                # Create batch session
-                output_path = self.config_manager.get('default_output_folder', '')
-                session_id = self.batch_db.create_session(batch_path, output_path)
-                
-                # Add documents to database
-                self.batch_db.add_documents(session_id, documents)
-                
-                # Load documents from database
-                session_docs = self.batch_db.get_session_documents(session_id)
-                
-                # Update UI in main thread
-                self.dialog.after(0, lambda: self.on_scan_completed(session_id, session_docs))
+                # Update UI in main thread (tabella caricata a pagine dal database)
+                self.dialog.after(0, lambda: self.on_scan_completed(session_id, total_documents))
                 
             except Exception as e:
+                error_msg = str(e)
+                if session_id:
+                    # Scansione interrotta: la sessione parziale non va proposta come ripristinabile
+                    self.batch_db.delete_session(session_id)
+                    self.dialog.after(0, lambda: self.on_scan_aborted(session_id))
                 self.dialog.after(0, lambda: messagebox.showerror(
                     "Errore Scansione",
-                    f"Errore durante la scansione:\n\n{str(e)}"
+                    f"Errore durante la scansione:\n\n{error_msg}"
                 ))
                 self.dialog.after(0, self.enable_scan_button)
         
         # Start thread
-        threading.Thread(target=scan_thread, daemon=True).start()
+        self._start_worker(scan_thread)
     
-    def on_scan_completed(self, session_id: str, documents: List[Dict]):
-        """Callback quando scansione completata"""
-        self.current_session_id = session_id
-        self.documents = documents
+    def rescan_documents(self, session_id: str, root_path: str):
+        """Rescan incrementale della cartella della sessione: differenze applicate alla sessione"""
+        self.btn_scan.config(state="disabled", text="🔄 Aggiornamento in corso...")
+        self.update_status("🔄 Aggiornamento sessione in corso...", "blue")
         
-        # Populate table
-        self.populate_table()
+        def rescan_thread():
+            try:
+                batch_mode = self.config_manager.get('batch_input_mode', 'recursive')
+                max_depth = self.config_manager.get('batch_scan_depth', -1) if batch_mode == 'recursive' else 0
+                scan_workers = self.config_manager.get('batch_scan_workers', 8)
+                
+                def on_progress(progress):
+                    self.dialog.after(0, lambda p=progress: self.on_scan_progress(p))
+                
+                diff = self.batch_scanner.rescan(root_path, self.batch_db, session_id, max_depth,
+                                                 progress_callback=on_progress,
+                                                 max_workers=scan_workers)
+                if self._closing:
+                    return  # Differenze non applicate: indice e sessione restano allineati
+                applied = self.batch_db.merge_scan_diff(session_id, diff)
+                self.dialog.after(0, lambda: self.on_rescan_completed(session_id, diff, applied))
+                
+            except Exception as e:
+                error_msg = str(e)
+                self.dialog.after(0, lambda: messagebox.showerror(
+                    "Errore Aggiornamento",
+                    f"Errore durante l'aggiornamento della sessione:\n\n{error_msg}"
+                ))
+                self.dialog.after(0, self.enable_scan_button)
         
-        # Update stats
-        stats = self.batch_db.get_session_statistics(session_id)
-        self.update_stats_display(stats)
+        self._start_worker(rescan_thread)
+    
+    def on_rescan_completed(self, session_id: str, diff, applied: Dict):
+        """Callback rescan incrementale: tabella ricaricata e riepilogo differenze"""
+        self.enable_scan_button()
+        if self.current_session_id == session_id:
+            self.populate_table()
+            self.update_stats_display(self.batch_db.get_session_statistics(session_id))
+        self.enable_action_buttons()
+        
+        scan_stats = self.batch_scanner.get_stats()
+        self.update_status(
+            f"✅ Sessione aggiornata: +{applied['added']} ~{applied['changed']} -{applied['removed']}",
+            "green"
+        )
+        summary = (
+            f"✅ Aggiornamento completato!\n\n"
+            f"Documenti nuovi: {applied['added']}\n"
+            f"Documenti modificati: {applied['changed']}\n"
+            f"Documenti rimossi: {applied['removed']}\n"
+            f"Documenti invariati: {diff.unchanged}\n\n"
+            f"Directory analizzate: {scan_stats['total_dirs']} "
+            f"({scan_stats['dirs_unchanged']} invariate, non rilette)"
+        )
+        if scan_stats['dirs_unreadable']:
+            summary += (
+                f"\n\n⚠️ Directory non leggibili: {scan_stats['dirs_unreadable']}\n"
+                f"(documenti lasciati invariati, verranno rilette al prossimo aggiornamento)"
+            )
+        messagebox.showinfo("Sessione Aggiornata", summary)
+    
+    def on_scan_progress(self, progress: Dict):
+        """Avanzamento scansione in barra stato (directory/file/coppie e velocità)"""
+        self.update_status(
+            f"🔄 Scansione: {progress['total_dirs']} cartelle, {progress['total_files']} file, "
+            f"{progress['pairs_matched']} coppie ({progress['files_per_sec']:.0f} file/s, "
+            f"{progress['pairs_per_sec']:.0f} coppie/s)",
+            "blue"
+        )
+    
+    def on_scan_chunk(self, session_id: str):
+        """Nuovo blocco di documenti nel database durante la scansione: aggiorna tabella e statistiche"""
+        if self.current_session_id != session_id:
+            # Primo blocco: tabella sulla nuova sessione
+            self.current_session_id = session_id
+            self.populate_table()
+        elif self.table_complete:
+            # Tabella già caricata fino in fondo: accoda i nuovi documenti
+            self.table_complete = False
+            self.load_next_table_page()
+        
+        self.update_stats_display(self.batch_db.get_session_statistics(session_id))
+    
+    def on_scan_aborted(self, session_id: str):
+        """Scansione fallita: rimuove dalla tabella la sessione parziale"""
+        if self.current_session_id == session_id:
+            self.current_session_id = None
+            self.populate_table()
+            self.progress_var.set(0)
+            self.stats_label.config(text="Trovati 0 documenti pronti")
+    
+    def on_scan_completed(self, session_id: str, total_documents: int):
+        """Callback quando scansione completata"""
+        # Tabella e statistiche (già popolate durante la scansione)
+        self.on_scan_chunk(session_id)
         
         # Enable buttons
         self.enable_action_buttons()
@@ -423,7 +562,7 @@ class BatchManagerDialog:
         messagebox.showinfo("Scansione Completata", summary)
         
         # Update status
-        self.update_status(f"✅ Trovati {len(documents)} documenti pronti per elaborazione", "green")
+        self.update_status(f"✅ Trovati {total_documents} documenti pronti per elaborazione", "green")
         
         # Re-enable scan button
         self.enable_scan_button()
@@ -439,47 +578,80 @@ class BatchManagerDialog:
         self.btn_export.config(state="normal")
     
     def populate_table(self):
-        """Popola tabella con documenti scansionati"""
+        """Popola tabella con la prima pagina di documenti della sessione (le altre durante lo scroll)"""
         # Clear existing items
         self.tree.delete(*self.tree.get_children())
-        
-        for doc in self.documents:
-            # Status icon
-            status_icons = {
-                'pending': '⏳',
-                'processing': '🔄',
-                'completed': '✅',
-                'error': '❌',
-                'skipped': '⏭️'  # ⭐ AGGIUNTO
-            }
-            status_icon = status_icons.get(doc['status'], '?')
-            
-            # Workflow display
-            workflow_display = {
-                'split_categorie': '📄 Split Cat.',
-                'metadati_semplici': '📋 Metadati'
-            }
-            workflow_text = workflow_display.get(doc['workflow_type'], doc['workflow_type'])
-            
-            # Insert row
-            self.tree.insert('', 'end', iid=str(doc['id']), values=(
-                doc['id'],
-                os.path.basename(doc['doc_path']),
-                os.path.basename(doc['json_path']),
-                doc['relative_path'],
-                workflow_text,
-                f"{status_icon} {doc['status'].title()}"
-            ))
-            
-            # Color coding by status
-            if doc['status'] == 'completed':
-                self.tree.item(str(doc['id']), tags=('completed',))
-            elif doc['status'] == 'error':
-                self.tree.item(str(doc['id']), tags=('error',))
+        self.documents = {}
+        self.table_last_id = 0
+        self.table_complete = self.current_session_id is None
         
         # Configure tags
         self.tree.tag_configure('completed', background='#D5F4E6')
         self.tree.tag_configure('error', background='#FADBD8')
+        
+        self.load_next_table_page()
+    
+    def load_next_table_page(self):
+        """Aggiunge alla tabella la pagina successiva di documenti (query keyset, solo colonne tabella)"""
+        self._table_page_pending = False
+        if self.table_complete or not self.current_session_id:
+            return
+        
+        rows = self.batch_db.get_session_document_page(
+            self.current_session_id, after_id=self.table_last_id, limit=self.TABLE_PAGE_SIZE
+        )
+        if len(rows) < self.TABLE_PAGE_SIZE:
+            self.table_complete = True
+        
+        for doc in rows:
+            self.documents[doc['id']] = doc
+            self.tree.insert('', 'end', iid=str(doc['id']), values=self._get_row_values(doc),
+                             tags=self._get_row_tags(doc['status']))
+        
+        if rows:
+            self.table_last_id = rows[-1]['id']
+    
+    def on_tree_yscroll(self, first, last):
+        """Scroll tabella: aggiorna scrollbar e carica la pagina successiva vicino al fondo"""
+        self.tree_scrollbar_y.set(first, last)
+        if (not self.table_complete and not self._table_page_pending and
+                float(last) >= self.TABLE_PREFETCH_THRESHOLD):
+            # Caricamento fuori dal callback di scroll (l'inserimento lo richiama)
+            self._table_page_pending = True
+            self.dialog.after_idle(self.load_next_table_page)
+    
+    def _get_row_values(self, doc: Dict) -> tuple:
+        """Valori colonne tabella per un documento"""
+        status_icons = {
+            'pending': '⏳',
+            'processing': '🔄',
+            'completed': '✅',
+            'error': '❌',
+            'skipped': '⏭️'  # ⭐ AGGIUNTO
+        }
+        status_icon = status_icons.get(doc['status'], '?')
+        
+        # Workflow display
+        workflow_display = {
+            'split_categorie': '📄 Split Cat.',
+            'metadati_semplici': '📋 Metadati'
+        }
+        workflow_text = workflow_display.get(doc['workflow_type'], doc['workflow_type'])
+        
+        return (
+            doc['id'],
+            os.path.basename(doc['doc_path']),
+            os.path.basename(doc['json_path']),
+            doc['relative_path'],
+            workflow_text,
+            f"{status_icon} {doc['status'].title()}"
+        )
+    
+    def _get_row_tags(self, status: str) -> tuple:
+        """Tag colore riga per stato"""
+        if status in ('completed', 'error'):
+            return (status,)
+        return ()
     
     # ⬇️ CONTINUA DA QUI ⬇️
     
@@ -516,18 +688,18 @@ class BatchManagerDialog:
     
     def load_all_documents(self):
         """Carica tutti i documenti in memoria (pre-validazione)"""
-        if not self.documents:
+        if not self.current_session_id:
             return
         
-        pending_docs = [d for d in self.documents if d['status'] == 'pending']
+        pending_count = self.batch_db.get_session_statistics(self.current_session_id)['pending']
         
-        if not pending_docs:
+        if not pending_count:
             messagebox.showinfo("Info", "Tutti i documenti sono già stati processati")
             return
         
         response = messagebox.askyesno(
             "Conferma Caricamento",
-            f"Caricare tutti i {len(pending_docs)} documenti pending in memoria?\n\n"
+            f"Caricare tutti i {pending_count} documenti pending in memoria?\n\n"
             "Questa operazione potrebbe richiedere molto tempo\n"
             "per grandi quantità di documenti."
         )
@@ -537,12 +709,16 @@ class BatchManagerDialog:
         
         self.update_status("📂 Caricamento documenti in corso...", "blue")
         # Implementation would pre-load documents here
-        messagebox.showinfo("Info", f"{len(pending_docs)} documenti caricati e pronti per validazione")
+        messagebox.showinfo("Info", f"{pending_count} documenti caricati e pronti per validazione")
         self.update_status("✅ Documenti caricati - Pronti per validazione", "green")
     
     def start_sequential_validation(self):
         """Avvia validazione sequenziale documenti"""
-        pending_docs = [d for d in self.documents if d['status'] == 'pending']
+        if not self.current_session_id:
+            return
+        
+        # Solo gli id: ogni documento viene letto completo quando aperto
+        pending_docs = self.batch_db.get_session_document_ids(self.current_session_id, status='pending')
         
         if not pending_docs:
             messagebox.showinfo("Info", "Tutti i documenti sono stati processati")
@@ -574,7 +750,13 @@ class BatchManagerDialog:
             self.update_status("✅ Validazione sequenziale completata", "green")
             return
         
-        doc = self.sequential_docs[self.current_doc_index]
+        doc = self.batch_db.get_document(self.sequential_docs[self.current_doc_index])
+        if doc is None:
+            # Documento rimosso dalla sessione: passa al successivo
+            self.current_doc_index += 1
+            self.open_next_document()
+            return
+        self.current_doc = doc
         
         try:
             # ⭐ NUOVO: Aggiorna titolo con progresso
@@ -614,7 +796,7 @@ class BatchManagerDialog:
         nav_dialog.transient(self.dialog)
         # ⭐ RIMOSSO topmost - permette di lavorare sul main window
         
-        current_doc = self.sequential_docs[self.current_doc_index]
+        current_doc = self.current_doc
         total_docs = len(self.sequential_docs)
         
         # Info documento corrente
@@ -760,7 +942,7 @@ class BatchManagerDialog:
         main_frame.pack(fill="both", expand=True)
         
         # Info documento corrente
-        current_doc = self.sequential_docs[self.current_doc_index]
+        current_doc = self.current_doc
         total_docs = len(self.sequential_docs)
         
         info_label = tk.Label(
@@ -839,7 +1021,7 @@ class BatchManagerDialog:
     
     def toolbar_complete(self):
         """Completa documento corrente e passa al successivo"""
-        current_doc = self.sequential_docs[self.current_doc_index]
+        current_doc = self.current_doc
         self.batch_db.update_document_status(current_doc['id'], 'completed')
         self.refresh_document_in_table(current_doc['id'], 'completed')
         self.current_doc_index += 1
@@ -847,7 +1029,7 @@ class BatchManagerDialog:
     
     def toolbar_skip(self):
         """Salta documento corrente"""
-        current_doc = self.sequential_docs[self.current_doc_index]
+        current_doc = self.current_doc
         self.batch_db.update_document_status(current_doc['id'], 'skipped')  # ⭐ CAMBIATO
         self.refresh_document_in_table(current_doc['id'], 'skipped')  # ⭐ CAMBIATO
         self.current_doc_index += 1
@@ -871,7 +1053,7 @@ class BatchManagerDialog:
         
         def save_error():
             error_msg = error_var.get().strip() or "Errore generico"
-            current_doc = self.sequential_docs[self.current_doc_index]
+            current_doc = self.current_doc
             self.batch_db.update_document_status(current_doc['id'], 'error', error_msg)
             self.refresh_document_in_table(current_doc['id'], 'error')
             self.current_doc_index += 1
@@ -937,9 +1119,9 @@ class BatchManagerDialog:
         selected_docs = []
         for item_id in selected_items:
             doc_id = int(item_id)
-            doc = next((d for d in self.documents if d['id'] == doc_id), None)
+            doc = self.documents.get(doc_id)
             if doc and doc['status'] == 'pending':
-                selected_docs.append(doc)
+                selected_docs.append(doc_id)
         
         if not selected_docs:
             messagebox.showinfo("Info", "Nessun documento pending selezionato")
@@ -957,36 +1139,15 @@ class BatchManagerDialog:
     
     def refresh_document_in_table(self, doc_id: int, new_status: str):
         """Aggiorna stato documento nella tabella"""
-        # Find document in list
-        for i, doc in enumerate(self.documents):
-            if doc['id'] == doc_id:
-                self.documents[i]['status'] = new_status
-                break
-        
-        # Update treeview item
-        item_id = str(doc_id)
-        if self.tree.exists(item_id):
-            status_icons = {
-                'pending': '⏳',
-                'processing': '🔄',
-                'completed': '✅',
-                'error': '❌',
-                'skipped': '⏭️'  # ⭐ AGGIUNTO
-            }
-            status_icon = status_icons.get(new_status, '?')
+        # Solo righe già caricate: le pagine successive leggono lo stato dal database
+        doc = self.documents.get(doc_id)
+        if doc is not None:
+            doc['status'] = new_status
             
-            # Get current values
-            values = list(self.tree.item(item_id, 'values'))
-            # Update status column (index 5)
-            values[5] = f"{status_icon} {new_status.title()}"
-            self.tree.item(item_id, values=values)
-            
-            # Update tag
-            self.tree.item(item_id, tags=())
-            if new_status == 'completed':
-                self.tree.item(item_id, tags=('completed',))
-            elif new_status == 'error':
-                self.tree.item(item_id, tags=('error',))
+            item_id = str(doc_id)
+            if self.tree.exists(item_id):
+                self.tree.item(item_id, values=self._get_row_values(doc),
+                               tags=self._get_row_tags(new_status))
         
         # Update stats
         if self.current_session_id:
@@ -1003,10 +1164,11 @@ class BatchManagerDialog:
             messagebox.showwarning("Attenzione", "Nessuna sessione batch attiva")
             return
         
-        # Check for completed documents
-        completed_docs = [d for d in self.documents if d['status'] == 'completed']
+        # Check for completed documents (contatori sessione, documenti letti nel thread export)
+        stats = self.batch_db.get_session_statistics(self.current_session_id)
+        completed_count = stats['completed']
         
-        if not completed_docs:
+        if not completed_count:
             messagebox.showwarning(
                 "Attenzione",
                 "Nessun documento completato da esportare.\n\n"
@@ -1015,9 +1177,9 @@ class BatchManagerDialog:
             return
         
         # Confirm export
-        pending_count = len([d for d in self.documents if d['status'] == 'pending'])
+        pending_count = stats['pending']
         
-        msg = f"Esportare {len(completed_docs)} documenti completati?"
+        msg = f"Esportare {completed_count} documenti completati?"
         if pending_count > 0:
             msg += f"\n\n⚠️ Attenzione: {pending_count} documenti ancora pending non verranno esportati."
         
@@ -1038,43 +1200,54 @@ class BatchManagerDialog:
             )
             return
         
-        # Disable export button during operation
-        self.btn_export.config(state="disabled", text="⏳ Export in corso...")
+        # Export button becomes cancel button during operation
+        self.is_exporting = True
+        self.export_cancel_event = threading.Event()
+        self.btn_export.config(text="⛔ Annulla Export", command=self.cancel_export_batch)
         self.update_status("💾 Export batch in corso...", "blue")
         
         # Run export in thread
         def export_thread():
             try:
+                completed_docs = self.batch_db.get_session_documents(
+                    self.current_session_id, status='completed'
+                )
                 total = len(completed_docs)
-                exported_count = 0
                 
-                for doc in completed_docs:
-                    # Update progress
-                    progress = (exported_count / total) * 100
-                    self.dialog.after(0, lambda p=progress: self.progress_var.set(p))
-                    
-                    status_msg = f"💾 Esportazione {exported_count + 1}/{total}: {os.path.basename(doc['doc_path'])}"
-                    self.dialog.after(0, lambda m=status_msg: self.update_status(m, "blue"))
-                    
-                    try:
-                        # Export document
-                        exported_files = self.batch_exporter.export_document(
-                            doc, base_output
-                        )
-                        
-                        # Update database with exported files
+                # Unico writer verso il database: i risultati dei worker arrivano qui
+                def on_result(doc_id, exported_files, error):
+                    if error:
                         self.batch_db.update_document_status(
-                            doc['id'], 'completed', exported_files=exported_files
+                            doc_id, 'error', error=f"Export failed: {error}"
                         )
-                        
-                        exported_count += 1
-                        
-                    except Exception as e:
-                        print(f"[ERROR] Export failed for {doc['doc_path']}: {e}")
+                    else:
                         self.batch_db.update_document_status(
-                            doc['id'], 'error', error=f"Export failed: {str(e)}"
+                            doc_id, 'completed', exported_files=exported_files
                         )
                 
+                def on_progress(done, total, per_worker):
+                    progress = (done / total) * 100
+                    workers_text = "/".join(str(n) for n in per_worker.values())
+                    status_msg = f"💾 Esportazione {done}/{total} (worker: {workers_text})"
+                    self.dialog.after(0, lambda p=progress: self.progress_var.set(p))
+                    self.dialog.after(0, lambda m=status_msg: self.update_status(m, "blue"))
+                
+                # Stati documento scritti a gruppi (una transazione ogni N risultati o ~1 s)
+                with self.batch_db.batched_updates():
+                    summary = self.batch_exporter.export_documents_parallel(
+                        completed_docs, base_output,
+                        result_callback=on_result,
+                        progress_callback=on_progress,
+                        cancel_event=self.export_cancel_event
+                    )
+                exported_count = summary['exported']
+                
+                if summary['cancelled']:
+                    status_msg = f"⛔ Export annullato - {exported_count}/{total} documenti esportati"
+                    self.dialog.after(0, lambda m=status_msg: self.update_status(m, "orange"))
+                    self.dialog.after(0, self.enable_export_button)
+                    return
+                
                 # Generate CSV
                 self.dialog.after(0, lambda: self.update_status("📄 Generazione CSV...", "blue"))
                 
@@ -1103,7 +1276,55 @@ class BatchManagerDialog:
                 self.dialog.after(0, self.enable_export_button)
         
         # Start thread
-        threading.Thread(target=export_thread, daemon=True).start()
+        self._start_worker(export_thread)
+    
+    def _start_worker(self, target: Callable):
+        """Avvia un thread di lavoro (scansione, rescan, export), atteso alla chiusura del dialog"""
+        self._worker_threads = [thread for thread in self._worker_threads if thread.is_alive()]
+        thread = threading.Thread(target=target, daemon=True)
+        self._worker_threads.append(thread)
+        thread.start()
+    
+    def on_dialog_close(self):
+        """Chiusura dialog: ferma scansione/export in corso, chiude il database e poi la finestra"""
+        if self._closing:
+            return
+        self._closing = True
+        if self.export_cancel_event:
+            self.export_cancel_event.set()
+        self.close_toolbar()
+        self.dialog.withdraw()
+        self._close_when_idle(self.dialog, self.dialog.destroy)
+    
+    def on_dialog_destroy(self, event):
+        """Dialog distrutto senza on_dialog_close (es. chiusura finestra principale)"""
+        if event.widget is not self.dialog or self._db_closed:
+            return
+        self._closing = True
+        if self.export_cancel_event:
+            self.export_cancel_event.set()
+        self._close_when_idle(self.parent)
+    
+    def _close_when_idle(self, widget, on_closed: Optional[Callable] = None):
+        """Chiude il database quando i thread di lavoro sono terminati (controllo periodico, UI libera)"""
+        if any(thread.is_alive() for thread in self._worker_threads):
+            try:
+                widget.after(100, lambda: self._close_when_idle(widget, on_closed))
+                return
+            except tk.TclError:
+                pass  # Applicazione in chiusura: i thread daemon terminano con il processo
+        if not self._db_closed:
+            self._db_closed = True
+            self.batch_db.close()
+        if on_closed:
+            on_closed()
+    
+    def cancel_export_batch(self):
+        """Annulla export batch in corso (i documenti già avviati vengono completati)"""
+        if self.is_exporting and self.export_cancel_event:
+            self.export_cancel_event.set()
+            self.btn_export.config(state="disabled", text="⏳ Annullamento...")
+            self.update_status("⛔ Annullamento export in corso...", "orange")
     
     def on_export_completed(self, exported_count: int, csv_count: int, output_path: str):
         """Callback quando export completato"""
@@ -1122,7 +1343,6 @@ class BatchManagerDialog:
         self.progress_var.set(100)
         
         # Reload documents to show exported files
-        self.documents = self.batch_db.get_session_documents(self.current_session_id)
         self.populate_table()
         
         # Ask to reset
@@ -1131,7 +1351,8 @@ class BatchManagerDialog:
     
     def enable_export_button(self):
         """Riabilita pulsante export"""
-        self.btn_export.config(state="normal", text="💾 Export Batch")
+        self.is_exporting = False
+        self.btn_export.config(state="normal", text="💾 Export Batch", command=self.export_batch)
     
     # ==========================================
     # UTILITY METHODS
@@ -1155,12 +1376,12 @@ class BatchManagerDialog:
         
         # Reset UI
         self.current_session_id = None
-        self.documents = []
         self.sequential_docs = []
+        self.current_doc = None
         self.current_doc_index = 0
         
         # Clear table
-        self.tree.delete(*self.tree.get_children())
+        self.populate_table()
         
         # Reset progress
         self.progress_var.set(0)
@@ -1181,7 +1402,7 @@ class BatchManagerDialog:
             return
         
         doc_id = int(selected_items[0])
-        doc = next((d for d in self.documents if d['id'] == doc_id), None)
+        doc = self.batch_db.get_document(doc_id)
         
         if not doc:
             return
@@ -1204,7 +1425,7 @@ class BatchManagerDialog:
             self.tree.selection_set(item)
             
             doc_id = int(item)
-            doc = next((d for d in self.documents if d['id'] == doc_id), None)
+            doc = self.documents.get(doc_id)
             
             if not doc:
                 return
@@ -1257,7 +1478,7 @@ class BatchManagerDialog:
             
             menu.add_command(
                 label="ℹ️ Dettagli Documento",
-                command=lambda: self.show_document_details(doc)
+                command=lambda: self.show_document_details(doc_id)
             )
             
             try:
@@ -1279,7 +1500,7 @@ class BatchManagerDialog:
             
     def open_document_by_id(self, doc_id: int):
         """Apri documento per ID"""
-        doc = next((d for d in self.documents if d['id'] == doc_id), None)
+        doc = self.batch_db.get_document(doc_id)
         if doc:
             try:
                 self.main_app.load_document_from_batch(doc)
@@ -1312,7 +1533,7 @@ class BatchManagerDialog:
         
     def revalidate_document(self, doc_id: int):
         """Ri-valida singolo documento (anche se già completato)"""
-        doc = next((d for d in self.documents if d['id'] == doc_id), None)
+        doc = self.batch_db.get_document(doc_id)
         if not doc:
             return
         
@@ -1328,7 +1549,8 @@ class BatchManagerDialog:
             self.main_app.load_document_from_batch(doc)
             
             # Crea toolbar per singolo documento
-            self.sequential_docs = [doc]
+            self.sequential_docs = [doc_id]
+            self.current_doc = doc
             self.current_doc_index = 0
             self.create_batch_toolbar()
             
@@ -1339,8 +1561,12 @@ class BatchManagerDialog:
             )
             self.dialog.withdraw()
     
-    def show_document_details(self, doc: Dict):
-        """Mostra dettagli documento in dialog"""
+    def show_document_details(self, doc_id: int):
+        """Mostra dettagli documento in dialog (JSON letto dal database solo qui)"""
+        doc = self.batch_db.get_document(doc_id)
+        if not doc:
+            return
+        
         details_dialog = tk.Toplevel(self.dialog)
         details_dialog.title("Dettagli Documento")
         details_dialog.geometry("600x500")
@@ -1357,12 +1583,16 @@ class BatchManagerDialog:
         text.pack(side="left", fill="both", expand=True)
         scrollbar.config(command=text.yview)
         
+        # Pagine contate alla prima apertura dei dettagli (poi lette dall'indice file)
+        page_count = self.batch_scanner.get_page_count(doc['doc_path'], self.batch_db, doc.get('session_id'))
+        
         # Format details
         details = f"""DETTAGLI DOCUMENTO
 
 ID: {doc['id']}
 Stato: {doc['status']}
 Workflow: {doc['workflow_type']}
+Pagine: {page_count if page_count is not None else 'n/d'}
 
 FILE:
   PDF/TIFF: {doc['doc_path']}
@@ -1433,23 +1663,21 @@ METADATA JSON:
         """Ripristina sessione batch precedente"""
         session_id = session_info['session_id']
         
-        # Load session documents
-        documents = self.batch_db.get_session_documents(session_id)
+        # Session counters (documenti caricati a pagine nella tabella)
+        stats = self.batch_db.get_session_statistics(session_id)
         
-        if not documents:
+        if not stats['total']:
             messagebox.showwarning("Attenzione", "Sessione vuota, impossibile ripristinare")
             return
         
         # Restore state
         self.current_session_id = session_id
-        self.documents = documents
         self.batch_path_var.set(session_info['root_path'])
         
         # Populate table
         self.populate_table()
         
         # Update stats
-        stats = self.batch_db.get_session_statistics(session_id)
         self.update_stats_display(stats)
         
         # Enable buttons
@@ -1467,4 +1695,4 @@ METADATA JSON:
             f"Puoi continuare la validazione o esportare."
         )
         
-        self.update_status(f"🔄 Sessione ripristinata - {len(documents)} documenti", "blue")
\ No newline at end of file
+        self.update_status(f"🔄 Sessione ripristinata - {stats['total']} documenti", "blue")
\ No newline at end of file
@@ -554,6 +554,30 @@ class SettingsDialog:
         ttk.Checkbutton(frame, text="Abilita Batch Manager (elaborazione multipla documenti)",
                        variable=self.batch_enabled_var).pack(anchor="w", padx=20, pady=10)
         
+        # Processi export paralleli
+        workers_frame = tk.Frame(frame)
+        workers_frame.pack(fill="x", padx=20, pady=5)
+        
+        tk.Label(workers_frame, text="Processi export paralleli:").pack(side="left")
+        self.batch_workers_var = tk.IntVar(
+            value=self.config_manager.config_data.get('batch_export_workers', 0))
+        tk.Spinbox(workers_frame, from_=0, to=32, textvariable=self.batch_workers_var,
+                  width=5).pack(side="left", padx=5)
+        tk.Label(workers_frame, text="(0 = automatico, 1 = sequenziale)",
+                font=("Arial", 8), fg="gray").pack(side="left")
+        
+        # Thread scansione cartelle
+        scan_workers_frame = tk.Frame(frame)
+        scan_workers_frame.pack(fill="x", padx=20, pady=5)
+        
+        tk.Label(scan_workers_frame, text="Thread scansione cartelle:").pack(side="left")
+        self.batch_scan_workers_var = tk.IntVar(
+            value=self.config_manager.config_data.get('batch_scan_workers', 8))
+        tk.Spinbox(scan_workers_frame, from_=1, to=64, textvariable=self.batch_scan_workers_var,
+                  width=5).pack(side="left", padx=5)
+        tk.Label(scan_workers_frame, text="(1 = sequenziale, valori alti per cartelle di rete)",
+                font=("Arial", 8), fg="gray").pack(side="left")
+        
         # Info
         info_frame = tk.LabelFrame(frame, text="Informazioni Batch", padx=10, pady=10)
         info_frame.pack(fill="x", padx=20, pady=20)
@@ -887,6 +911,10 @@ Workflow supportati:
             # Batch
             if hasattr(self, 'batch_enabled_var'):
                 self.config_manager.config_data["batch_mode_enabled"] = self.batch_enabled_var.get()
+            if hasattr(self, 'batch_workers_var'):
+                self.config_manager.config_data["batch_export_workers"] = self.batch_workers_var.get()
+            if hasattr(self, 'batch_scan_workers_var'):
+                self.config_manager.config_data["batch_scan_workers"] = self.batch_scan_workers_var.get()
 
             # Advanced
             if hasattr(self, 'split_by_category_var'):
@@ -17,13 +17,16 @@ from .workflow_manager import WorkflowManager, WorkflowMode, InterfaceState
 # Internal imports
 from config import ConfigManager, DB_FILE
 from database import CategoryDatabase
-from loaders import create_document_loader
+from loaders import (create_document_loader, configure_thumbnail_cache, configure_page_cache,
+                     configure_handle_pool, PagePrefetcher,
+                     ThumbnailRenderService, get_default_render_workers,
+                     TILE_SIZE, create_tile_source, get_tile_grid)
+from loaders.document_loaders import MemoryAwareLRUCache
 from export import ExportManager
 from gui.dialogs import CategorySelectionDialog, SettingsDialog
 from gui.dialogs.batch_manager import BatchManagerDialog
-from gui.components import DocumentGroup, PageThumbnail
+from gui.components import DocumentGroup, PageThumbnail, ThumbnailWidgetPool
 from utils import create_progress_dialog, show_help_dialog, show_about_dialog
-from config.constants import RESAMPLEFILTER
 from utils.branding import set_app_icon
 
 class AIDOXAApp(tk.Tk):
@@ -35,6 +38,21 @@ class AIDOXAApp(tk.Tk):
         # Initialize core components
         self.config_manager = ConfigManager()
         self.category_db = CategoryDatabase(DB_FILE)
+        configure_thumbnail_cache(
+            enabled=self.config_manager.get('thumbnail_disk_cache', True),
+            max_size_mb=self.config_manager.get('thumbnail_cache_max_mb', 256)
+        )
+        configure_page_cache(
+            self.config_manager.get('page_cache_max_mb', 512),
+            self.config_manager.get('page_cache_admit_max_fraction', 0.25) or None
+        )
+        configure_handle_pool(self.config_manager.get('max_open_documents', 32))
+        # Rendering miniature in thread worker (risultati consegnati al thread Tk)
+        self.thumbnail_renderer = ThumbnailRenderService(
+            workers=self.config_manager.get('thumbnail_render_workers', 0) or get_default_render_workers()
+        )
+        # Prefetch pagine vicine / sotto il mouse per il viewer centrale
+        self.page_prefetcher = PagePrefetcher()
         
         # 🆕 Initialize category database for dynamic management
         self.initialize_category_database_if_needed()
@@ -50,6 +68,7 @@ class AIDOXAApp(tk.Tk):
         self.setup_ui()
         self.bind_events()
         self._closing = False
+        self.after(50, self.process_thumbnail_results)
                     
         # Restore window layout
         self.after(200, self.restore_window_layout)
@@ -103,6 +122,7 @@ class AIDOXAApp(tk.Tk):
         # Selection state
         self.selected_thumbnail: Optional[PageThumbnail] = None
         self.selected_group: Optional[DocumentGroup] = None
+        self._pinned_page_cache = None  # Cache pagine del documento selezionato (protetta da eviction)
         
         # Drag and drop state
         self.dragging = False
@@ -111,6 +131,12 @@ class AIDOXAApp(tk.Tk):
         
         # Image display state
         self.current_image: Optional[Image.Image] = None
+        self.tile_source = None      # Sorgente tile della pagina visualizzata
+        self.tile_cache = MemoryAwareLRUCache(
+            max_items=512, max_memory_mb=self.config_manager.get('viewer_tile_cache_mb', 96))
+        self._tile_items = {}        # (tx, ty) -> (canvas item, PhotoImage)
+        self._tile_layout = None     # (zoom, display_w, display_h, pad_x, pad_y)
+        self._tile_render_pending = False
         self.zoom_factor = 1.0
         self.image_offset_x = 0
         self.image_offset_y = 0
@@ -458,46 +484,25 @@ class AIDOXAApp(tk.Tk):
         self.vscrollbar = tk.Scrollbar(self.scrollframe, orient=tk.VERTICAL)
         self.vscrollbar.pack(side="right", fill="y")
 
-        self.canvas = tk.Canvas(self.scrollframe, yscrollcommand=self.vscrollbar.set, bg="white")
+        # Ogni cambio di vista (scroll, resize, nuovo contenuto) aggiorna le celle visibili
+        def on_canvas_yscroll(first, last):
+            self.vscrollbar.set(first, last)
+            self.schedule_visible_thumbnails_update()
+
+        self.canvas = tk.Canvas(self.scrollframe, yscrollcommand=on_canvas_yscroll, bg="white")
         self.canvas.pack(side="left", fill="both", expand=True)
 
         self.vscrollbar.config(command=self.canvas.yview)
 
         self.content_frame = tk.Frame(self.canvas, bg="white")
         self.canvas_window = self.canvas.create_window((0, 0), window=self.content_frame, anchor="nw")
+
+        # Widget miniature riciclati tra tutti i gruppi (solo righe visibili)
+        self.thumbnail_pool = ThumbnailWidgetPool(self.content_frame)
+        self._visible_update_pending = False
         
-        # ✅ CRITICO: Ridimensiona content_frame con canvas
-        def on_canvas_configure(event):
-            canvas_width = event.width
-            print(f"[CANVAS] Canvas resized to: {canvas_width}px")  # ✅ DEBUG
-            self.canvas.itemconfig(self.canvas_window, width=canvas_width)
-            # Trigger reflow dopo resize
-            if hasattr(self, 'trigger_all_groups_reflow'):
-                if hasattr(self, '_canvas_resize_timer'):
-                    self.after_cancel(self._canvas_resize_timer)
-                self._canvas_resize_timer = self.after(300, self.trigger_all_groups_reflow)
-        
-        self.canvas.bind('<Configure>', on_canvas_configure)
-        
-        # ✅ CRITICO: Ridimensiona content_frame con canvas
-        def resize_content_frame(event):
-            # Imposta larghezza content_frame = larghezza canvas
-            canvas_width = event.width
-            self.canvas.itemconfig(canvas_window, width=canvas_width)
-        
-        self.canvas.bind('<Configure>', resize_content_frame, add='+')
-
-        # ✅ NUOVO: Bind canvas resize per trigger reflow
+        # ✅ Un solo handler resize: larghezza content_frame + reflow debounced
         self.canvas.bind('<Configure>', self.on_canvas_resize_trigger_reflow)
-    
-    def on_canvas_resize_trigger_reflow(self, event):
-        """Trigger reflow quando canvas cambia dimensione"""
-        if event.widget == self.canvas:
-            # Cancella timer precedente
-            if hasattr(self, '_canvas_resize_timer'):
-                self.after_cancel(self._canvas_resize_timer)
-            # Schedule reflow dopo 200ms
-            self._canvas_resize_timer = self.after(200, self.trigger_all_groups_reflow)
         
         # Mouse wheel scrolling - MIGLIORATO con caricamento thumbnail
         def on_mousewheel(event):
@@ -537,6 +542,18 @@ class AIDOXAApp(tk.Tk):
         self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
         self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
 
+    def on_canvas_resize_trigger_reflow(self, event):
+        """Adatta content_frame alla larghezza del canvas e pianifica il reflow"""
+        if event.widget == self.canvas:
+            self.canvas.itemconfig(self.canvas_window, width=event.width)
+            self.schedule_groups_reflow()
+
+    def schedule_groups_reflow(self, delay: int = 200):
+        """Unico reflow debounced per tutti i gruppi (resize canvas, sash, colonne cambiate)"""
+        if getattr(self, '_reflow_timer', None):
+            self.after_cancel(self._reflow_timer)
+        self._reflow_timer = self.after(delay, self.trigger_all_groups_reflow)
+
     def setup_center_panel(self):
         """Setup center panel for image display"""
         # Frame contenitore con scrollbar
@@ -549,10 +566,18 @@ class AIDOXAApp(tk.Tk):
         self.yscrollbar = tk.Scrollbar(self.image_frame, orient=tk.VERTICAL)
         self.yscrollbar.pack(side="right", fill="y")
 
-        # Canvas con scroll
+        # Canvas con scroll: ogni cambio di vista (scroll, pan, resize) rende i tile visibili
+        def on_image_xscroll(first, last):
+            self.xscrollbar.set(first, last)
+            self.schedule_tile_render()
+
+        def on_image_yscroll(first, last):
+            self.yscrollbar.set(first, last)
+            self.schedule_tile_render()
+
         self.image_canvas = tk.Canvas(
             self.image_frame, bg="black", cursor="cross",
-            xscrollcommand=self.xscrollbar.set, yscrollcommand=self.yscrollbar.set
+            xscrollcommand=on_image_xscroll, yscrollcommand=on_image_yscroll
         )
         self.image_canvas.pack(side="left", fill="both", expand=True)
 
@@ -937,34 +962,12 @@ class AIDOXAApp(tk.Tk):
     
     def on_paned_sash_release(self, event):
         """Handle PanedWindow sash release - trigger thumbnail reflow"""
-        self.after(50, self.trigger_all_groups_reflow)
+        self.schedule_groups_reflow(50)
     
     def on_paned_sash_drag(self, event):
         """Handle PanedWindow sash drag - live reflow (opzionale)"""
-        # Cancella timer precedente per evitare troppi reflow
-        if hasattr(self, '_reflow_timer'):
-            self.after_cancel(self._reflow_timer)
-        # Schedule reflow dopo 100ms
-        self._reflow_timer = self.after(100, self.trigger_all_groups_reflow)
+        self.schedule_groups_reflow(100)
     
-    def trigger_all_groups_reflow(self):
-        """Trigger reflow su tutti i document groups"""
-        if not hasattr(self, 'documentgroups'):
-            return
-        
-        for group in self.documentgroups:
-            try:
-                # Forza ricalcolo layout
-                frame_width = group.pages_frame.winfo_width()
-                if frame_width > 10:
-                    new_per_row = group.calculate_optimal_thumbnails_per_row()
-                    if new_per_row != group.thumbnails_per_row:
-                        group.thumbnails_per_row = new_per_row
-                        group.repack_thumbnails_grid()
-                        self.debug_print(f"Reflow triggered: {new_per_row} per row (width: {frame_width}px)")
-            except Exception as e:
-                self.debug_print(f"Error in group reflow: {e}")
-
     # Event handlers
     def on_canvas_enter(self, event):
         """Handle mouse enter on image canvas"""
@@ -1033,6 +1036,8 @@ class AIDOXAApp(tk.Tk):
     def on_closing(self):
         """Handle application closing"""
         self._closing = True  # ✅ AGGIUNGI QUESTA RIGA
+        self.thumbnail_renderer.shutdown()
+        self.page_prefetcher.shutdown()
         self.debug_print("Application closing, saving configuration...")
         if self.config_manager.get('auto_save_changes', True):
             self.save_config()
@@ -1123,38 +1128,54 @@ class AIDOXAApp(tk.Tk):
             # Original reflow logic for normal mode only
             for group in self.document_groups:
                 try:
-                    frame_width = group.pages_frame.winfo_width()
-                    if frame_width > 10:
-                        new_per_row = group.calculate_optimal_thumbnails_per_row()
-                        if new_per_row != group.thumbnails_per_row:
-                            group.thumbnails_per_row = new_per_row
-                            group.last_calculated_width = frame_width
-                            group.repack_thumbnails_grid()
-                            self.debug_print(f"Reflow triggered: {new_per_row} per row, width: {frame_width}px")
+                    if group.reflow():
+                        self.debug_print(f"Reflow triggered: {group.thumbnails_per_row} per row, "
+                                         f"width: {group.last_calculated_width}px")
                 except Exception as e:
                     self.debug_print(f"Error in group reflow: {e}")
         except Exception as e:
             self.debug_print(f"Error in check_groups_reflow_needed: {e}")
 
     
+    def schedule_visible_thumbnails_update(self):
+        """Aggiorna le celle visibili al prossimo idle (più richieste nello stesso ciclo = una)"""
+        if self._visible_update_pending or getattr(self, '_closing', False):
+            return
+        self._visible_update_pending = True
+        self.after_idle(self.update_visible_thumbnails)
+
+    def update_visible_thumbnails(self):
+        """Lega i widget del pool alle sole miniature nel viewport del pannello documenti"""
+        self._visible_update_pending = False
+        if not hasattr(self, 'documentgroups'):
+            return
+        
+        try:
+            view_top = self.canvas.winfo_rooty()
+            view_bottom = view_top + self.canvas.winfo_height()
+        except tk.TclError:
+            return
+        
+        for group in self.documentgroups:
+            try:
+                group.update_visible_cells(view_top, view_bottom)
+            except tk.TclError as e:
+                self.debug_print(f"Error updating visible thumbnails: {e}")
+
     def trigger_all_groups_reflow(self):
         """Trigger reflow su tutti i document groups"""
+        self._reflow_timer = None
         if not hasattr(self, 'documentgroups'):
             return
         
         for group in self.documentgroups:
             try:
-                # Forza ricalcolo layout
-                frame_width = group.pages_frame.winfo_width()
-                if frame_width > 10:
-                    new_per_row = group.calculate_optimal_thumbnails_per_row()
-                    if new_per_row != group.thumbnails_per_row:
-                        group.thumbnails_per_row = new_per_row
-                        group.last_calculated_width = frame_width
-                        group.repack_thumbnails_grid()
-                        self.debug_print(f"Reflow triggered: {new_per_row} per row (width: {frame_width}px)")
+                if group.reflow():
+                    self.debug_print(f"Reflow triggered: {group.thumbnails_per_row} per row "
+                                     f"(width: {group.last_calculated_width}px)")
             except Exception as e:
                 self.debug_print(f"Error in group reflow: {e}")
+        self.schedule_visible_thumbnails_update()
         
     # Menu handlers
     def open_settings(self):
@@ -1206,7 +1227,6 @@ class AIDOXAApp(tk.Tk):
         
         for group in self.documentgroups:
             group.refresh_thumbnail_sizes()
-            self.after_idle(lambda g=group: g.repack_thumbnails_grid())
 
     def refresh_document_headers(self):
         """Refresh all document headers with new font settings"""
@@ -1567,8 +1587,7 @@ class AIDOXAApp(tk.Tk):
                 group.doc_metadata = self.document_metadata_cache.get(doc_index, {})
                 
                 # Aggiungi pagine SOLO come placeholder (NO caricamento immagini)
-                for page_num in range(1, min(documentloader.totalpages + 1, 51)):
-                    group.add_page_lazy(page_num, documentloader)
+                group.add_pages_lazy(range(1, min(documentloader.totalpages + 1, 51)), documentloader)
                 
                 group.pack(pady=5, fill='both', expand=False, padx=5)
                 self.documentgroups.append(group)
@@ -2087,8 +2106,7 @@ class AIDOXAApp(tk.Tk):
                 group.doc_metadata = doc_data['metadata']
                 
                 # Aggiungi pagine con placeholder
-                for page_num in range(1, min(doc_data['loader'].totalpages + 1, 51)):
-                    group.add_page_lazy(page_num, doc_data['loader'])
+                group.add_pages_lazy(range(1, min(doc_data['loader'].totalpages + 1, 51)), doc_data['loader'])
                 
                 group.pack(pady=5, fill='both', expand=False, padx=5)
                 self.documentgroups.append(group)
@@ -2116,81 +2134,6 @@ class AIDOXAApp(tk.Tk):
         # Avvia caricamento thumbnail visibili
         self.after(500, self.load_visible_thumbnails_progressive)
 
-    def select_document_group(self, group: DocumentGroup):
-        """Select document group - carica on-demand se necessario"""
-        if self.selected_thumbnail:
-            self.selected_thumbnail.deselect()
-            self.selected_thumbnail = None
-        if self.selected_group:
-            self.selected_group.deselect_group()
-            
-        self.selected_group = group
-        group.select_group()
-        
-        self.category_var.set(group.categoryname)
-        self.selection_info.config(text=f"Selezionato: Documento")
-        
-        # ✅ CARICA METADATI IMMEDIATAMENTE
-        if hasattr(self, 'document_metadata_cache') and group.document_counter in self.document_metadata_cache:
-            doc_metadata = self.document_metadata_cache[group.document_counter]
-            self.load_metadata_from_json(doc_metadata)
-            self.current_document_name = group.categoryname
-            self.update_idletasks()  # Forza update
-            self.debug_print(f"✅ Loaded metadata for: {group.categoryname}")
-        
-        # ✅ CARICA DOCUMENTO ON-DEMAND se non ancora caricato
-        if group.document_loader is None and hasattr(group, 'pdf_path'):
-            self.debug_print(f"Loading document on-demand: {group.categoryname}")
-            
-            try:
-                # Mostra messaggio
-                self.selection_info.config(text=f"Caricamento: {group.categoryname}...")
-                self.update_idletasks()
-                
-                # Carica PDF
-                documentloader = create_document_loader(group.pdf_path)
-                documentloader.load()
-                group.document_loader = documentloader
-                
-                # Aggiungi pagine
-                for page_num in range(1, min(documentloader.totalpages + 1, 51)):
-                    group.add_page_lazy(page_num, documentloader)
-                
-                self.update_idletasks()
-                self.debug_print(f"✅ Document loaded on-demand: {documentloader.totalpages} pages")
-                
-            except Exception as e:
-                self.debug_print(f"Error loading document on-demand: {e}")
-                messagebox.showerror("Errore", f"Impossibile caricare documento:\n{str(e)}")
-                return
-        
-        # Aggiorna info
-        page_count = len(group.pages) if group.pages else "caricamento..."
-        self.page_info_label.config(text=f"Documento: {group.categoryname} ({page_count} pagine)")
-        
-        # Carica thumbnail se già caricato
-        if group.document_loader:
-            def load_selected_thumbnails():
-                loaded = 0
-                for thumb in group.thumbnails[:10]:  # Prime 10 pagine
-                    if not thumb.image_loaded and thumb.document_loader:
-                        try:
-                            img = thumb.document_loader.get_page(thumb.pagenum)
-                            if img:
-                                thumb.set_image(img)
-                                loaded += 1
-                                # Update UI ogni 2 thumbnail
-                                if loaded % 2 == 0:
-                                    self.update_idletasks()
-                        except Exception as e:
-                            self.debug_print(f"Error loading thumbnail: {e}")
-                
-                if loaded > 0:
-                    self.debug_print(f"✅ Loaded {loaded} thumbnails for selected document")
-            
-            # Carica in background
-            self.after(50, load_selected_thumbnails)
-        
     def auto_load_first_image(self):
         """Auto-carica la prima immagine disponibile"""
         try:
@@ -2252,9 +2195,8 @@ class AIDOXAApp(tk.Tk):
         document_counter = 1
         for doc in documents:
             group = DocumentGroup(self.content_frame, doc["categoria"], self, document_counter)
-            for pagenum in doc["pagine"]:
-                # ⭐ NUOVO: Carica solo numeri pagina, non immagini (VELOCE!)
-                group.add_page_lazy(pagenum, self.documentloader)  # Passa il loader, non l'immagine
+            # ⭐ NUOVO: Carica solo numeri pagina, non immagini (VELOCE!) - un solo layout per gruppo
+            group.add_pages_lazy(doc["pagine"], self.documentloader)  # Passa il loader, non l'immagine
             group.pack(pady=5, fill="x", padx=5)
             self.documentgroups.append(group)
             document_counter += 1
@@ -2292,8 +2234,7 @@ class AIDOXAApp(tk.Tk):
         group = DocumentGroup(self.content_frame, document_name, self, 1)
         
         # VELOCE! Lazy loading
-        for page_num in range(1, self.documentloader.totalpages + 1):
-            group.add_page_lazy(page_num, self.documentloader)
+        group.add_pages_lazy(range(1, self.documentloader.totalpages + 1), self.documentloader)
             
         group.pack(pady=5, fill='both', expand=False, padx=5)
         self.documentgroups.append(group)
@@ -2310,73 +2251,103 @@ class AIDOXAApp(tk.Tk):
         self.canvas.update_idletasks()
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
         
-    def preload_first_thumbnails(self, count: int = 5):
-        """Pre-carica prime N thumbnail per preview veloce"""
-        loaded = 0
-        for group in self.documentgroups:
-            for thumbnail in group.thumbnails:
-                if loaded >= count:
-                    return
-                # Carica thumbnail reale se non già caricata
-                if hasattr(thumbnail, 'image_loaded') and not thumbnail.image_loaded:
-                    try:
-                        img = thumbnail.document_loader.get_page(thumbnail.pagenum)
-                        if img:
-                            thumbnail.set_image(img)
-                            loaded += 1
-                            self.debug_print(f"Preloaded thumbnail for page {thumbnail.pagenum}")
-                    except Exception as e:
-                        self.debug_print(f"Error preloading thumbnail {thumbnail.pagenum}: {e}")
+    def request_thumbnail(self, thumbnail, priority: int = 0) -> bool:
+        """Accoda rendering miniatura nel servizio in background (False se non necessario)"""
+        if thumbnail.image_loaded or not thumbnail.document_loader:
+            return False
+        path = getattr(thumbnail.document_loader, 'path', None)
+        if not path:
+            return False
+        self.thumbnail_renderer.request(thumbnail, path, thumbnail.pagenum,
+                                        thumbnail.current_thumb_size, priority)
+        return True
+
+    def process_thumbnail_results(self):
+        """Applica sul thread Tk le miniature renderizzate dai worker"""
+        def apply_result(thumbnail, img):
+            if img is None or thumbnail.image_loaded:
+                return
+            try:
+                thumbnail.set_image(img)
+            except tk.TclError:
+                pass  # Widget distrutto nel frattempo
 
-    def preload_thumbnails_progressive(self):
-        """Smart lazy loading - carica solo thumbnail visibili + buffer"""
-        if not hasattr(self, 'documentgroups') or not self.documentgroups:
+        try:
+            self.thumbnail_renderer.drain(apply_result)
+        except Exception as e:
+            self.debug_print(f"Error applying rendered thumbnails: {e}")
+
+        try:
+            self.page_prefetcher.drain(self.show_rendered_page)
+        except Exception as e:
+            self.debug_print(f"Error displaying rendered page: {e}")
+
+        if not self._closing:
+            self.after(30, self.process_thumbnail_results)
+
+    def show_rendered_page(self, document_loader, pagenum: int, image: Optional[Image.Image]):
+        """Sostituisce il segnaposto con la pagina renderizzata, se è ancora quella selezionata"""
+        thumbnail = self.selected_thumbnail
+        if (thumbnail is None or thumbnail.document_loader is not document_loader or
+                thumbnail.pagenum != pagenum):
             return
-        
-        # Raccogli tutte le thumbnail che necessitano caricamento
+        if image is None:
+            self.debug_print(f"No image for page {pagenum}")
+            return
+        self.display_image(image, document_loader, pagenum)
+        self.debug_print(f"Image displayed for page {pagenum}")
+
+    def show_page_loading(self):
+        """Segnaposto nel viewer mentre la pagina viene renderizzata"""
+        canvas_w = self.image_canvas.winfo_width()
+        canvas_h = self.image_canvas.winfo_height()
+        self.image_canvas.create_text(canvas_w // 2, canvas_h // 2, text="Caricamento pagina...",
+                                      fill="gray")
+
+    def get_thumbnails_to_load(self) -> List:
+        """Thumbnail non ancora caricate, ordinate per distanza dal viewport"""
         thumbnails_to_load = []
         for group in self.documentgroups:
             for thumb in group.thumbnails:
                 if not thumb.image_loaded and thumb.document_loader:
                     thumbnails_to_load.append(thumb)
-        
-        if not thumbnails_to_load:
-            self.debug_print("✅ Tutti le thumbnail sono caricate")
-            return
-        
-        # Ordina per priorità di viewport
-        # Ordina per priorità di viewport
+
         try:
-            # ✅ FIX: Usa self.canvas invece di left_scrollable_frame
             scroll_top = self.canvas.canvasy(0)
             thumbnails_to_load.sort(key=lambda t: t.get_load_priority(scroll_top))
         except Exception as e:
             # Se errore, mantieni ordine originale
             self.debug_print(f"Cannot determine scroll position: {e}")
-            pass
+        return thumbnails_to_load
+
+    def preload_first_thumbnails(self, count: int = 5):
+        """Pre-carica prime N thumbnail per preview veloce"""
+        requested = 0
+        for group in self.documentgroups:
+            for thumbnail in group.thumbnails:
+                if requested >= count:
+                    return
+                if self.request_thumbnail(thumbnail, priority=requested):
+                    requested += 1
+
+    def preload_thumbnails_progressive(self):
+        """Smart lazy loading - accoda tutte le thumbnail mancanti, viewport per prime"""
+        if not hasattr(self, 'documentgroups') or not self.documentgroups:
+            return
         
-        # Carica batch di 3 thumbnail ad alta priorità
-        loaded_count = 0
-        for thumb in thumbnails_to_load[:3]:
-            try:
-                # ✅ FIX: Rimuovi controllo viewport (non necessario, thumbnails_to_load è già ordinato)
-                if thumb.load_image_if_needed():
-                    loaded_count += 1
-                    # Piccola pausa per non bloccare UI
-                    if loaded_count >= 1:
-                        break
-            except Exception as e:
-                self.debug_print(f"Error in progressive loading: {e}")
+        thumbnails_to_load = self.get_thumbnails_to_load()
+        if not thumbnails_to_load:
+            self.debug_print("✅ Tutti le thumbnail sono caricate")
+            return
         
-        # Continua caricamento se ci sono altre thumbnail
-        if len(thumbnails_to_load) > 3:
-            # Schedule prossimo batch tra 100ms
-            self.after(100, self.preload_thumbnails_progressive)
-        else:
-            self.debug_print("🎯 Lazy loading completato per viewport corrente")
+        # Riassegna priorità: le richieste precedenti (vecchio scroll) vengono scartate
+        self.thumbnail_renderer.cancel_all()
+        for index, thumb in enumerate(thumbnails_to_load):
+            self.request_thumbnail(thumb, priority=index)
+        self.debug_print(f"🎯 Queued {len(thumbnails_to_load)} thumbnails for background rendering")
     
     def load_visible_thumbnails_progressive(self):
-        """Carica progressivamente le thumbnail visibili nel viewport"""
+        """Accoda le thumbnail del viewport con priorità massima"""
         if not hasattr(self, 'documentgroups') or not self.documentgroups:
             return
         
@@ -2406,27 +2377,10 @@ class AIDOXAApp(tk.Tk):
                 self.debug_print("No visible thumbnails to load")
                 return
             
-            # Carica prime 5 thumbnail visibili
-            loaded = 0
-            for thumb in visible_thumbnails[:5]:
-                try:
-                    img = thumb.document_loader.get_page(thumb.pagenum)
-                    if img:
-                        thumb.set_image(img)
-                        loaded += 1
-                        self.debug_print(f"Loaded visible thumbnail: page {thumb.pagenum}")
-                        
-                        # Update UI ogni 2 thumbnail
-                        if loaded % 2 == 0:
-                            self.update_idletasks()
-                except Exception as e:
-                    self.debug_print(f"Error loading visible thumbnail: {e}")
-            
-            # Se ci sono altre thumbnail da caricare, continua
-            if len(visible_thumbnails) > 5:
-                self.after(300, self.load_visible_thumbnails_progressive)
-            else:
-                self.debug_print("✅ All visible thumbnails loaded")
+            visible_thumbnails.sort(key=lambda t: t.get_load_priority(canvas_top))
+            for index, thumb in enumerate(visible_thumbnails):
+                self.request_thumbnail(thumb, priority=index)
+            self.debug_print(f"Queued {len(visible_thumbnails)} visible thumbnails")
                 
         except Exception as e:
             self.debug_print(f"Error in progressive thumbnail loading: {e}")
@@ -2455,33 +2409,23 @@ class AIDOXAApp(tk.Tk):
         self.left_scrollable_frame.bind('<Button-5>', on_mousewheel)  # Linux
     
     def _preload_next_thumbnail(self):
-        """Carica prossima thumbnail in background (non bloccante)"""
+        """Accoda prossimo batch della coda di preload (rendering in background)"""
         if not hasattr(self, '_preload_queue') or self._preload_index >= len(self._preload_queue):
             self.debug_print("✅ All thumbnails preloaded!")
             return
         
-        # ⭐ CARICA 5 THUMBNAIL ALLA VOLTA
+        # ⭐ ACCODA 5 THUMBNAIL ALLA VOLTA
         batch_size = 5
         end_index = min(self._preload_index + batch_size, len(self._preload_queue))
         
         for i in range(self._preload_index, end_index):
-            thumbnail = self._preload_queue[i]
-            
-            # Carica thumbnail
-            if hasattr(thumbnail, 'image_loaded') and not thumbnail.image_loaded:
-                try:
-                    img = thumbnail.document_loader.get_page(thumbnail.pagenum)
-                    if img:
-                        thumbnail.set_image(img)
-                        self.debug_print(f"⚡ Background loaded thumbnail page {thumbnail.pagenum}")
-                except Exception as e:
-                    self.debug_print(f"❌ Error loading thumbnail {thumbnail.pagenum}: {e}")
+            self.request_thumbnail(self._preload_queue[i], priority=i)
         
         self._preload_index = end_index
         
-        # Continua con prossimo batch (delay 20ms per non bloccare UI)
+        # Continua con prossimo batch
         if self._preload_index < len(self._preload_queue):
-            self.after(20, self._preload_next_batch)  # ⭐ Delay ridotto da 50ms a 20ms
+            self.after(20, self._preload_next_thumbnail)
 
     def update_document_instructions(self, json_file: str, doc_file: str, input_folder: str, categories: List):
         """Update instructions panel with document information including metadata"""
@@ -2956,19 +2900,43 @@ Usa il menu 'Aiuto > Istruzioni' per dettagli completi.
         
         messagebox.showerror("Errore Export", f"Errore durante l'export:\n\n{error_msg}")
     
+    def close_document_loaders(self):
+        """Chiude i loader di tutti i documenti del workspace (file handle e cache pagine)"""
+        loaders = {}
+        for group in list(self.document_groups) + list(self.documentgroups):
+            for loader in [getattr(group, 'document_loader', None)] + [
+                    getattr(thumb, 'document_loader', None) for thumb in getattr(group, 'thumbnails', [])]:
+                if loader is not None:
+                    loaders[id(loader)] = loader
+        for loader in (getattr(self, 'document_loader', None), self.documentloader):
+            if loader is not None:
+                loaders[id(loader)] = loader
+
+        for loader in loaders.values():
+            try:
+                loader.close()
+            except Exception as e:
+                self.debug_print(f"[RESET] Error closing document loader: {e}")
+        self.debug_print(f"[RESET] Closed {len(loaders)} document loaders")
+
     def reset_workspace(self):
         """Reset the workspace to initial state with workflow management - SAFE VERSION"""
         try:
             self.debug_print("[WORKFLOW] Resetting workspace...")
             
+            self.thumbnail_renderer.cancel_all()
+            self.page_prefetcher.cancel_all()
+
             # ✅ STOP AUTOMATIC REFLOW FIRST!
             try:
-                if hasattr(self, '_reflow_scheduled') and self._reflow_scheduled:
-                    self.after_cancel(self._reflow_scheduled)
-                    self._reflow_scheduled = None
+                if getattr(self, '_reflow_timer', None):
+                    self.after_cancel(self._reflow_timer)
+                    self._reflow_timer = None
             except:
                 pass
             
+            self.close_document_loaders()
+            
             # ✅ SAFE CLEANUP DOCUMENT GROUPS
             if hasattr(self, 'document_groups') and self.document_groups:
                 self.debug_print(f"[RESET] Destroying {len(self.document_groups)} document groups")
@@ -2991,9 +2959,11 @@ Usa il menu 'Aiuto > Istruzioni' per dettagli completi.
                             pass
                 except:
                     pass
+            self.thumbnail_pool.clear()
             
             # Reset core variables
             self.document_loader = None
+            self.documentloader = None
             self.original_data = None
             self.current_document_name = ""
             self.all_categories = set()
@@ -3012,12 +2982,17 @@ Usa il menu 'Aiuto > Istruzioni' per dettagli completi.
             # Reset UI variables
             self.selected_thumbnail = None
             self.selected_group = None
+            self.pin_document_pages(None)
             
             # ✅ SAFE UI RESET
             try:
                 if hasattr(self, 'image_canvas') and self.image_canvas.winfo_exists():
                     self.image_canvas.delete("all")
                 self.current_image = None
+                self.tile_source = None
+                self._tile_items = {}
+                self._tile_layout = None
+                self.tile_cache.clear()
             except:
                 pass
             
@@ -3305,19 +3280,55 @@ Usa il menu 'Aiuto > Istruzioni' per dettagli completi.
         
         return new_path
 
+    def pin_document_pages(self, document_loader):
+        """Protegge dall'eviction globale le pagine del documento selezionato (None: nessuno)"""
+        page_cache = getattr(document_loader, 'cache', None)
+        if not hasattr(page_cache, 'pin'):
+            page_cache = None
+        if page_cache is self._pinned_page_cache:
+            return
+        if self._pinned_page_cache is not None:
+            self._pinned_page_cache.unpin()
+        self._pinned_page_cache = page_cache
+        if page_cache is not None:
+            page_cache.pin()
+
+    def prefetch_neighbor_pages(self, thumbnail: PageThumbnail):
+        """Accoda in background le k pagine successive e precedenti del gruppo (k = viewer_prefetch_depth)"""
+        depth = self.config_manager.get('viewer_prefetch_depth', 2)
+        group = thumbnail.document_group
+        if depth <= 0 or group is None:
+            return
+        thumbnails = group.thumbnails
+        try:
+            index = thumbnails.index(thumbnail)
+        except ValueError:
+            return
+
+        pages = []
+        for distance in range(1, depth + 1):
+            for neighbor_index in (index + distance, index - distance):  # Avanti prima
+                if 0 <= neighbor_index < len(thumbnails):
+                    neighbor = thumbnails[neighbor_index]
+                    pages.append((neighbor.document_loader, neighbor.pagenum))
+        self.page_prefetcher.prefetch(pages, channel='neighbors', priority=1)
+        self.debug_print(f"Prefetch stats: {self.page_prefetcher.get_stats()}")
+
+    def prefetch_hover_page(self, thumbnail: PageThumbnail):
+        """Accoda in background la pagina sotto il mouse (sostituisce il precedente hover)"""
+        if not self.config_manager.get('viewer_prefetch_hover', True):
+            return
+        if thumbnail is self.selected_thumbnail or not thumbnail.document_loader:
+            return
+        self.page_prefetcher.prefetch([(thumbnail.document_loader, thumbnail.pagenum)],
+                                      channel='hover', priority=0)
+
     def select_thumbnail(self, thumbnail: PageThumbnail):
         """Select a thumbnail and display its image"""
         self.debug_print(f"select_thumbnail called for page {thumbnail.pagenum}")
         
         # ✅ CARICA IMMAGINE ON-DEMAND se non ancora caricata
-        if not thumbnail.image_loaded and thumbnail.document_loader:
-            try:
-                img = thumbnail.document_loader.get_page(thumbnail.pagenum)
-                if img:
-                    thumbnail.set_image(img)
-                    self.debug_print(f"On-demand loaded image for page {thumbnail.pagenum}")
-            except Exception as e:
-                self.debug_print(f"Error loading image on-demand: {e}")
+        self.request_thumbnail(thumbnail, priority=0)
         
         # Deseleziona precedenti
         if self.selected_thumbnail:
@@ -3338,6 +3349,7 @@ Usa il menu 'Aiuto > Istruzioni' per dettagli completi.
         # Seleziona visualmente
         thumbnail.select()
         self.selected_group.select_group()
+        self.pin_document_pages(thumbnail.document_loader or self.selected_group.document_loader)
         
         # ✅ CARICA METADATI IMMEDIATAMENTE (priorità massima)
         if hasattr(self, 'document_metadata_cache') and self.selected_group.document_counter in self.document_metadata_cache:
@@ -3347,15 +3359,25 @@ Usa il menu 'Aiuto > Istruzioni' per dettagli completi.
             self.update_idletasks()  # Forza aggiornamento UI
             self.debug_print(f"✅ Loaded metadata for document: {self.selected_group.categoryname}")
         
-        # Mostra immagine
+        # Mostra immagine (risoluzione viewer, non miniatura)
         try:
-            if thumbnail.image:
-                self.display_image(thumbnail.image)
-                self.debug_print(f"Image displayed for page {thumbnail.pagenum}")
+            loader = thumbnail.document_loader
+            if not loader or self.page_prefetcher.record_display(loader, thumbnail.pagenum):
+                view_image = thumbnail.get_view_image()
+                if view_image:
+                    self.display_image(view_image, loader, thumbnail.pagenum)
+                    self.debug_print(f"Image displayed for page {thumbnail.pagenum}")
+                else:
+                    self.debug_print(f"No image for page {thumbnail.pagenum}")
             else:
-                self.debug_print(f"No image for page {thumbnail.pagenum}")
+                # Pagina non in cache: miniatura (o segnaposto) subito, rendering in background
+                self.display_image(thumbnail.image if thumbnail.image_loaded else None)
+                if not thumbnail.image_loaded:
+                    self.show_page_loading()
+                self.page_prefetcher.request_display(loader, thumbnail.pagenum)
         except Exception as e:
             self.debug_print(f"Error displaying image: {e}")
+        self.prefetch_neighbor_pages(thumbnail)
         
         # Aggiorna UI
         self.category_var.set(thumbnail.categoryname)
@@ -3372,6 +3394,7 @@ Usa il menu 'Aiuto > Istruzioni' per dettagli completi.
             
         self.selected_group = group
         group.select_group()
+        self.pin_document_pages(group.document_loader)
         
         self.category_var.set(group.categoryname)
         self.selection_info.config(text=f"Selezionato: Documento")
@@ -3386,26 +3409,23 @@ Usa il menu 'Aiuto > Istruzioni' per dettagli completi.
         
         # Carica thumbnail del documento selezionato se non caricate
         for thumb in group.thumbnails[:5]:  # Prime 5 pagine
-            if not thumb.image_loaded and thumb.document_loader:
-                try:
-                    img = thumb.document_loader.get_page(thumb.pagenum)
-                    if img:
-                        thumb.set_image(img)
-                        self.debug_print(f"Loaded thumbnail on selection: page {thumb.pagenum}")
-                except Exception as e:
-                    self.debug_print(f"Error loading thumbnail on selection: {e}")
+            self.request_thumbnail(thumb, priority=0)
 
-    def display_image(self, image: Image.Image):
-        """Display image in center panel"""
+    def display_image(self, image: Image.Image, document_loader=None, pagenum: Optional[int] = None):
+        """Display image in center panel (PDF: tile renderizzati dal loader a ogni zoom)"""
         self.debug_print(f"display_image called with image: {image is not None}")
         
         if not image:
             self.debug_print("Warning: No image provided to display_image")
             self.image_canvas.delete("all")
+            self._tile_items = {}
+            self._tile_layout = None
             self.current_image = None
+            self.tile_source = None
             return
         
         self.current_image = image
+        self.tile_source = create_tile_source(image, document_loader, pagenum)
         self.zoom_factor = 1.0
         self.image_offset_x = 0
         self.image_offset_y = 0
@@ -3680,39 +3700,90 @@ Usa il menu 'Aiuto > Istruzioni' per dettagli completi.
         self.zoom_status.config(text=f"Zoom: {self.zoom_factor:.1%}")
         
     def update_image_display(self):
-        """Update the image display on canvas with scroll support"""
+        """Update the image display on canvas with scroll support (solo tile visibili)"""
         if not self.current_image:
             return
 
         self.image_canvas.delete("all")
+        self._tile_items = {}
+        self._tile_layout = None
 
-        img_w, img_h = self.current_image.size
-        new_w = int(img_w * self.zoom_factor)
-        new_h = int(img_h * self.zoom_factor)
+        if self.tile_source is None:
+            self.tile_source = create_tile_source(self.current_image)
+
+        new_w, new_h = self.tile_source.get_display_size(self.zoom_factor)
 
         if new_w <= 0 or new_h <= 0:
             return
 
         try:
-            resized_img = self.current_image.resize((new_w, new_h), RESAMPLEFILTER)
-            self.photo = ImageTk.PhotoImage(resized_img)
-
             canvas_w = self.image_canvas.winfo_width()
             canvas_h = self.image_canvas.winfo_height()
 
             pad_x = max(0, (canvas_w - new_w) // 2)
             pad_y = max(0, (canvas_h - new_h) // 2)
-
-            # Disegna immagine ancorata a NW (con eventuale padding per centrare se più piccola)
-            self.image_canvas.create_image(pad_x, pad_y, image=self.photo, anchor="nw")
+            self._tile_layout = (self.zoom_factor, new_w, new_h, pad_x, pad_y)
 
             # Scrollregion: area massima tra canvas e immagine
             sr_w = max(new_w, canvas_w)
             sr_h = max(new_h, canvas_h)
             self.image_canvas.config(scrollregion=(0, 0, sr_w, sr_h))
 
+            self.render_visible_tiles()
+
         except Exception as e:
             self.debug_print(f"Error updating image display: {e}")
+
+    def schedule_tile_render(self):
+        """Render tile visibili al prossimo idle (scroll/pan ravvicinati = un solo render)"""
+        if self._tile_render_pending or self._tile_layout is None:
+            return
+        self._tile_render_pending = True
+        self.after_idle(self.render_visible_tiles)
+
+    def render_visible_tiles(self):
+        """Crea i tile nel viewport (+1 di margine) e rimuove quelli usciti"""
+        self._tile_render_pending = False
+        if self._tile_layout is None or self.tile_source is None:
+            return
+
+        zoom, new_w, new_h, pad_x, pad_y = self._tile_layout
+        canvas = self.image_canvas
+        view_x0 = canvas.canvasx(0) - pad_x
+        view_y0 = canvas.canvasy(0) - pad_y
+        view_x1 = view_x0 + canvas.winfo_width()
+        view_y1 = view_y0 + canvas.winfo_height()
+
+        cols, rows = get_tile_grid((new_w, new_h))
+        tx0, tx1 = max(0, int(view_x0 // TILE_SIZE) - 1), min(cols - 1, int(view_x1 // TILE_SIZE) + 1)
+        ty0, ty1 = max(0, int(view_y0 // TILE_SIZE) - 1), min(rows - 1, int(view_y1 // TILE_SIZE) + 1)
+        needed = {(tx, ty) for tx in range(tx0, tx1 + 1) for ty in range(ty0, ty1 + 1)}
+
+        for key in list(self._tile_items):
+            if key not in needed:
+                canvas.delete(self._tile_items.pop(key)[0])
+
+        for tx, ty in sorted(needed - self._tile_items.keys()):
+            tile = self.get_viewer_tile(zoom, tx, ty)
+            if tile is None:
+                continue
+            photo = ImageTk.PhotoImage(tile)
+            item = canvas.create_image(pad_x + tx * TILE_SIZE, pad_y + ty * TILE_SIZE,
+                                       image=photo, anchor="nw", tags="tile")
+            self._tile_items[(tx, ty)] = (item, photo)
+
+        canvas.tag_lower("tile")  # Rettangolo zoom area sempre sopra
+
+    def get_viewer_tile(self, zoom: float, tx: int, ty: int) -> Optional[Image.Image]:
+        """Tile dalla cache LRU o renderizzato dalla sorgente"""
+        cache_key = (self.tile_source.key, round(zoom, 5), tx, ty)
+        tile = self.tile_cache.get(cache_key)
+        if tile is None:
+            tile = self.tile_source.get_tile(zoom, tx, ty)
+            if tile is not None:
+                self.tile_cache.put(cache_key, tile)
+        return tile
+
     def create_drag_preview(self, thumbnail: PageThumbnail):
         """Create drag preview window"""
         self.drag_item = thumbnail
@@ -3787,7 +3858,7 @@ Usa il menu 'Aiuto > Istruzioni' per dettagli completi.
         group.thumbnails.insert(new_index, thumbnail)
         group.pages.insert(new_index, thumbnail.pagenum)
         
-        group.repack_thumbnails_grid()
+        group.invalidate_layout(min(old_index, new_index))
         
         self.debug_print(f"Reordered page {thumbnail.pagenum} in {group.categoryname} from {old_index} to {new_index}")
 
@@ -3801,12 +3872,10 @@ Usa il menu 'Aiuto > Istruzioni' per dettagli completi.
         relative_x = x_root - frame_x
         relative_y = y_root - frame_y
         
-        thumb_width = self.config_manager.get('thumbnail_width', 80)
-        thumb_height = self.config_manager.get('thumbnail_height', 100)
-        padding = 6
+        cell_width, cell_height = group.get_cell_size()
         
-        col = max(0, relative_x // (thumb_width + padding))
-        row = max(0, relative_y // (thumb_height + 20 + padding))
+        col = max(0, relative_x // cell_width)
+        row = max(0, relative_y // cell_height)
         
         thumbnails_per_row = group.thumbnails_per_row
         estimated_position = row * thumbnails_per_row + col
@@ -3826,9 +3895,8 @@ Usa il menu 'Aiuto > Istruzioni' per dettagli completi.
 
         original_group.remove_thumbnail(thumbnail)
         
-        thumbnail.frame.destroy()
-        
         new_thumbnail = target_group.add_page(thumbnail.pagenum, thumbnail.image)
+        new_thumbnail.document_loader = thumbnail.document_loader
         
         if self.selected_thumbnail == thumbnail:
             self.selected_thumbnail = new_thumbnail
@@ -2,6 +2,18 @@
 Document loaders module for DynamicAI
 """
 
-from .document_loaders import PDFDocumentLoader, TIFFDocumentLoader, create_document_loader
+from .document_loaders import PDFDocumentLoader, TIFFDocumentLoader, create_document_loader, RENDER_PROFILES
+from .thumbnail_cache import configure_thumbnail_cache, get_thumbnail_cache
+from .render_service import ThumbnailRenderService, get_default_render_workers
+from .tile_source import TILE_SIZE, create_tile_source, get_tile_grid
+from .page_cache import PageCacheManager, configure_page_cache, get_page_cache
+from .handle_pool import DocumentHandlePool, configure_handle_pool, get_handle_pool
+from .prefetch import PagePrefetcher
 
-__all__ = ['PDFDocumentLoader', 'TIFFDocumentLoader', 'create_document_loader']
+__all__ = ['PDFDocumentLoader', 'TIFFDocumentLoader', 'create_document_loader', 'RENDER_PROFILES',
+           'configure_thumbnail_cache', 'get_thumbnail_cache',
+           'ThumbnailRenderService', 'get_default_render_workers',
+           'TILE_SIZE', 'create_tile_source', 'get_tile_grid',
+           'PageCacheManager', 'configure_page_cache', 'get_page_cache',
+           'DocumentHandlePool', 'configure_handle_pool', 'get_handle_pool',
+           'PagePrefetcher']
@@ -3,44 +3,110 @@ Document loaders for PDF and TIFF files with memory management
 """
 
 import fitz
-from PIL import Image, ImageSequence
+from PIL import Image, ImageSequence, ImageChops
 from typing import Optional, Dict
+import struct
 import sys
+import threading
 from collections import OrderedDict
-import gc
+
+from .thumbnail_cache import ThumbnailDiskCache, get_thumbnail_cache, load_thumbnail
+from .handle_pool import get_handle_pool
+from .page_cache import get_page_cache, get_image_memory_size
+from .pdf_image_pages import detect_image_page, render_image_page, get_image_page_jpeg
+from .tiff_index import read_tiff_ifd_index, apply_ifd_index, get_index_page_mode
+from .tiff_page_streams import get_tiff_page_pdf_image, EMBEDDABLE_COMPRESSIONS
+
+# Profili di rendering per caso d'uso
+# colorspace: 'RGB' | 'GRAY' | 'auto' (RGB convertito in L se la pagina è in scala di grigi,
+# scansioni a 1 bit restano in modo '1')
+RENDER_PROFILES = {
+    'thumb': {'dpi': 36, 'colorspace': 'auto', 'alpha': False, 'cache': True},
+    'view': {'dpi': 144, 'colorspace': 'RGB', 'alpha': False, 'cache': True},
+    'export': {'dpi': 300, 'colorspace': 'RGB', 'alpha': False, 'cache': False},
+}
+
+# Lato massimo delle miniature TIFF (riduzione con Image.reduce)
+TIFF_THUMB_MAX_SIDE = 400
+
+def resolve_render_profile(profile: str = 'view', dpi: Optional[int] = None,
+                           colorspace: Optional[str] = None, alpha: Optional[bool] = None) -> dict:
+    """Combina profilo di rendering con eventuali parametri espliciti"""
+    if profile not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile: {profile}")
+    settings = dict(RENDER_PROFILES[profile])
+    if dpi is not None:
+        settings['dpi'] = dpi
+    if colorspace is not None:
+        settings['colorspace'] = colorspace
+    if alpha is not None:
+        settings['alpha'] = alpha
+    return settings
+
+def _is_grayscale(img: Image.Image) -> bool:
+    """Controlla se un'immagine RGB ha canali identici (pagina in scala di grigi)"""
+    # Campione 1/8 (nearest): scarta subito le pagine a colori senza scorrere tutti i pixel
+    if min(img.size) >= 64 and not _channels_equal(img.resize((img.width // 8, img.height // 8), Image.NEAREST)):
+        return False
+    return _channels_equal(img)
+
+def _channels_equal(img: Image.Image) -> bool:
+    r, g, b = img.split()
+    return (ImageChops.difference(r, g).getbbox() is None and
+            ImageChops.difference(g, b).getbbox() is None)
 
 class MemoryAwareLRUCache:
     """LRU Cache with memory limit to prevent memory exhaustion"""
     
-    def __init__(self, max_items: int = 50, max_memory_mb: int = 100):
+    def __init__(self, max_items: int = 50, max_memory_mb: int = 100,
+                 admit_max_fraction: Optional[float] = None):
+        """
+        Args:
+            max_items: Numero massimo di elementi
+            max_memory_mb: Limite memoria (byte reali dei pixel decodificati)
+            admit_max_fraction: Se impostato, elementi più grandi di questa frazione
+                del limite non vengono memorizzati (non svuotano la cache)
+        """
         self.max_items = max_items
         self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self.admit_max_fraction = admit_max_fraction
         self.cache = OrderedDict()
         self.current_memory = 0
+        self._sizes = {}  # key -> byte (calcolati una volta all'inserimento)
+
+        # Contatori
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+        self.bytes_added = 0
+        self.bytes_evicted = 0
     
     def get(self, key):
         """Get item from cache, move to end (most recently used)"""
-        if key in self.cache:
-            # Move to end (most recently used)
-            self.cache.move_to_end(key)
-            return self.cache[key]
-        return None
+        value = self.cache.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        # Move to end (most recently used)
+        self.cache.move_to_end(key)
+        self.hits += 1
+        return value
     
     def put(self, key, value):
         """Put item in cache with memory management"""
-        if key in self.cache:
-            # Update existing item
-            old_size = self._get_image_memory_size(self.cache[key])
-            self.current_memory -= old_size
-            self.cache[key] = value
-            self.cache.move_to_end(key)
-        else:
-            # Add new item
-            self.cache[key] = value
-        
-        # Calculate memory usage
         new_size = self._get_image_memory_size(value)
+        if (self.admit_max_fraction is not None and
+                new_size > self.max_memory_bytes * self.admit_max_fraction):
+            self.rejected += 1
+            self._remove(key)  # Non lasciare una versione vecchia
+            return
+
+        self._remove(key)
+        self.cache[key] = value
+        self._sizes[key] = new_size
         self.current_memory += new_size
+        self.bytes_added += new_size
         
         # Cleanup if needed
         self._cleanup_if_needed()
@@ -48,30 +114,45 @@ class MemoryAwareLRUCache:
     def clear(self):
         """Clear all cached items"""
         self.cache.clear()
+        self._sizes.clear()
         self.current_memory = 0
-        gc.collect()  # Force garbage collection
+
+    def get_stats(self) -> dict:
+        """Statistiche cache (memoria, hit rate, eviction)"""
+        total = self.hits + self.misses
+        return {
+            'cached_items': len(self.cache),
+            'memory_usage_mb': self.current_memory / (1024 * 1024),
+            'max_memory_mb': self.max_memory_bytes / (1024 * 1024),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / total) if total else 0.0,
+            'evictions': self.evictions,
+            'rejected': self.rejected,
+            'bytes_added_mb': self.bytes_added / (1024 * 1024),
+            'bytes_evicted_mb': self.bytes_evicted / (1024 * 1024)
+        }
     
     def _get_image_memory_size(self, img: Image.Image) -> int:
-        """Estimate memory size of PIL Image"""
-        if img is None:
-            return 0
-        # Rough estimation: width * height * bytes_per_pixel
-        bytes_per_pixel = 4 if img.mode in ('RGBA', 'CMYK') else 3
-        return img.width * img.height * bytes_per_pixel
+        """Memory size of PIL Image pixel data"""
+        return get_image_memory_size(img)
+
+    def _remove(self, key):
+        """Rimuove un elemento se presente"""
+        if key in self.cache:
+            del self.cache[key]
+            self.current_memory -= self._sizes.pop(key)
     
     def _cleanup_if_needed(self):
         """Remove old items if memory or count limits exceeded"""
-        # Remove items if we exceed limits
         while (len(self.cache) > self.max_items or 
                self.current_memory > self.max_memory_bytes) and self.cache:
             # Remove least recently used (first item)
-            key, old_img = self.cache.popitem(last=False)
-            if old_img:
-                self.current_memory -= self._get_image_memory_size(old_img)
-        
-        # Force garbage collection if memory usage is high
-        if self.current_memory > self.max_memory_bytes * 0.8:
-            gc.collect()
+            key, _ = self.cache.popitem(last=False)
+            size = self._sizes.pop(key)
+            self.current_memory -= size
+            self.evictions += 1
+            self.bytes_evicted += size
 
 class PDFDocumentLoader:
     """Loads and manages PDF documents with memory-aware caching"""
@@ -79,51 +160,117 @@ class PDFDocumentLoader:
     def __init__(self, path: str):
         self.path = path
         self.doc = None
-        # Use memory-aware cache instead of simple dict
-        self.cache = MemoryAwareLRUCache(max_items=30, max_memory_mb=80)
+        # Pagine in cache con budget di memoria globale condiviso tra documenti
+        self.cache = get_page_cache().create_cache(max_items=30)
         self.totalpages = 0
+        self.file_key = None  # Identità file per cache miniature su disco
+        self._loaded = False
+        self._handle_lock = threading.RLock()  # Protegge self.doc dalla chiusura del pool handle
+        self._image_pages = {}  # pagenum -> (xref, is_jpeg) delle scansioni a immagine singola, o None
 
     def load(self):
         """Load the PDF document"""
         try:
-            self.doc = fitz.open(self.path)
-            self.totalpages = len(self.doc)
+            with self._handle_lock:
+                self.doc = fitz.open(self.path)
+                self.totalpages = len(self.doc)
+                self.file_key = ThumbnailDiskCache.make_file_key(self.path)
+                self._loaded = True
+                get_handle_pool().touch(self, opened=True)
         except Exception as e:
             print(f"Error loading PDF {self.path}: {e}")
             raise
 
-    def get_page(self, pagenum: int) -> Optional[Image.Image]:
+    def _ensure_open(self) -> bool:
+        """Riapre il documento se chiuso dal pool handle (lock handle già acquisito)"""
+        if not self._loaded:
+            return False
+        if self.doc is None:
+            self.doc = fitz.open(self.path)
+            get_handle_pool().touch(self, reopened=True)
+        else:
+            get_handle_pool().touch(self)
+        return True
+
+    def release_handle(self, blocking: bool = True) -> bool:
+        """Chiude il file mantenendo cache e stato (riaperto al prossimo accesso)"""
+        if not self._handle_lock.acquire(blocking=blocking):
+            return False
+        try:
+            if self.doc:
+                self.doc.close()
+                self.doc = None
+            return True
+        finally:
+            self._handle_lock.release()
+
+    def get_page(self, pagenum: int, profile: str = 'view', dpi: Optional[int] = None,
+                 colorspace: Optional[str] = None, alpha: Optional[bool] = None) -> Optional[Image.Image]:
         """Get a specific page as PIL Image with memory management
         
         Args:
             pagenum: Page number (1-based indexing)
+            profile: Render profile ('thumb', 'view', 'export')
+            dpi: Override profile DPI
+            colorspace: Override profile colorspace ('RGB', 'GRAY', 'auto')
+            alpha: Override profile alpha channel
             
         Returns:
             PIL Image or None if error
         """
+        settings = resolve_render_profile(profile, dpi, colorspace, alpha)
+        cache_key = self._cache_key(pagenum, settings)
+        
         # Check cache first
-        cached_img = self.cache.get(pagenum)
+        cached_img = self.cache.get(cache_key)
         if cached_img is not None:
             return cached_img
 
-        if not self.doc:
+        if not self._loaded:
             print("Document not loaded")
             return None
 
-        try:
-            # Convert to 0-based indexing
-            page_index = pagenum - 1
-            if page_index < 0 or page_index >= self.totalpages:
-                print(f"Page {pagenum} out of range (1-{self.totalpages})")
-                return None
+        # Convert to 0-based indexing
+        page_index = pagenum - 1
+        if page_index < 0 or page_index >= self.totalpages:
+            print(f"Page {pagenum} out of range (1-{self.totalpages})")
+            return None
 
-            page = self.doc[page_index]
-            # Use 2x scaling for better quality
-            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        try:
+            with self._handle_lock:
+                if not self._ensure_open():
+                    print("Document not loaded")
+                    return None
+                page = self.doc[page_index]
+                # Scansioni: immagine incorporata decodificata direttamente
+                img = None if settings['alpha'] else self._render_image_page(
+                    page, pagenum, settings['dpi'], bilevel=settings['colorspace'] == 'auto')
+                if img is None:
+                    zoom = settings['dpi'] / 72
+                    cs = fitz.csGRAY if settings['colorspace'] == 'GRAY' else fitz.csRGB
+                    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=cs,
+                                          alpha=settings['alpha'])
+            
+            if img is not None:
+                mode = img.mode
+                if settings['colorspace'] == 'GRAY' and mode != "L":
+                    img = img.convert("L")
+                elif settings['colorspace'] == 'RGB' and mode != "RGB":
+                    img = img.convert("RGB")
+            else:
+                if pix.n - pix.alpha == 1:
+                    mode = "LA" if pix.alpha else "L"
+                else:
+                    mode = "RGBA" if pix.alpha else "RGB"
+                img = Image.frombytes(mode, [pix.width, pix.height], pix.samples)
+                img.info['dpi'] = (settings['dpi'], settings['dpi'])
+            
+            if settings['colorspace'] == 'auto' and mode == "RGB" and _is_grayscale(img):
+                img = img.convert("L")
             
             # Cache the image with memory management
-            self.cache.put(pagenum, img)
+            if settings['cache']:
+                self.cache.put(cache_key, img)
             
             return img
 
@@ -131,42 +278,139 @@ class PDFDocumentLoader:
             print(f"Error getting page {pagenum}: {e}")
             return None
 
+    @staticmethod
+    def _cache_key(pagenum: int, settings: dict) -> tuple:
+        return (pagenum, settings['dpi'], settings['colorspace'], settings['alpha'])
+
+    def _get_image_page(self, page, pagenum: int):
+        """(xref, is_jpeg) se la pagina è una scansione a immagine singola (rilevamento in cache)"""
+        if pagenum not in self._image_pages:
+            try:
+                self._image_pages[pagenum] = detect_image_page(page)
+            except Exception as e:
+                print(f"Error inspecting page {pagenum} images: {e}")
+                self._image_pages[pagenum] = None
+        return self._image_pages[pagenum]
+
+    def _render_image_page(self, page, pagenum: int, dpi: float, bilevel: bool = False) -> Optional[Image.Image]:
+        """Immagine della scansione decodificata dallo stream (None: serve il rendering MuPDF)"""
+        image_page = self._get_image_page(page, pagenum)
+        if image_page is None:
+            return None
+        try:
+            return render_image_page(page, image_page[0], image_page[1], dpi, bilevel)
+        except Exception as e:
+            print(f"Error decoding embedded image of page {pagenum}: {e}")
+            self._image_pages[pagenum] = None
+            return None
+
+    def get_page_jpeg(self, pagenum: int) -> Optional[bytes]:
+        """Byte JPEG originali se la pagina è una scansione JPEG esportabile senza ricodifica"""
+        page_index = pagenum - 1
+        if page_index < 0 or page_index >= self.totalpages:
+            return None
+        try:
+            with self._handle_lock:
+                if not self._ensure_open():
+                    return None
+                page = self.doc[page_index]
+                image_page = self._get_image_page(page, pagenum)
+                if image_page is None or not image_page[1]:
+                    return None
+                return get_image_page_jpeg(page, image_page[0])
+        except Exception as e:
+            print(f"Error reading embedded JPEG of page {pagenum}: {e}")
+            return None
+
+    def is_page_cached(self, pagenum: int, profile: str = 'view', dpi: Optional[int] = None,
+                       colorspace: Optional[str] = None, alpha: Optional[bool] = None) -> bool:
+        """True se get_page con questi parametri non richiede rendering"""
+        settings = resolve_render_profile(profile, dpi, colorspace, alpha)
+        return self._cache_key(pagenum, settings) in self.cache
+
+    def cache_page(self, pagenum: int, img: Image.Image, profile: str = 'view', dpi: Optional[int] = None,
+                   colorspace: Optional[str] = None, alpha: Optional[bool] = None):
+        """Memorizza una pagina renderizzata altrove (es. loader di un thread worker)"""
+        settings = resolve_render_profile(profile, dpi, colorspace, alpha)
+        if self._loaded and settings['cache'] and img is not None:
+            self.cache.put(self._cache_key(pagenum, settings), img)
+
+    def get_page_region(self, pagenum: int, dpi: float, region: tuple) -> Optional[Image.Image]:
+        """Render di un'area della pagina (tile del viewer), non in cache
+        
+        Args:
+            pagenum: Page number (1-based indexing)
+            dpi: Risoluzione di rendering
+            region: (x0, y0, x1, y1) in pixel alla risoluzione dpi
+        """
+        page_index = pagenum - 1
+        if page_index < 0 or page_index >= self.totalpages:
+            return None
+
+        try:
+            zoom = dpi / 72
+            x0, y0, x1, y1 = region
+            clip = fitz.Rect(x0 / zoom, y0 / zoom, x1 / zoom, y1 / zoom)
+            with self._handle_lock:
+                if not self._ensure_open():
+                    return None
+                page = self.doc[page_index]
+                pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip,
+                                      colorspace=fitz.csRGB, alpha=False)
+            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+            # Arrotondamenti fitz: forza dimensione esatta del tile
+            size = (x1 - x0, y1 - y0)
+            if img.size != size:
+                img = img.resize(size)
+            return img
+
+        except Exception as e:
+            print(f"Error rendering region of page {pagenum}: {e}")
+            return None
+
+    def get_thumbnail(self, pagenum: int, size: tuple) -> Optional[Image.Image]:
+        """Get page thumbnail (fits size) from persistent disk cache or 'thumb' render"""
+        return load_thumbnail(self, pagenum, size)
+
     def clear_cache(self):
         """Clear the image cache to free memory"""
         self.cache.clear()
 
     def close(self):
         """Close the document and clear cache"""
-        if self.doc:
-            self.doc.close()
-            self.doc = None
+        with self._handle_lock:
+            self._loaded = False
+            self.release_handle()
+        get_handle_pool().forget(self)
         self.clear_cache()
 
     def get_cache_stats(self) -> dict:
         """Get cache statistics for debugging"""
-        return {
-            'cached_pages': len(self.cache.cache),
-            'memory_usage_mb': self.cache.current_memory / (1024 * 1024),
-            'max_memory_mb': self.cache.max_memory_bytes / (1024 * 1024)
-        }
+        stats = self.cache.get_stats()
+        stats.update(get_handle_pool().get_stats())
+        disk_cache = get_thumbnail_cache()
+        if disk_cache:
+            stats.update(disk_cache.get_stats())
+        return stats
 
     def get_page_info(self, pagenum: int) -> Optional[dict]:
         """Get information about a specific page"""
-        if not self.doc:
-            return None
-
         try:
             page_index = pagenum - 1
             if page_index < 0 or page_index >= self.totalpages:
                 return None
 
-            page = self.doc[page_index]
-            rect = page.rect
-            return {
-                'width': rect.width,
-                'height': rect.height,
-                'rotation': page.rotation
-            }
+            with self._handle_lock:
+                if not self._ensure_open():
+                    return None
+                page = self.doc[page_index]
+                rect = page.rect
+                return {
+                    'width': rect.width,
+                    'height': rect.height,
+                    'rotation': page.rotation
+                }
 
         except Exception as e:
             print(f"Error getting page info {pagenum}: {e}")
@@ -177,46 +421,121 @@ class TIFFDocumentLoader:
 
     def __init__(self, path: str):
         self.path = path
-        # Use memory-aware cache instead of loading all pages
-        self.cache = MemoryAwareLRUCache(max_items=20, max_memory_mb=60)
+        # Pagine in cache con budget di memoria globale condiviso tra documenti
+        self.cache = get_page_cache().create_cache(max_items=20)
         self.totalpages = 0
         self._tiff_img = None
+        self.file_key = None  # Identità file per cache miniature su disco
+        self.page_index = None  # Offset IFD e proprietà per pagina (se disponibili)
+        self._loaded = False
+        self._handle_lock = threading.RLock()  # Protegge _tiff_img dalla chiusura del pool handle
 
     def load(self):
         """Load the TIFF document"""
         try:
-            self._tiff_img = Image.open(self.path)
-            # Count pages without loading all of them
-            self.totalpages = 0
-            try:
-                while True:
-                    self._tiff_img.seek(self.totalpages)
-                    self.totalpages += 1
-            except EOFError:
-                pass  # End of sequence
-            
-            # Reset to first page
-            self._tiff_img.seek(0)
-
+            with self._handle_lock:
+                self._load_locked()
         except Exception as e:
             print(f"Error loading TIFF {self.path}: {e}")
             raise
 
-    def get_page(self, pagenum: int) -> Optional[Image.Image]:
+    def _load_locked(self):
+        """Apertura e conteggio pagine (lock handle già acquisito)"""
+        self._tiff_img = Image.open(self.path)
+        self.file_key = ThumbnailDiskCache.make_file_key(self.path)
+        self._loaded = True
+        get_handle_pool().touch(self, opened=True)
+
+        # Indice IFD: seek diretto a qualsiasi pagina senza percorrere la catena
+        self.page_index = self._load_ifd_index()
+        if self.page_index and apply_ifd_index(self._tiff_img, self.page_index):
+            self.totalpages = len(self.page_index)
+            return
+
+        self.page_index = None
+        # Count pages without loading all of them
+        self.totalpages = 0
+        try:
+            while True:
+                self._tiff_img.seek(self.totalpages)
+                self.totalpages += 1
+        except EOFError:
+            pass  # End of sequence
+        
+        # Reset to first page
+        self._tiff_img.seek(0)
+
+    def _ensure_open(self) -> bool:
+        """Riapre il file se chiuso dal pool handle (lock handle già acquisito)"""
+        if not self._loaded:
+            return False
+        if self._tiff_img is None:
+            self._tiff_img = Image.open(self.path)
+            if self.page_index:
+                apply_ifd_index(self._tiff_img, self.page_index)
+            get_handle_pool().touch(self, reopened=True)
+        else:
+            get_handle_pool().touch(self)
+        return True
+
+    def release_handle(self, blocking: bool = True) -> bool:
+        """Chiude il file mantenendo cache, indice e stato (riaperto al prossimo accesso)"""
+        if not self._handle_lock.acquire(blocking=blocking):
+            return False
+        try:
+            if self._tiff_img:
+                self._tiff_img.close()
+                self._tiff_img = None
+            return True
+        finally:
+            self._handle_lock.release()
+
+    def _load_ifd_index(self) -> Optional[list]:
+        """Indice IFD dalla cache su disco, altrimenti letto dal file e salvato (None se errore)"""
+        disk_cache = get_thumbnail_cache()
+        if disk_cache and self.file_key:
+            pages = disk_cache.get_page_index(self.file_key)
+            if pages:
+                return pages
+
+        try:
+            pages = read_tiff_ifd_index(self.path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"TIFF IFD index unavailable for {self.path}: {e}")
+            return None
+
+        if pages and disk_cache and self.file_key:
+            try:
+                disk_cache.put_page_index(self.file_key, pages)
+            except Exception as e:
+                print(f"Error saving TIFF page index: {e}")
+        return pages
+
+    def get_page(self, pagenum: int, profile: str = 'view', dpi: Optional[int] = None,
+                 colorspace: Optional[str] = None, alpha: Optional[bool] = None) -> Optional[Image.Image]:
         """Get a specific page as PIL Image with lazy loading
         
+        TIFF pages keep their native resolution and mode; the 'thumb' profile
+        returns a reduced copy (longest side <= TIFF_THUMB_MAX_SIDE).
+        
         Args:
             pagenum: Page number (1-based indexing)
+            profile: Render profile ('thumb', 'view', 'export')
+            dpi, colorspace, alpha: Accepted for API compatibility with PDFDocumentLoader
             
         Returns:
             PIL Image or None if error
         """
+        settings = resolve_render_profile(profile, dpi, colorspace, alpha)
+        is_thumb = profile == 'thumb'
+        cache_key = self._cache_key(pagenum, profile)
+        
         # Check cache first
-        cached_img = self.cache.get(pagenum)
+        cached_img = self.cache.get(cache_key)
         if cached_img is not None:
             return cached_img
 
-        if not self._tiff_img:
+        if not self._loaded:
             print("TIFF document not loaded")
             return None
 
@@ -228,11 +547,22 @@ class TIFFDocumentLoader:
                 return None
 
             # Load specific page only when needed
-            self._tiff_img.seek(page_index)
-            page = self._tiff_img.copy()  # Make a copy to avoid iterator issues
+            with self._handle_lock:
+                if not self._ensure_open():
+                    return None
+                self._tiff_img.seek(page_index)
+                page = self._tiff_img.copy()  # Make a copy to avoid iterator issues
+            
+            if is_thumb:
+                factor = max(page.width, page.height) // TIFF_THUMB_MAX_SIDE
+                if factor >= 2:
+                    if page.mode not in ("L", "RGB", "RGBA"):
+                        page = page.convert("L" if page.mode in ("1", "I;16") else "RGB")
+                    page = page.reduce(factor)
             
             # Cache the page
-            self.cache.put(pagenum, page)
+            if settings['cache']:
+                self.cache.put(cache_key, page)
             
             return page
 
@@ -240,24 +570,67 @@ class TIFFDocumentLoader:
             print(f"Error getting page {pagenum}: {e}")
             return None
 
+    @staticmethod
+    def _cache_key(pagenum: int, profile: str) -> tuple:
+        return (pagenum, 'thumb' if profile == 'thumb' else 'native')
+
+    def is_page_cached(self, pagenum: int, profile: str = 'view', dpi: Optional[int] = None,
+                       colorspace: Optional[str] = None, alpha: Optional[bool] = None) -> bool:
+        """True se get_page con questo profilo non richiede decodifica"""
+        return self._cache_key(pagenum, profile) in self.cache
+
+    def cache_page(self, pagenum: int, img: Image.Image, profile: str = 'view', dpi: Optional[int] = None,
+                   colorspace: Optional[str] = None, alpha: Optional[bool] = None):
+        """Memorizza una pagina decodificata altrove (es. loader di un thread worker)"""
+        settings = resolve_render_profile(profile, dpi, colorspace, alpha)
+        if self._loaded and settings['cache'] and img is not None:
+            self.cache.put(self._cache_key(pagenum, profile), img)
+
+    def get_thumbnail(self, pagenum: int, size: tuple) -> Optional[Image.Image]:
+        """Get page thumbnail (fits size) from persistent disk cache or 'thumb' render"""
+        return load_thumbnail(self, pagenum, size)
+
+    def get_page_pdf_image(self, pagenum: int) -> Optional[dict]:
+        """
+        Strip compressa della pagina (G4/JPEG) incorporabile in PDF senza decodifica
+
+        Returns:
+            {'data', 'keys', 'dpi'} (vedi get_tiff_page_pdf_image) o None se serve la decodifica
+        """
+        if not self._loaded or not self.page_index:
+            return None
+        page_index = pagenum - 1
+        if page_index < 0 or page_index >= len(self.page_index):
+            return None
+        entry = self.page_index[page_index]
+        if entry.get('compression') not in EMBEDDABLE_COMPRESSIONS:
+            return None
+        try:
+            return get_tiff_page_pdf_image(self.path, entry['offset'])
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Error reading compressed data of page {pagenum}: {e}")
+            return None
+
     def close(self):
         """Close and cleanup"""
-        if self._tiff_img:
-            self._tiff_img.close()
-            self._tiff_img = None
+        with self._handle_lock:
+            self._loaded = False
+            self.release_handle()
+        get_handle_pool().forget(self)
         self.cache.clear()
 
     def get_cache_stats(self) -> dict:
         """Get cache statistics for debugging"""
-        return {
-            'cached_pages': len(self.cache.cache),
-            'memory_usage_mb': self.cache.current_memory / (1024 * 1024),
-            'max_memory_mb': self.cache.max_memory_bytes / (1024 * 1024)
-        }
+        stats = self.cache.get_stats()
+        stats.update(get_handle_pool().get_stats())
+        disk_cache = get_thumbnail_cache()
+        if disk_cache:
+            stats.update(disk_cache.get_stats())
+        return stats
 
     def get_page_info(self, pagenum: int) -> Optional[dict]:
         """Get information about a specific page"""
-        if not self._tiff_img:
+        if not self._loaded:
             return None
 
         try:
@@ -265,19 +638,34 @@ class TIFFDocumentLoader:
             if page_index < 0 or page_index >= self.totalpages:
                 return None
 
-            current_page = self._tiff_img.tell()
-            self._tiff_img.seek(page_index)
-            
-            info = {
-                'width': self._tiff_img.width,
-                'height': self._tiff_img.height,
-                'mode': self._tiff_img.mode,
-                'format': self._tiff_img.format
-            }
-            
-            # Restore original page
-            self._tiff_img.seek(current_page)
-            return info
+            if self.page_index:
+                # Dall'indice IFD, senza seek
+                entry = self.page_index[page_index]
+                return {
+                    'width': entry.get('width'),
+                    'height': entry.get('height'),
+                    'mode': get_index_page_mode(entry),
+                    'compression': entry.get('compression'),
+                    'bits_per_sample': entry.get('bits_per_sample'),
+                    'format': 'TIFF'
+                }
+
+            with self._handle_lock:
+                if not self._ensure_open():
+                    return None
+                current_page = self._tiff_img.tell()
+                self._tiff_img.seek(page_index)
+                
+                info = {
+                    'width': self._tiff_img.width,
+                    'height': self._tiff_img.height,
+                    'mode': self._tiff_img.mode,
+                    'format': self._tiff_img.format
+                }
+                
+                # Restore original page
+                self._tiff_img.seek(current_page)
+                return info
 
         except Exception as e:
             print(f"Error getting page info {pagenum}: {e}")
@@ -0,0 +1,93 @@
+"""
+Bounded pool of open document handles: least recently used documents are closed and reopened on demand
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+
+
+class DocumentHandlePool:
+    """
+    Limita i documenti aperti contemporaneamente (file descriptor, xref PDF in memoria).
+    I loader segnalano ogni accesso con touch(); oltre max_open il pool chiude
+    l'handle del loader usato meno di recente, che lo riapre al prossimo accesso.
+    """
+
+    def __init__(self, max_open: int = 32):
+        self.max_open = max(1, max_open)
+        self.opens = 0
+        self.reopens = 0
+        self.closes = 0
+
+        self._open = OrderedDict()  # id(loader) -> weakref loader, ordine LRU
+        self._lock = threading.Lock()
+
+    def touch(self, loader, opened: bool = False, reopened: bool = False):
+        """
+        Segna il loader come usato (e aperto); chiude gli handle LRU in eccesso.
+        Da chiamare con il lock handle del loader acquisito.
+        """
+        with self._lock:
+            if opened:
+                self.opens += 1
+            if reopened:
+                self.reopens += 1
+            key = id(loader)
+            ref = self._open.pop(key, None)
+            if ref is None or ref() is not loader:
+                ref = weakref.ref(loader)
+            self._open[key] = ref  # In coda = usato più di recente
+            self._close_excess(key)
+
+    def forget(self, loader):
+        """Loader chiuso esplicitamente: non più gestito dal pool"""
+        with self._lock:
+            if self._open.pop(id(loader), None) is not None:
+                self.closes += 1
+
+    def set_max_open(self, max_open: int):
+        with self._lock:
+            self.max_open = max(1, max_open)
+            self._close_excess(None)
+
+    def get_stats(self) -> dict:
+        """Statistiche handle (per monitoraggio)"""
+        with self._lock:
+            return {
+                'open_documents': len(self._open),
+                'max_open_documents': self.max_open,
+                'opens': self.opens,
+                'reopens': self.reopens,
+                'closes': self.closes
+            }
+
+    def _close_excess(self, keep_key):
+        """Chiude handle LRU oltre il limite, saltando quelli in uso (lock già acquisito)"""
+        if len(self._open) <= self.max_open:
+            return
+        for key, ref in list(self._open.items()):
+            if len(self._open) <= self.max_open:
+                break
+            if key == keep_key:
+                continue
+            loader = ref()
+            if loader is None:
+                del self._open[key]  # Loader già raccolto dal GC
+            elif loader.release_handle(blocking=False):
+                del self._open[key]
+                self.closes += 1
+
+
+# Istanza condivisa da tutti i loader
+_handle_pool = DocumentHandlePool()
+
+
+def get_handle_pool() -> DocumentHandlePool:
+    """Ritorna il pool handle documenti condiviso"""
+    return _handle_pool
+
+
+def configure_handle_pool(max_open: int = 32):
+    """Configura numero massimo di documenti aperti (da chiamare all'avvio)"""
+    _handle_pool.set_max_open(max_open)
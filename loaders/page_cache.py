@@ -0,0 +1,264 @@
+"""
+Process-wide page cache: one memory budget shared by all document loaders, with per-document pinning
+"""
+
+import itertools
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Optional
+
+from PIL import Image
+
+
+# Byte per pixel della memoria Pillow decodificata ('1' non è compresso a bit: 1 byte/pixel)
+_MODE_PIXEL_BYTES = {
+    '1': 1, 'L': 1, 'P': 1,
+    'I;16': 2, 'I;16L': 2, 'I;16B': 2, 'I;16N': 2,
+    'BGR;15': 2, 'BGR;16': 2, 'BGR;24': 3,
+}
+
+
+def get_image_memory_size(img: Optional[Image.Image]) -> int:
+    """
+    Byte occupati dai pixel decodificati di una PIL Image.
+    Pillow memorizza i modi multi-banda (RGB, LA, YCbCr, ...) con 4 byte/pixel
+    """
+    if img is None:
+        return 0
+    return img.width * img.height * _MODE_PIXEL_BYTES.get(img.mode, 4)
+
+
+class PageCacheManager:
+    """
+    LRU globale sulle pagine di tutti i documenti aperti.
+    Oltre il budget viene rimossa la pagina usata meno di recente, di qualsiasi
+    documento; le pagine dei documenti fissati (pin) vengono rimosse solo se
+    non resta altro da liberare.
+    """
+
+    def __init__(self, max_memory_mb: int = 512, admit_max_fraction: Optional[float] = 0.25):
+        """
+        Args:
+            max_memory_mb: Budget globale (byte reali dei pixel decodificati)
+            admit_max_fraction: Pagine più grandi di questa frazione del budget non
+                vengono memorizzate (None: nessun limite)
+        """
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self.admit_max_fraction = admit_max_fraction
+        self.current_memory = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+        self.bytes_added = 0
+        self.bytes_evicted = 0
+
+        self._entries = OrderedDict()  # (owner, key) -> (image, size), ordine LRU globale
+        self._owners = {}  # owner -> OrderedDict key -> size (ordine LRU del documento)
+        self._owner_memory = {}  # owner -> byte
+        self._owner_hits = {}  # owner -> [hit, miss]
+        self._pinned = set()
+        self._owner_ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def create_cache(self, max_items: int = 50) -> 'DocumentPageCache':
+        """Vista cache per un documento (un loader)"""
+        owner = next(self._owner_ids)
+        with self._lock:
+            self._owners[owner] = OrderedDict()
+            self._owner_memory[owner] = 0
+            self._owner_hits[owner] = [0, 0]
+        return DocumentPageCache(self, owner, max_items)
+
+    def configure(self, max_memory_mb: int, admit_max_fraction: Optional[float] = 0.25):
+        """Cambia budget e politica di ammissione (eviction immediata se necessario)"""
+        with self._lock:
+            self.max_memory_bytes = max_memory_mb * 1024 * 1024
+            self.admit_max_fraction = admit_max_fraction
+            self._evict()
+
+    def get(self, owner: int, key):
+        with self._lock:
+            entry = self._entries.get((owner, key))
+            counts = self._owner_hits.get(owner)
+            if entry is None:
+                self.misses += 1
+                if counts:
+                    counts[1] += 1
+                return None
+            self.hits += 1
+            counts[0] += 1
+            self._entries.move_to_end((owner, key))
+            self._owners[owner].move_to_end(key)
+            return entry[0]
+
+    def contains(self, owner: int, key) -> bool:
+        """True se in cache (senza aggiornare LRU e contatori)"""
+        with self._lock:
+            return (owner, key) in self._entries
+
+    def put(self, owner: int, key, value: Image.Image, max_items: int):
+        size = get_image_memory_size(value)
+        with self._lock:
+            if owner not in self._owners:
+                return  # Documento già chiuso
+            self._remove(owner, key)
+            if (self.admit_max_fraction is not None and
+                    size > self.max_memory_bytes * self.admit_max_fraction):
+                # Pagina enorme: non svuota la cache per un solo elemento
+                self.rejected += 1
+                return
+            self._entries[(owner, key)] = (value, size)
+            self._owners[owner][key] = size
+            self._owner_memory[owner] += size
+            self.current_memory += size
+            self.bytes_added += size
+
+            # Limite pagine per documento, poi budget globale
+            owner_keys = self._owners[owner]
+            while len(owner_keys) > max_items:
+                self._evict_entry(owner, next(iter(owner_keys)))
+            self._evict()
+
+    def clear_owner(self, owner: int, forget: bool = False):
+        """Rimuove le pagine di un documento (forget: anche registrazione e pin)"""
+        with self._lock:
+            for key in list(self._owners.get(owner, ())):
+                self._remove(owner, key)
+            if forget:
+                self._owners.pop(owner, None)
+                self._owner_memory.pop(owner, None)
+                self._owner_hits.pop(owner, None)
+                self._pinned.discard(owner)
+
+    def pin(self, owner: int):
+        with self._lock:
+            if owner in self._owners:
+                self._pinned.add(owner)
+
+    def unpin(self, owner: int):
+        with self._lock:
+            self._pinned.discard(owner)
+
+    def owner_stats(self, owner: int) -> dict:
+        with self._lock:
+            hits, misses = self._owner_hits.get(owner, (0, 0))
+            return {
+                'cached_pages': len(self._owners.get(owner, ())),
+                'memory_usage_mb': self._owner_memory.get(owner, 0) / (1024 * 1024),
+                'pinned': owner in self._pinned,
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': (hits / (hits + misses)) if hits + misses else 0.0
+            }
+
+    def get_stats(self) -> dict:
+        """Statistiche cache globale"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'global_cached_pages': len(self._entries),
+                'global_memory_mb': self.current_memory / (1024 * 1024),
+                'global_max_memory_mb': self.max_memory_bytes / (1024 * 1024),
+                'global_documents': sum(1 for keys in self._owners.values() if keys),
+                'global_pinned_documents': len(self._pinned),
+                'global_hit_rate': (self.hits / total) if total else 0.0,
+                'global_evictions': self.evictions,
+                'global_rejected': self.rejected,
+                'global_bytes_added_mb': self.bytes_added / (1024 * 1024),
+                'global_bytes_evicted_mb': self.bytes_evicted / (1024 * 1024)
+            }
+
+    def _remove(self, owner: int, key):
+        """Rimuove una voce se presente (lock già acquisito)"""
+        entry = self._entries.pop((owner, key), None)
+        if entry is None:
+            return
+        size = entry[1]
+        del self._owners[owner][key]
+        self._owner_memory[owner] -= size
+        self.current_memory -= size
+
+    def _evict_entry(self, owner: int, key):
+        """Rimozione per eviction, con contatori (lock già acquisito)"""
+        entry = self._entries.get((owner, key))
+        if entry is not None:
+            self._remove(owner, key)
+            self.evictions += 1
+            self.bytes_evicted += entry[1]
+
+    def _evict(self):
+        """LRU globale fino a rientrare nel budget, saltando i documenti fissati (lock già acquisito)"""
+        if self.current_memory <= self.max_memory_bytes:
+            return
+        excess = self.current_memory - self.max_memory_bytes
+        victims = []
+        for (owner, key), (_, size) in self._entries.items():
+            if excess <= 0:
+                break
+            if owner not in self._pinned:
+                victims.append((owner, key))
+                excess -= size
+        for owner, key in victims:
+            self._evict_entry(owner, key)
+        # Solo pagine fissate oltre il budget: LRU anche su quelle
+        while self.current_memory > self.max_memory_bytes and self._entries:
+            owner, key = next(iter(self._entries))
+            self._evict_entry(owner, key)
+
+
+class DocumentPageCache:
+    """Cache pagine di un singolo loader, con memoria contabilizzata nel PageCacheManager globale"""
+
+    def __init__(self, manager: PageCacheManager, owner: int, max_items: int = 50):
+        self.manager = manager
+        self.owner = owner
+        self.max_items = max_items
+        # Loader dimenticato senza close(): libera comunque le sue pagine
+        self._finalizer = weakref.finalize(self, manager.clear_owner, owner, True)
+
+    def get(self, key):
+        """Get item from cache (None se assente)"""
+        return self.manager.get(self.owner, key)
+
+    def __contains__(self, key) -> bool:
+        return self.manager.contains(self.owner, key)
+
+    def put(self, key, value: Image.Image):
+        """Put item in cache (eviction secondo il budget globale)"""
+        self.manager.put(self.owner, key, value, self.max_items)
+
+    def clear(self):
+        """Clear all cached items of this document"""
+        self.manager.clear_owner(self.owner)
+
+    def pin(self):
+        """Protegge le pagine del documento dall'eviction (es. gruppo selezionato)"""
+        self.manager.pin(self.owner)
+
+    def unpin(self):
+        self.manager.unpin(self.owner)
+
+    def get_stats(self) -> dict:
+        """Statistiche del documento più quelle globali"""
+        stats = self.manager.owner_stats(self.owner)
+        stats.update(self.manager.get_stats())
+        return stats
+
+    def __len__(self):
+        return self.manager.owner_stats(self.owner)['cached_pages']
+
+
+# Istanza condivisa da tutti i loader
+_page_cache_manager = PageCacheManager()
+
+
+def get_page_cache() -> PageCacheManager:
+    """Ritorna il gestore cache pagine condiviso"""
+    return _page_cache_manager
+
+
+def configure_page_cache(max_memory_mb: int = 512, admit_max_fraction: Optional[float] = 0.25):
+    """Configura budget e ammissione cache pagine (da chiamare all'avvio)"""
+    _page_cache_manager.configure(max_memory_mb, admit_max_fraction)
@@ -0,0 +1,138 @@
+"""
+Fast path for scanned PDF pages: a page that is a single full-page image is decoded
+from its embedded stream instead of being rasterized by MuPDF
+"""
+
+import io
+import math
+import re
+from typing import Optional, Tuple
+
+import fitz
+from PIL import Image
+
+# Copertura minima della pagina da parte dell'immagine
+MIN_PAGE_COVERAGE = 0.98
+# Oltre questa dimensione il content stream non è quello di una semplice scansione
+MAX_CONTENT_BYTES = 4096
+# Oltre questa riduzione le immagini non JPEG sono lasciate al rendering MuPDF
+MAX_DOWNSCALE = 4
+# Operazioni di disegno ammesse oltre all'immagine (testo OCR invisibile)
+_IGNORED_OPS = {'ignore-text'}
+
+_CM_PATTERN = re.compile(rb'(-?[\d.]+)\s+(-?[\d.]+)\s+(-?[\d.]+)\s+(-?[\d.]+)\s+'
+                         rb'(-?[\d.]+)\s+(-?[\d.]+)\s+cm\b')
+
+# Rotazione pagina (senso orario) -> trasposizione immagine
+_ROTATIONS = {
+    90: Image.Transpose.ROTATE_270,
+    180: Image.Transpose.ROTATE_180,
+    270: Image.Transpose.ROTATE_90,
+}
+
+
+def detect_image_page(page: fitz.Page) -> Optional[Tuple[int, bool]]:
+    """
+    Riconosce una pagina scansionata: una sola immagine dritta, senza maschera,
+    che copre tutta la pagina, senza altro contenuto visibile né annotazioni
+
+    Returns:
+        (xref immagine, True se stream JPEG/DCT) oppure None
+    """
+    images = page.get_images(full=True)
+    if len(images) != 1:
+        return None
+    xref, smask = images[0][0], images[0][1]
+    if smask or images[0][9]:  # Maschera alpha o immagine dentro un Form XObject
+        return None
+    if page.first_annot is not None or page.first_widget is not None:
+        return None
+
+    # Una sola operazione visibile: l'immagine, a tutta pagina
+    image_boxes = []
+    for op, bbox in page.get_bboxlog():
+        if op == 'fill-image':
+            image_boxes.append(fitz.Rect(bbox))
+        elif op not in _IGNORED_OPS:
+            return None
+    if len(image_boxes) != 1:
+        return None
+    area = page.rect * page.derotation_matrix
+    covered = image_boxes[0] & area
+    if covered.is_empty or covered.get_area() < MIN_PAGE_COVERAGE * area.get_area():
+        return None
+
+    # Immagine dritta (niente rotazioni o specchiature nel content stream)
+    contents = page.read_contents()
+    if len(contents) > MAX_CONTENT_BYTES:
+        return None
+    for match in _CM_PATTERN.finditer(contents):
+        a, b, c, d = (float(v) for v in match.groups()[:4])
+        if b or c or a <= 0 or d <= 0:
+            return None
+
+    doc = page.parent
+    filter_value = doc.xref_get_key(xref, 'Filter')[1]
+    is_jpeg = (filter_value in ('/DCTDecode', '[/DCTDecode]') and
+               doc.xref_get_key(xref, 'Decode')[0] == 'null')
+    return xref, is_jpeg
+
+
+def get_image_page_jpeg(page: fitz.Page, xref: int) -> Optional[bytes]:
+    """Byte JPEG originali della scansione se utilizzabili così come sono (L/RGB, pagina non ruotata)"""
+    if page.rotation % 360:
+        return None
+    data = page.parent.xref_stream_raw(xref)
+    try:
+        with Image.open(io.BytesIO(data)) as img:  # Solo header
+            if img.format != 'JPEG' or img.mode not in ('L', 'RGB'):
+                return None
+    except Exception:
+        return None
+    return data
+
+
+def render_image_page(page: fitz.Page, xref: int, is_jpeg: bool, dpi: float,
+                      bilevel: bool = False) -> Optional[Image.Image]:
+    """
+    Decodifica l'immagine della scansione alla risoluzione nativa, ridotta solo
+    di fattori interi finché resta >= dpi richiesti (JPEG: riduzione DCT in decodifica)
+
+    Args:
+        bilevel: Scansioni a 1 bit non ridotte restituite in modo '1' invece di 'L'
+
+    Returns:
+        Immagine L/RGB (o '1') orientata come la pagina, con info['dpi'] effettivi; None se non gestibile
+    """
+    doc = page.parent
+    unrotated = page.rect * page.derotation_matrix
+    target_width = unrotated.width / 72 * dpi
+
+    if is_jpeg:
+        img = Image.open(io.BytesIO(doc.xref_stream_raw(xref)))
+        if img.mode not in ('L', 'RGB'):
+            return None
+        scale = target_width / img.width
+        img.draft(img.mode, (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+        img.load()
+    else:
+        native_width = int(doc.xref_get_key(xref, 'Width')[1])
+        if native_width > MAX_DOWNSCALE * target_width:
+            return None  # Miniature: MuPDF decodifica già sottocampionando
+        pix = fitz.Pixmap(doc, xref)
+        if pix.alpha or pix.n not in (1, 3):
+            return None
+        img = Image.frombytes('L' if pix.n == 1 else 'RGB', (pix.width, pix.height), pix.samples)
+
+    factor = int(img.width // target_width) if target_width > 0 else 1
+    if factor >= 2:
+        img = img.reduce(factor)
+    elif bilevel and not is_jpeg and img.mode == 'L' and doc.xref_get_key(xref, 'BitsPerComponent')[1] == '1':
+        img = img.convert('1', dither=Image.Dither.NONE)  # Solo valori 0/255: nessuna perdita
+
+    transpose = _ROTATIONS.get(page.rotation % 360)
+    if transpose is not None:
+        img = img.transpose(transpose)
+
+    img.info['dpi'] = (img.width * 72 / page.rect.width, img.height * 72 / page.rect.height)
+    return img
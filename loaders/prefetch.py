@@ -0,0 +1,174 @@
+"""
+Predictive page prefetch for the center viewer: neighbor and hovered pages rendered in background at view resolution
+"""
+
+import itertools
+import queue
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Tuple
+
+
+class PagePrefetcher:
+    """
+    Renderizza in un thread le pagine che probabilmente verranno visualizzate,
+    riempiendo la cache pagine dei loader. Ogni canale ('display', 'hover',
+    'neighbors') tiene solo l'ultima richiesta: quelle precedenti non ancora
+    eseguite sono saltate. Il thread usa handle documento propri: i loader
+    della GUI servono solo come chiave e destinazione della cache.
+    """
+
+    def __init__(self, profile: str = 'view', max_open_documents: int = 8):
+        """
+        Args:
+            profile: Profilo di rendering delle pagine
+            max_open_documents: Documenti aperti dal thread (LRU, poi chiusi)
+        """
+        self.profile = profile
+        self.max_open_documents = max_open_documents
+        self.results = queue.Queue()  # (loader, pagenum, image) delle richieste 'display'
+        self.requested = 0
+        self.rendered = 0
+        self.already_cached = 0
+        self.errors = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._requests = queue.PriorityQueue()
+        self._generations = {}  # canale -> generazione corrente
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._worker, name="page-prefetch", daemon=True)
+        self._thread.start()
+
+    def prefetch(self, pages: Iterable[Tuple[object, int]], channel: str = 'neighbors', priority: int = 1):
+        """
+        Sostituisce le richieste del canale con le pagine date, in ordine di priorità
+
+        Args:
+            pages: Coppie (document_loader, pagenum), le prime hanno precedenza
+            channel: Canale richiesta ('neighbors', 'hover')
+            priority: Priorità base del canale (bassa = prima)
+        """
+        with self._lock:
+            generation = self._generations.get(channel, 0) + 1
+            self._generations[channel] = generation
+        for order, (loader, pagenum) in enumerate(pages):
+            if loader is None or not hasattr(loader, 'is_page_cached'):
+                continue
+            self._requests.put((priority, order, next(self._seq), channel, generation, loader, pagenum))
+            self.requested += 1
+
+    def request_display(self, loader, pagenum: int):
+        """Pagina da mostrare non in cache: renderizzata per prima, risultato consegnato da drain()"""
+        self.prefetch([(loader, pagenum)], channel='display', priority=-1)
+
+    def drain(self, callback: Callable, max_items: int = 5) -> int:
+        """
+        Consegna le pagine 'display' pronte al thread chiamante (thread Tk)
+
+        Args:
+            callback: callback(loader, pagenum, image) con image None in caso di errore
+            max_items: Risultati massimi per chiamata (evita blocchi UI)
+        """
+        delivered = 0
+        while delivered < max_items:
+            try:
+                loader, pagenum, img = self.results.get_nowait()
+            except queue.Empty:
+                break
+            callback(loader, pagenum, img)
+            delivered += 1
+        return delivered
+
+    def record_display(self, loader, pagenum: int) -> bool:
+        """Conta hit/miss della pagina mostrata (True se già in cache), da chiamare prima del rendering"""
+        is_hit = bool(loader is not None and hasattr(loader, 'is_page_cached') and
+                      loader.is_page_cached(pagenum, profile=self.profile))
+        if is_hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return is_hit
+
+    def cancel_all(self):
+        """Annulla tutte le richieste in attesa"""
+        with self._lock:
+            for channel in self._generations:
+                self._generations[channel] += 1
+
+    def get_stats(self) -> dict:
+        """Statistiche prefetch"""
+        shown = self.hits + self.misses
+        return {
+            'prefetch_requested': self.requested,
+            'prefetch_rendered': self.rendered,
+            'prefetch_already_cached': self.already_cached,
+            'prefetch_errors': self.errors,
+            'prefetch_hits': self.hits,
+            'prefetch_misses': self.misses,
+            'prefetch_hit_rate': (self.hits / shown) if shown else 0.0
+        }
+
+    def shutdown(self):
+        """Ferma il thread di prefetch"""
+        self._stop.set()
+        self.cancel_all()
+
+    def _is_current(self, channel: str, generation: int) -> bool:
+        with self._lock:
+            return self._generations.get(channel) == generation
+
+    def _worker(self):
+        """Loop prefetch: richieste superate saltate, pagine già in cache non renderizzate"""
+        loaders = OrderedDict()  # path -> loader (solo di questo thread)
+        try:
+            while not self._stop.is_set():
+                try:
+                    _, _, _, channel, generation, loader, pagenum = self._requests.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+                if not self._is_current(channel, generation):
+                    continue
+
+                is_display = channel == 'display'
+                img = None
+                try:
+                    if not is_display and loader.is_page_cached(pagenum, profile=self.profile):
+                        self.already_cached += 1
+                        continue
+                    own_loader = self._get_loader(loaders, loader.path)
+                    img = own_loader.get_page(pagenum, profile=self.profile)
+                    # La copia resta solo nella cache del loader GUI
+                    own_loader.clear_cache()
+                    if img is not None:
+                        loader.cache_page(pagenum, img, profile=self.profile)
+                        self.rendered += 1
+                except Exception as e:
+                    print(f"Error prefetching page {pagenum}: {e}")
+                    self.errors += 1
+
+                if is_display and self._is_current(channel, generation):
+                    self.results.put((loader, pagenum, img))
+        finally:
+            for own_loader in loaders.values():
+                own_loader.close()
+
+    def _get_loader(self, loaders: OrderedDict, path: str):
+        """Loader del thread per path, con chiusura LRU oltre max_open_documents"""
+        from .document_loaders import create_document_loader
+
+        loader = loaders.get(path)
+        if loader is not None:
+            loaders.move_to_end(path)
+            return loader
+
+        loader = create_document_loader(path)
+        loader.load()
+        loaders[path] = loader
+        while len(loaders) > self.max_open_documents:
+            _, old_loader = loaders.popitem(last=False)
+            old_loader.close()
+        return loader
@@ -0,0 +1,150 @@
+"""
+Background thumbnail render service: renders pages in worker threads, results drained by the UI thread
+"""
+
+import os
+import queue
+import threading
+import itertools
+from collections import OrderedDict
+from typing import Callable, Tuple
+
+from .thumbnail_cache import load_thumbnail
+
+
+class ThumbnailRenderService:
+    """Renderizza miniature in thread worker, ognuno con i propri handle documento"""
+
+    def __init__(self, workers: int = 2, max_open_documents: int = 8):
+        """
+        Args:
+            workers: Numero thread di rendering
+            max_open_documents: Documenti aperti per worker (LRU, poi chiusi)
+        """
+        self.max_open_documents = max_open_documents
+        self.results = queue.Queue()
+        self.rendered = 0
+        self.errors = 0
+
+        self._requests = queue.PriorityQueue()
+        self._pending = {}  # target id -> seq dell'ultima richiesta valida
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self._threads = []
+        for i in range(max(1, workers)):
+            thread = threading.Thread(target=self._worker, name=f"thumb-render-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def request(self, target, path: str, pagenum: int, size: Tuple[int, int], priority: int = 0):
+        """
+        Accoda rendering miniatura (priorità bassa = prima).
+        Una nuova richiesta per lo stesso target sostituisce la precedente.
+        """
+        with self._lock:
+            seq = next(self._seq)
+            self._pending[id(target)] = seq
+        self._requests.put((priority, seq, target, path, pagenum, tuple(size)))
+
+    def cancel_all(self):
+        """Annulla richieste in attesa (es. prima di riassegnare le priorità)"""
+        with self._lock:
+            self._pending.clear()
+
+    def is_pending(self, target) -> bool:
+        """True se il target ha una richiesta in attesa"""
+        with self._lock:
+            return id(target) in self._pending
+
+    def drain(self, callback: Callable, max_items: int = 20) -> int:
+        """
+        Consegna i risultati pronti al thread chiamante (thread Tk)
+
+        Args:
+            callback: callback(target, image) con image None in caso di errore
+            max_items: Risultati massimi per chiamata (evita blocchi UI)
+        """
+        delivered = 0
+        while delivered < max_items:
+            try:
+                target, img = self.results.get_nowait()
+            except queue.Empty:
+                break
+            callback(target, img)
+            delivered += 1
+        return delivered
+
+    def get_stats(self) -> dict:
+        """Statistiche servizio"""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'workers': len(self._threads),
+            'pending': pending,
+            'rendered': self.rendered,
+            'errors': self.errors
+        }
+
+    def shutdown(self):
+        """Ferma i worker (i documenti aperti vengono chiusi dai worker stessi)"""
+        self._stop.set()
+        self.cancel_all()
+
+    def _is_current(self, target, seq: int) -> bool:
+        with self._lock:
+            return self._pending.get(id(target)) == seq
+
+    def _worker(self):
+        """Loop worker: handle documento propri, richieste superate saltate"""
+        loaders = OrderedDict()  # path -> loader (solo di questo thread)
+        try:
+            while not self._stop.is_set():
+                try:
+                    priority, seq, target, path, pagenum, size = self._requests.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+                if not self._is_current(target, seq):
+                    continue
+
+                img = None
+                try:
+                    loader = self._get_loader(loaders, path)
+                    img = load_thumbnail(loader, pagenum, size)
+                    self.rendered += 1
+                except Exception as e:
+                    print(f"Error rendering thumbnail {path} p.{pagenum}: {e}")
+                    self.errors += 1
+
+                with self._lock:
+                    if self._pending.get(id(target)) != seq:
+                        continue
+                    del self._pending[id(target)]
+                self.results.put((target, img))
+        finally:
+            for loader in loaders.values():
+                loader.close()
+
+    def _get_loader(self, loaders: OrderedDict, path: str):
+        """Loader del worker per path, con chiusura LRU oltre max_open_documents"""
+        from .document_loaders import create_document_loader
+
+        loader = loaders.get(path)
+        if loader is not None:
+            loaders.move_to_end(path)
+            return loader
+
+        loader = create_document_loader(path)
+        loader.load()
+        loaders[path] = loader
+        while len(loaders) > self.max_open_documents:
+            _, old_loader = loaders.popitem(last=False)
+            old_loader.close()
+        return loader
+
+
+def get_default_render_workers() -> int:
+    """Numero worker di default per il rendering miniature"""
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
@@ -0,0 +1,243 @@
+"""
+Persistent on-disk thumbnail cache (SQLite) for fast document reopening
+"""
+
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from config.constants import RESAMPLEFILTER
+
+
+class ThumbnailDiskCache:
+    """SQLite thumbnail store keyed by (file identity, page, thumbnail size) with LRU eviction"""
+
+    def __init__(self, db_path: str, max_size_mb: int = 256):
+        self.db_path = db_path
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        # Connessione condivisa tra thread (accesso serializzato da _lock)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS thumbnails (
+                file_key TEXT NOT NULL,
+                pagenum INTEGER NOT NULL,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (file_key, pagenum, width, height)
+            )
+        ''')
+        self.conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_thumbnails_access
+            ON thumbnails(last_access)
+        ''')
+        # Indici pagina (es. offset IFD dei TIFF multipagina) per riapertura veloce
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS page_index (
+                file_key TEXT PRIMARY KEY,
+                data TEXT NOT NULL
+            )
+        ''')
+        self.current_size = self.conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM thumbnails').fetchone()[0]
+
+    @staticmethod
+    def make_file_key(path: str) -> Optional[str]:
+        """Identità file da path assoluto, dimensione e mtime (None se non accessibile)"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def get(self, file_key: str, pagenum: int, size: Tuple[int, int]) -> Optional[Image.Image]:
+        """Recupera miniatura dalla cache (None se assente)"""
+        with self._lock:
+            row = self.conn.execute('''
+                SELECT data FROM thumbnails
+                WHERE file_key = ? AND pagenum = ? AND width = ? AND height = ?
+            ''', (file_key, pagenum, size[0], size[1])).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.conn.execute('''
+                UPDATE thumbnails SET last_access = ?
+                WHERE file_key = ? AND pagenum = ? AND width = ? AND height = ?
+            ''', (time.time(), file_key, pagenum, size[0], size[1]))
+
+        img = Image.open(io.BytesIO(row[0]))
+        img.load()
+        return img
+
+    def put(self, file_key: str, pagenum: int, size: Tuple[int, int], img: Image.Image):
+        """Salva miniatura (PNG) e applica eviction LRU se oltre il limite"""
+        buffer = io.BytesIO()
+        img.save(buffer, 'PNG')
+        data = buffer.getvalue()
+
+        with self._lock:
+            old = self.conn.execute('''
+                SELECT size FROM thumbnails
+                WHERE file_key = ? AND pagenum = ? AND width = ? AND height = ?
+            ''', (file_key, pagenum, size[0], size[1])).fetchone()
+            if old:
+                self.current_size -= old[0]
+
+            self.conn.execute('''
+                INSERT OR REPLACE INTO thumbnails
+                (file_key, pagenum, width, height, data, size, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (file_key, pagenum, size[0], size[1], data, len(data), time.time()))
+            self.current_size += len(data)
+
+            if self.current_size > self.max_size_bytes:
+                self._evict()
+
+    def get_page_index(self, file_key: str) -> Optional[list]:
+        """Indice pagine salvato per il file (None se assente)"""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT data FROM page_index WHERE file_key = ?', (file_key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
+
+    def put_page_index(self, file_key: str, pages: list):
+        """Salva indice pagine del file"""
+        data = json.dumps(pages, separators=(',', ':'))
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO page_index (file_key, data) VALUES (?, ?)',
+                (file_key, data))
+
+    def _evict(self):
+        """Elimina le miniature meno usate fino al 90% del limite (lock già acquisito)"""
+        target = self.max_size_bytes * 0.9
+        remaining = self.current_size
+        self.conn.execute('BEGIN')
+        try:
+            rows = self.conn.execute('''
+                SELECT rowid, size FROM thumbnails ORDER BY last_access
+            ''')
+            to_delete = []
+            for rowid, size in rows:
+                if remaining <= target:
+                    break
+                to_delete.append((rowid,))
+                remaining -= size
+            self.conn.executemany('DELETE FROM thumbnails WHERE rowid = ?', to_delete)
+            self.conn.execute('COMMIT')
+        except Exception:
+            # Nessuna transazione lasciata aperta: le prossime BEGIN devono poter partire
+            self.conn.execute('ROLLBACK')
+            raise
+        # Dimensione aggiornata solo a eliminazione confermata
+        self.current_size = remaining
+
+    def clear(self):
+        """Svuota la cache"""
+        with self._lock:
+            self.conn.execute('DELETE FROM thumbnails')
+            self.conn.execute('DELETE FROM page_index')
+            self.current_size = 0
+
+    def get_stats(self) -> dict:
+        """Statistiche cache su disco"""
+        total = self.hits + self.misses
+        return {
+            'disk_size_mb': self.current_size / (1024 * 1024),
+            'disk_max_mb': self.max_size_bytes / (1024 * 1024),
+            'disk_hits': self.hits,
+            'disk_misses': self.misses,
+            'disk_hit_rate': (self.hits / total) if total else 0.0
+        }
+
+    def close(self):
+        """Chiude la connessione"""
+        with self._lock:
+            self.conn.close()
+
+
+# Istanza condivisa (creata al primo uso)
+_thumbnail_cache: Optional[ThumbnailDiskCache] = None
+_thumbnail_cache_enabled = True
+_thumbnail_cache_max_mb = 256
+
+
+def configure_thumbnail_cache(enabled: bool = True, max_size_mb: int = 256):
+    """Configura cache miniature su disco (da chiamare all'avvio)"""
+    global _thumbnail_cache, _thumbnail_cache_enabled, _thumbnail_cache_max_mb
+    _thumbnail_cache_enabled = enabled
+    _thumbnail_cache_max_mb = max_size_mb
+    if _thumbnail_cache is not None:
+        _thumbnail_cache.max_size_bytes = max_size_mb * 1024 * 1024
+
+
+def get_thumbnail_cache() -> Optional[ThumbnailDiskCache]:
+    """Ritorna la cache miniature condivisa, o None se disabilitata/non disponibile"""
+    global _thumbnail_cache, _thumbnail_cache_enabled
+    if not _thumbnail_cache_enabled:
+        return None
+    if _thumbnail_cache is None:
+        try:
+            from config import THUMBNAIL_CACHE_FILE
+            _thumbnail_cache = ThumbnailDiskCache(THUMBNAIL_CACHE_FILE, _thumbnail_cache_max_mb)
+        except Exception as e:
+            print(f"Thumbnail disk cache unavailable: {e}")
+            _thumbnail_cache_enabled = False
+            return None
+    return _thumbnail_cache
+
+
+def load_thumbnail(loader, pagenum: int, size: Tuple[int, int]) -> Optional[Image.Image]:
+    """
+    Miniatura di una pagina (<= size) da cache su disco, altrimenti renderizzata
+    con il profilo 'thumb' del loader e salvata in cache
+    """
+    size = (int(size[0]), int(size[1]))
+    disk_cache = get_thumbnail_cache()
+    file_key = getattr(loader, 'file_key', None)
+
+    if disk_cache and file_key:
+        img = disk_cache.get(file_key, pagenum, size)
+        if img is not None:
+            return img
+
+    page = loader.get_page(pagenum, profile='thumb')
+    if page is None:
+        return None
+
+    img = page.copy()
+    img.thumbnail(size, RESAMPLEFILTER)
+
+    if disk_cache and file_key:
+        try:
+            disk_cache.put(file_key, pagenum, size, img)
+        except Exception as e:
+            print(f"Error saving thumbnail to disk cache: {e}")
+
+    return img
@@ -0,0 +1,190 @@
+"""
+TIFF IFD offset index: per-page offsets and basic properties read from the IFD chain in one pass
+"""
+
+import struct
+from typing import List
+
+# Tag TIFF letti per ogni pagina (gli altri vengono saltati)
+INDEX_TAGS = {
+    256: 'width',
+    257: 'height',
+    258: 'bits_per_sample',
+    259: 'compression',
+    262: 'photometric',
+    277: 'samples_per_pixel',
+}
+
+# Tipo TIFF -> (formato struct, byte)
+_FIELD_TYPES = {1: ('B', 1), 3: ('H', 2), 4: ('I', 4), 16: ('Q', 8)}
+
+
+def _read_tiff_header(f, path: str):
+    """
+    Byte order e layout IFD (TIFF classico o BigTIFF)
+
+    Returns:
+        (byte order, layout (count_fmt, entry_size, value_size, next_fmt), offset primo IFD)
+    """
+    header = f.read(16)
+    if header[:2] == b'II':
+        bo = '<'
+    elif header[:2] == b'MM':
+        bo = '>'
+    else:
+        raise ValueError(f"Not a TIFF file: {path}")
+
+    magic = struct.unpack(bo + 'H', header[2:4])[0]
+    if magic == 42:
+        return bo, ('H', 12, 4, 'I'), struct.unpack(bo + 'I', header[4:8])[0]
+    if magic == 43:  # BigTIFF
+        return bo, ('Q', 20, 8, 'Q'), struct.unpack(bo + 'Q', header[8:16])[0]
+    raise ValueError(f"Unsupported TIFF version {magic}: {path}")
+
+
+def read_tiff_ifd_index(path: str) -> List[dict]:
+    """
+    Legge la catena di IFD di un TIFF (classico o BigTIFF) senza decodificare immagini
+
+    Returns:
+        Lista di pagine {'offset', 'width', 'height', 'bits_per_sample', 'compression', ...}
+
+    Raises:
+        ValueError: File non TIFF o IFD non validi
+    """
+    with open(path, 'rb') as f:
+        bo, (count_fmt, entry_size, value_size, next_fmt), offset = _read_tiff_header(f, path)
+        n_values_fmt = 'I' if value_size == 4 else 'Q'
+
+        count_size = struct.calcsize(count_fmt)
+        next_size = struct.calcsize(next_fmt)
+        pages = []
+        seen = set()
+
+        while offset and offset not in seen:
+            seen.add(offset)
+            f.seek(offset)
+            raw_count = f.read(count_size)
+            if len(raw_count) < count_size:
+                raise ValueError(f"Truncated IFD at offset {offset}: {path}")
+            count = struct.unpack(bo + count_fmt, raw_count)[0]
+            data = f.read(count * entry_size + next_size)
+            if len(data) < count * entry_size + next_size:
+                raise ValueError(f"Truncated IFD at offset {offset}: {path}")
+
+            page = {'offset': offset}
+            for i in range(count):
+                entry = data[i * entry_size:(i + 1) * entry_size]
+                tag, field_type = struct.unpack(bo + 'HH', entry[:4])
+                if tag not in INDEX_TAGS or field_type not in _FIELD_TYPES:
+                    continue
+                fmt, size = _FIELD_TYPES[field_type]
+                n_values = struct.unpack(bo + n_values_fmt, entry[4:4 + value_size])[0]
+                value_field = entry[4 + value_size:]
+                if n_values * size <= value_size:
+                    value = struct.unpack(bo + fmt, value_field[:size])[0]
+                else:
+                    # Valori fuori linea: serve solo il primo
+                    pos = f.tell()
+                    f.seek(struct.unpack(bo + next_fmt, value_field)[0])
+                    value = struct.unpack(bo + fmt, f.read(size))[0]
+                    f.seek(pos)
+                page[INDEX_TAGS[tag]] = value
+
+            pages.append(page)
+            offset = struct.unpack(bo + next_fmt, data[count * entry_size:])[0]
+
+    return pages
+
+
+def read_ifd_tags(path: str, offset: int, tags) -> dict:
+    """
+    Legge tutti i valori dei tag richiesti da un singolo IFD
+
+    Returns:
+        tag -> tupla di valori (RATIONAL come coppie (num, den), UNDEFINED come bytes)
+
+    Raises:
+        ValueError: File non TIFF o IFD non valido
+    """
+    with open(path, 'rb') as f:
+        bo, (count_fmt, entry_size, value_size, next_fmt), _ = _read_tiff_header(f, path)
+        n_values_fmt = 'I' if value_size == 4 else 'Q'
+        count_size = struct.calcsize(count_fmt)
+
+        f.seek(offset)
+        raw_count = f.read(count_size)
+        if len(raw_count) < count_size:
+            raise ValueError(f"Truncated IFD at offset {offset}: {path}")
+        count = struct.unpack(bo + count_fmt, raw_count)[0]
+        data = f.read(count * entry_size)
+        if len(data) < count * entry_size:
+            raise ValueError(f"Truncated IFD at offset {offset}: {path}")
+
+        values = {}
+        for i in range(count):
+            entry = data[i * entry_size:(i + 1) * entry_size]
+            tag, field_type = struct.unpack(bo + 'HH', entry[:4])
+            if tag not in tags:
+                continue
+            n_values = struct.unpack(bo + n_values_fmt, entry[4:4 + value_size])[0]
+            if field_type == 5:  # RATIONAL
+                fmt, size = 'I', 8
+            elif field_type == 7:  # UNDEFINED (es. JPEGTables)
+                fmt, size = None, 1
+            elif field_type in _FIELD_TYPES:
+                fmt, size = _FIELD_TYPES[field_type]
+            else:
+                continue
+
+            value_field = entry[4 + value_size:]
+            if n_values * size <= value_size:
+                raw = value_field[:n_values * size]
+            else:
+                f.seek(struct.unpack(bo + next_fmt, value_field)[0])
+                raw = f.read(n_values * size)
+                if len(raw) < n_values * size:
+                    raise ValueError(f"Truncated tag {tag} at offset {offset}: {path}")
+
+            if fmt is None:
+                values[tag] = raw
+            elif field_type == 5:
+                pairs = struct.unpack(bo + 'I' * (2 * n_values), raw)
+                values[tag] = tuple(zip(pairs[::2], pairs[1::2]))
+            else:
+                values[tag] = struct.unpack(bo + fmt * n_values, raw)
+    return values
+
+
+def apply_ifd_index(tiff_img, pages: List[dict]) -> bool:
+    """
+    Precarica gli offset IFD nell'immagine Pillow aperta, così seek(n) salta
+    direttamente alla pagina n invece di percorrere la catena
+
+    Returns:
+        True se applicato (False: Pillow non compatibile o indice non coerente)
+    """
+    frame_pos = getattr(tiff_img, '_frame_pos', None)
+    if not pages or frame_pos is None or not hasattr(tiff_img, '_n_frames'):
+        return False
+    if frame_pos and frame_pos[0] != pages[0]['offset']:
+        return False
+    tiff_img._frame_pos = [page['offset'] for page in pages]
+    tiff_img._n_frames = len(pages)
+    return True
+
+
+def get_index_page_mode(page: dict):
+    """Modo Pillow stimato dalle proprietà dell'indice (None se non riconosciuto)"""
+    photometric = page.get('photometric')
+    bits = page.get('bits_per_sample', 1)
+    samples = page.get('samples_per_pixel', 1)
+    if photometric in (0, 1):
+        return {1: '1', 8: 'L', 16: 'I;16'}.get(bits)
+    if photometric in (2, 6):  # RGB / YCbCr (decodificato come RGB)
+        return {3: 'RGB', 4: 'RGBA'}.get(samples)
+    if photometric == 3:
+        return 'P'
+    if photometric == 5:
+        return 'CMYK'
+    return None
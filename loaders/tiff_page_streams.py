@@ -0,0 +1,118 @@
+"""
+TIFF pages embeddable in PDF without decoding: the compressed strip (CCITT G4 or JPEG)
+becomes the stream of a PDF image XObject as-is
+"""
+
+from typing import Optional
+
+from .tiff_index import read_ifd_tags
+
+# Tag TIFF usati per decidere se la pagina è incorporabile
+_TAGS = {
+    256,  # ImageWidth
+    257,  # ImageLength
+    258,  # BitsPerSample
+    259,  # Compression
+    262,  # PhotometricInterpretation
+    266,  # FillOrder
+    273,  # StripOffsets
+    274,  # Orientation
+    277,  # SamplesPerPixel
+    279,  # StripByteCounts
+    282,  # XResolution
+    283,  # YResolution
+    284,  # PlanarConfiguration
+    293,  # T6Options
+    296,  # ResolutionUnit
+    322,  # TileWidth
+    347,  # JPEGTables
+}
+
+# Compressioni TIFF incorporabili (G4, JPEG "new style")
+EMBEDDABLE_COMPRESSIONS = {4, 7}
+
+
+def _first(tags: dict, tag: int, default=None):
+    values = tags.get(tag)
+    return values[0] if values else default
+
+
+def _get_dpi(tags: dict) -> Optional[tuple]:
+    """DPI dai tag di risoluzione (None se assenti o senza unità, come Pillow)"""
+    unit = _first(tags, 296, 2)
+    x_res, y_res = _first(tags, 282), _first(tags, 283)
+    if unit not in (2, 3) or not x_res or not y_res or not x_res[1] or not y_res[1]:
+        return None
+    scale = 2.54 if unit == 3 else 1
+    return x_res[0] / x_res[1] * scale, y_res[0] / y_res[1] * scale
+
+
+def get_tiff_page_pdf_image(path: str, ifd_offset: int) -> Optional[dict]:
+    """
+    Dati compressi di una pagina TIFF utilizzabili direttamente come immagine PDF.
+    Solo pagine a strip singola, non ruotate: CCITT G4 (1 bit) o JPEG (grigio/RGB/YCbCr)
+
+    Returns:
+        {'data': bytes stream, 'keys': chiavi del dizionario XObject, 'dpi': (x, y) o None};
+        None se la pagina va decodificata e ricompressa
+    """
+    tags = read_ifd_tags(path, ifd_offset, _TAGS)
+    compression = _first(tags, 259, 1)
+    if compression not in EMBEDDABLE_COMPRESSIONS:
+        return None
+    if 322 in tags or len(tags.get(273, ())) != 1 or len(tags.get(279, ())) != 1:
+        return None  # Tile o più strip: ogni blocco è compresso separatamente
+    if _first(tags, 274, 1) != 1 or _first(tags, 284, 1) != 1:
+        return None
+
+    width, height = _first(tags, 256), _first(tags, 257)
+    bits = _first(tags, 258, 1)
+    samples = _first(tags, 277, 1)
+    photometric = _first(tags, 262)
+    if not width or not height:
+        return None
+
+    keys = {
+        'Type': '/XObject',
+        'Subtype': '/Image',
+        'Width': str(width),
+        'Height': str(height),
+    }
+
+    with open(path, 'rb') as f:
+        f.seek(tags[273][0])
+        data = f.read(tags[279][0])
+    if len(data) < tags[279][0]:
+        return None
+
+    if compression == 4:
+        # CCITT G4: photometric 0 (WhiteIsZero) = BlackIs1 false, 1 (BlackIsZero) = BlackIs1 true
+        if bits != 1 or samples != 1 or photometric not in (0, 1):
+            return None
+        if _first(tags, 266, 1) != 1 or _first(tags, 293, 0) & 2:
+            return None  # Bit in ordine inverso o modalità non compressa
+        keys.update({
+            'BitsPerComponent': '1',
+            'ColorSpace': '/DeviceGray',
+            'Filter': '/CCITTFaxDecode',
+            'DecodeParms': f"<</K -1/Columns {width}/Rows {height}/BlackIs1 {'true' if photometric == 1 else 'false'}>>",
+        })
+    else:
+        # JPEG: tabelle condivise (JPEGTables) unite allo stream abbreviato della strip
+        if bits != 8 or (samples, photometric) not in ((1, 1), (3, 2), (3, 6)):
+            return None
+        if data[:2] != b'\xff\xd8':
+            return None
+        tables = tags.get(347)
+        if tables and len(tables) > 4 and tables[:2] == b'\xff\xd8' and tables[-2:] == b'\xff\xd9':
+            data = tables[:-2] + data[2:]
+        keys.update({
+            'BitsPerComponent': '8',
+            'ColorSpace': '/DeviceGray' if samples == 1 else '/DeviceRGB',
+            'Filter': '/DCTDecode',
+        })
+        if samples == 3:
+            # Photometric RGB: componenti JPEG già RGB, nessuna conversione YCbCr
+            keys['DecodeParms'] = f"<</ColorTransform {0 if photometric == 2 else 1}>>"
+
+    return {'data': data, 'keys': keys, 'dpi': _get_dpi(tags)}
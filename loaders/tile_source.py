@@ -0,0 +1,131 @@
+"""
+Tile sources for the zoomable center viewer: only visible tiles are rendered at the current zoom
+"""
+
+import itertools
+import math
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from config.constants import RESAMPLEFILTER
+
+# Lato tile in pixel di visualizzazione
+TILE_SIZE = 256
+
+_source_ids = itertools.count(1)
+
+
+def get_tile_source_key(image: Image.Image, document_loader=None, pagenum: Optional[int] = None):
+    """
+    Chiave cache tile della pagina: stabile tra una visualizzazione e l'altra
+    (identità file, pagina, dimensione immagine base); id univoco senza documento
+    """
+    if document_loader is not None and pagenum is not None:
+        identity = getattr(document_loader, 'file_key', None) or getattr(document_loader, 'path', None)
+        if identity:
+            return identity, pagenum, image.size
+    return next(_source_ids)
+
+
+class ImageTileSource:
+    """Tile da piramide di risoluzioni (TIFF e immagini senza sorgente vettoriale)"""
+
+    def __init__(self, image: Image.Image, key=None):
+        """
+        Args:
+            key: Chiave cache tile (default: id univoco)
+        """
+        self.key = key if key is not None else next(_source_ids)
+        if image.mode not in ('L', 'RGB', 'RGBA'):
+            image = image.convert('L' if image.mode in ('1', 'I', 'I;16', 'F') else 'RGB')
+        self.size = image.size
+        self._levels = [image]  # livello n = originale ridotto di 2**n
+
+    def _get_level(self, zoom: float) -> Tuple[Image.Image, float]:
+        """Livello più piccolo con risoluzione >= zoom richiesto, e sua scala"""
+        level = 0
+        while zoom * (2 ** (level + 1)) <= 1.0 and min(self.size) >> (level + 1) >= 16:
+            level += 1
+        while len(self._levels) <= level:
+            self._levels.append(self._levels[-1].reduce(2))
+        return self._levels[level], 1.0 / (2 ** level)
+
+    def get_display_size(self, zoom: float) -> Tuple[int, int]:
+        """Dimensione immagine visualizzata allo zoom dato"""
+        return int(self.size[0] * zoom), int(self.size[1] * zoom)
+
+    def get_tile(self, zoom: float, tx: int, ty: int, tile_size: int = TILE_SIZE) -> Optional[Image.Image]:
+        """Tile (tx, ty) allo zoom dato, None se fuori immagine"""
+        region = _tile_region(self.get_display_size(zoom), tx, ty, tile_size)
+        if region is None:
+            return None
+        x0, y0, x1, y1 = region
+
+        level_img, level_scale = self._get_level(zoom)
+        scale = zoom / level_scale  # pixel visualizzati per pixel del livello
+        box = (x0 / scale, y0 / scale,
+               min(level_img.width, x1 / scale), min(level_img.height, y1 / scale))
+        return level_img.resize((x1 - x0, y1 - y0), RESAMPLEFILTER, box=box)
+
+
+class PDFTileSource:
+    """
+    Tile PDF: fino alla risoluzione dell'immagine 'view' dalla sua piramide,
+    oltre renderizzati da PyMuPDF con clip (nitidi a qualsiasi zoom)
+    """
+
+    def __init__(self, loader, pagenum: int, image: Image.Image, key=None):
+        """
+        Args:
+            loader: PDFDocumentLoader della pagina
+            pagenum: Numero pagina (1-based)
+            image: Immagine 'view' della pagina (definisce dimensione base e DPI)
+            key: Chiave cache tile (default: da file, pagina e dimensione immagine)
+        """
+        self.key = key if key is not None else get_tile_source_key(image, loader, pagenum)
+        self.loader = loader
+        self.pagenum = pagenum
+        self.size = image.size
+        self.base_dpi = image.info.get('dpi', (144, 144))[0] or 144
+        self._pyramid = ImageTileSource(image)
+
+    def get_display_size(self, zoom: float) -> Tuple[int, int]:
+        """Dimensione immagine visualizzata allo zoom dato"""
+        return int(self.size[0] * zoom), int(self.size[1] * zoom)
+
+    def get_tile(self, zoom: float, tx: int, ty: int, tile_size: int = TILE_SIZE) -> Optional[Image.Image]:
+        """Tile (tx, ty) allo zoom dato, None se fuori pagina o errore"""
+        if zoom <= 1.0:
+            return self._pyramid.get_tile(zoom, tx, ty, tile_size)
+        region = _tile_region(self.get_display_size(zoom), tx, ty, tile_size)
+        if region is None:
+            return None
+        return self.loader.get_page_region(self.pagenum, self.base_dpi * zoom, region)
+
+
+def _tile_region(display_size: Tuple[int, int], tx: int, ty: int,
+                 tile_size: int) -> Optional[Tuple[int, int, int, int]]:
+    """Rettangolo (x0, y0, x1, y1) del tile in pixel visualizzati, None se fuori"""
+    x0, y0 = tx * tile_size, ty * tile_size
+    x1 = min(x0 + tile_size, display_size[0])
+    y1 = min(y0 + tile_size, display_size[1])
+    if tx < 0 or ty < 0 or x0 >= x1 or y0 >= y1:
+        return None
+    return x0, y0, x1, y1
+
+
+def get_tile_grid(display_size: Tuple[int, int], tile_size: int = TILE_SIZE) -> Tuple[int, int]:
+    """Numero di tile (colonne, righe) per la dimensione visualizzata"""
+    return math.ceil(display_size[0] / tile_size), math.ceil(display_size[1] / tile_size)
+
+
+def create_tile_source(image: Image.Image, document_loader=None, pagenum: Optional[int] = None):
+    """
+    Sorgente tile per il viewer: PDF con clip se disponibile, altrimenti piramide immagine.
+    Con documento e pagina la chiave cache è stabile: riselezionare la pagina riusa i tile
+    """
+    key = get_tile_source_key(image, document_loader, pagenum)
+    if document_loader is not None and pagenum is not None and hasattr(document_loader, 'get_page_region'):
+        return PDFTileSource(document_loader, pagenum, image, key)
+    return ImageTileSource(image, key)
@@ -41,5 +41,8 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Necessario per ProcessPoolExecutor (export batch) negli eseguibili PyInstaller
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
     
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Export batch parallelo: nomi file riservati in modo atomico tra processi
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+import batch.batch_exporter as batch_exporter
+import loaders.thumbnail_cache as thumbnail_cache
+from export.export_manager import ExportManager
+
+
+class _Config(dict):
+    @property
+    def config_data(self):
+        return self
+
+    def get(self, key, default=None):
+        return super().get(key, default)
+
+    def set(self, key, value):
+        self[key] = value
+
+
+class _Group:
+    def __init__(self, categoryname, thumbnails):
+        self.categoryname = categoryname
+        self.thumbnails = thumbnails
+
+
+class _Page:
+    def __init__(self, image):
+        self.image = image
+        self.pagenum = 0
+
+
+def _reserve_names(base_path, count):
+    manager = ExportManager(_Config())
+    manager.reserve_output_files = True
+    return [manager.get_unique_filepath(base_path) for _ in range(count)]
+
+
+def test_reserved_names_are_unique_across_processes(tmp_path):
+    base_path = str(tmp_path / 'doc.pdf')
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(_reserve_names, base_path, 10) for _ in range(4)]
+        names = [name for future in futures for name in future.result()]
+
+    assert len(names) == 40
+    assert len(set(names)) == 40
+    assert all(os.path.exists(name) for name in names)
+
+
+def test_skipped_reservation_is_removed(tmp_path, monkeypatch):
+    manager = ExportManager(_Config(export_format='JPEG', file_handling_mode='auto_rename'))
+    manager.reserve_output_files = True
+
+    def fail_save(filepath, thumbnail, quality):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(manager, '_save_jpeg_page', fail_save)
+    group = _Group('Fattura', [_Page(Image.new('RGB', (10, 10)))])
+    try:
+        manager.export_documents(str(tmp_path), [group], 'doc')
+    except OSError:
+        pass
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_export_worker_disables_thumbnail_cache(monkeypatch):
+    monkeypatch.setattr(thumbnail_cache, '_thumbnail_cache_enabled', True)
+    monkeypatch.setattr(batch_exporter, '_worker_exporter', None)
+    config = _Config(file_handling_mode='ask_overwrite')
+
+    batch_exporter._init_export_worker(config)
+
+    assert thumbnail_cache.get_thumbnail_cache() is None
+    assert config['file_handling_mode'] == 'auto_rename'
+    assert batch_exporter._worker_exporter.export_manager.reserve_output_files
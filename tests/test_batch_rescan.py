@@ -0,0 +1,107 @@
+"""
+Rescan incrementale batch: errori di lettura non devono rimuovere documenti dalla sessione
+"""
+
+import json
+import os
+import time
+
+import pytest
+
+from batch import BatchDatabase, BatchScanner
+
+
+def _make_pair(dirpath, name, data=None):
+    os.makedirs(dirpath, exist_ok=True)
+    with open(os.path.join(dirpath, f"{name}.pdf"), 'wb') as f:
+        f.write(b'%PDF-1.4\n')
+    with open(os.path.join(dirpath, f"{name}.json"), 'w') as f:
+        json.dump(data or {'name': name}, f)
+
+
+def _age_tree(root, seconds=60):
+    """Retrodata file e directory (mtime recenti non sono salvati nell'indice)"""
+    past = time.time() - seconds
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in filenames:
+            os.utime(os.path.join(dirpath, name), (past, past))
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        os.utime(dirpath, (past, past))
+
+
+@pytest.fixture
+def session(tmp_path):
+    root = str(tmp_path / 'batch')
+    _make_pair(root, 'root0')
+    _make_pair(os.path.join(root, 'a'), 'a0')
+    _make_pair(os.path.join(root, 'a'), 'a1')
+    _make_pair(os.path.join(root, 'a', 'sub'), 's0')
+    _make_pair(os.path.join(root, 'a', 'sub'), 's1')
+    _age_tree(root)
+
+    db = BatchDatabase(str(tmp_path / 'batch.db'))
+    scanner = BatchScanner(max_workers=2)
+    session_id = db.create_session(root)
+    for chunk in scanner.iter_scan_chunks(root, index_db=db, session_id=session_id):
+        db.add_documents(session_id, chunk)
+    yield root, db, scanner, session_id
+    db.close()
+
+
+def _session_paths(db, session_id):
+    return {db.get_document(doc_id)['doc_path'] for doc_id in db.get_session_document_ids(session_id)}
+
+
+def test_unreadable_directory_keeps_documents(session, monkeypatch):
+    root, db, scanner, session_id = session
+    before = _session_paths(db, session_id)
+    assert len(before) == 5
+
+    failing = os.path.join(root, 'a')
+    real_scandir = os.scandir
+
+    def flaky_scandir(path):
+        if path == failing:
+            raise PermissionError(13, 'Permission denied', path)
+        return real_scandir(path)
+
+    # Directory modificata, poi non leggibile durante il rescan
+    _make_pair(os.path.join(root, 'a'), 'a2')
+    monkeypatch.setattr(os, 'scandir', flaky_scandir)
+    diff = scanner.rescan(root, db, session_id)
+    monkeypatch.setattr(os, 'scandir', real_scandir)
+
+    assert diff.removed == []
+    assert scanner.get_stats()['dirs_unreadable'] == 1
+    db.merge_scan_diff(session_id, diff)
+    assert _session_paths(db, session_id) == before
+
+    # Rescan sano: la directory è riletta (mtime non salvato) e la nuova coppia aggiunta
+    diff = scanner.rescan(root, db, session_id)
+    assert [os.path.basename(pair.doc_path) for pair in diff.added] == ['a2.pdf']
+    assert diff.removed == []
+    db.merge_scan_diff(session_id, diff)
+    assert _session_paths(db, session_id) == before | {os.path.join(root, 'a', 'a2.pdf')}
+
+
+def test_unreadable_json_is_not_removed(session):
+    root, db, scanner, session_id = session
+    json_path = os.path.join(root, 'a', 'a0.json')
+
+    # JSON in scrittura: non valido durante il rescan (directory modificata: riletta)
+    with open(json_path, 'w') as f:
+        f.write('{"name": ')
+    open(os.path.join(root, 'a', 'notes.txt'), 'w').close()
+    diff = scanner.rescan(root, db, session_id)
+    assert diff.removed == []
+    assert diff.changed == []
+    db.merge_scan_diff(session_id, diff)
+    assert os.path.join(root, 'a', 'a0.pdf') in _session_paths(db, session_id)
+
+    # JSON completato: coppia riletta come modificata
+    with open(json_path, 'w') as f:
+        json.dump({'name': 'a0', 'updated': True}, f)
+    os.remove(os.path.join(root, 'a', 'notes.txt'))
+    diff = scanner.rescan(root, db, session_id)
+    assert [os.path.basename(pair.doc_path) for pair in diff.changed] == ['a0.pdf']
+    assert diff.removed == []
@@ -0,0 +1,62 @@
+"""
+Export PDF: pagine da PDF copiate con testo anche in gruppi misti PDF+TIFF
+"""
+
+import fitz
+from PIL import Image, ImageDraw
+
+import loaders.thumbnail_cache as thumbnail_cache
+from export.export_manager import ExportManager
+from loaders import create_document_loader
+
+
+class _Config(dict):
+    def get(self, key, default=None):
+        return super().get(key, default)
+
+
+class _Page:
+    def __init__(self, loader, pagenum):
+        self.document_loader = loader
+        self.pagenum = pagenum
+
+
+def test_mixed_pdf_tiff_group_keeps_pdf_text(tmp_path, monkeypatch):
+    monkeypatch.setattr(thumbnail_cache, '_thumbnail_cache_enabled', False)
+
+    pdf_path = str(tmp_path / 'source.pdf')
+    doc = fitz.open()
+    for text in ('first page text', 'second page text'):
+        page = doc.new_page()
+        page.insert_text((72, 72), text)
+    doc.save(pdf_path)
+    doc.close()
+
+    tiff_path = str(tmp_path / 'scan.tiff')
+    scan = Image.new('1', (850, 1100), 1)
+    ImageDraw.Draw(scan).rectangle((100, 100, 700, 300), fill=0)
+    scan.save(tiff_path, compression='group4', dpi=(100, 100))
+
+    pdf_loader = create_document_loader(pdf_path)
+    pdf_loader.load()
+    tiff_loader = create_document_loader(tiff_path)
+    tiff_loader.load()
+    try:
+        manager = ExportManager(_Config(export={'pdf_dpi': 100}))
+        output = str(tmp_path / 'out.pdf')
+        pages = [_Page(pdf_loader, 1), _Page(tiff_loader, 1), _Page(pdf_loader, 2)]
+        assert manager._save_pdf_pages(output, pages)
+    finally:
+        pdf_loader.close()
+        tiff_loader.close()
+
+    with fitz.open(output) as result:
+        assert result.page_count == 3
+        # Pagine PDF copiate così come sono: testo preservato, nessuna immagine
+        assert 'first page text' in result[0].get_text()
+        assert not result[0].get_images()
+        assert 'second page text' in result[2].get_text()
+        # Pagina TIFF: immagine a tutta pagina alle dimensioni della scansione
+        assert result[1].get_text().strip() == ''
+        assert len(result[1].get_images()) == 1
+        assert round(result[1].rect.width) == 612 and round(result[1].rect.height) == 792
@@ -0,0 +1,80 @@
+"""
+Prefetch pagine viewer: rendering con handle propri del thread, risultato nella cache del loader GUI
+"""
+
+import threading
+import time
+
+import fitz
+
+import loaders.thumbnail_cache as thumbnail_cache
+from loaders import create_document_loader
+from loaders.prefetch import PagePrefetcher
+
+
+def _make_pdf(path, pages=3):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"page {i + 1}")
+    doc.save(path)
+    doc.close()
+
+
+def _wait(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def _gui_loader(path):
+    loader = create_document_loader(path)
+    loader.load()
+    gui_thread = threading.current_thread()
+    render = loader.get_page
+
+    def get_page(*args, **kwargs):
+        assert threading.current_thread() is gui_thread, "GUI loader used by prefetch thread"
+        return render(*args, **kwargs)
+
+    loader.get_page = get_page
+    return loader
+
+
+def test_neighbors_rendered_into_gui_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(thumbnail_cache, '_thumbnail_cache_enabled', False)
+    path = str(tmp_path / 'doc.pdf')
+    _make_pdf(path)
+    loader = _gui_loader(path)
+    prefetcher = PagePrefetcher()
+    try:
+        prefetcher.prefetch([(loader, 2), (loader, 3)])
+        assert _wait(lambda: prefetcher.rendered + prefetcher.errors >= 2)
+        assert prefetcher.errors == 0
+        assert loader.is_page_cached(2) and loader.is_page_cached(3)
+        assert prefetcher.record_display(loader, 2)
+    finally:
+        prefetcher.shutdown()
+        loader.close()
+
+
+def test_display_request_delivered_by_drain(tmp_path, monkeypatch):
+    monkeypatch.setattr(thumbnail_cache, '_thumbnail_cache_enabled', False)
+    path = str(tmp_path / 'doc.pdf')
+    _make_pdf(path)
+    loader = _gui_loader(path)
+    prefetcher = PagePrefetcher()
+    delivered = []
+    try:
+        assert not prefetcher.record_display(loader, 1)
+        prefetcher.request_display(loader, 1)
+        assert _wait(lambda: prefetcher.drain(lambda *result: delivered.append(result)) > 0)
+        (result_loader, pagenum, img), = delivered
+        assert result_loader is loader and pagenum == 1
+        assert img is not None
+        assert loader.get_page(1) is img  # Servita dalla cache condivisa
+    finally:
+        prefetcher.shutdown()
+        loader.close()